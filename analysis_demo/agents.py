@@ -1,42 +1,154 @@
 import json
 import os
-from typing import Any, Dict, List
-
-import anthropic
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加backend目录到Python路径（共享LLM响应缓存）
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from clients import (
+    async_provider_slot,
+    get_anthropic_client,
+    get_async_anthropic_client,
+    provider_slot,
+)
+from features import DEFAULT_SAMPLE_SIZE, format_agent_context
+from incremental import format_previous_result
+from llm_cache import get_llm_cache, is_json_response
+from usage import get_usage_meter
 
 # Claude API配置
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+CLAUDE_MODEL = "claude-3-sonnet-20240229"
+CLAUDE_TEMPERATURE = 0.3
 
 
-def call_claude(prompt: str, system_prompt: str = "") -> str:
-    """调用Claude API的通用函数"""
-    if not CLAUDE_API_KEY:
-        raise ValueError("CLAUDE_API_KEY 环境变量未设置")
-
-    client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-
+def _claude_request(prompt: str, system_prompt: str) -> Dict[str, Any]:
+    """Claude messages API的请求参数"""
     messages = []
     if system_prompt:
         messages.append({"role": "user", "content": f"System: {system_prompt}"})
 
     messages.append({"role": "user", "content": prompt})
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 2000,
+        "temperature": CLAUDE_TEMPERATURE,
+        "messages": messages,
+    }
+
+
+def call_claude(
+    prompt: str,
+    system_prompt: str = "",
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], Any]] = is_json_response,
+) -> str:
+    """
+    调用Claude API的通用函数（相同提示词命中缓存时不再请求）
 
-    response = client.messages.create(
-        model="claude-3-sonnet-20240229",
-        max_tokens=2000,
-        temperature=0.3,
-        messages=messages,
+    使用进程内共享的长连接客户端，并发请求数受 CLAUDE_MAX_CONCURRENCY 限制。
+    传入 on_token 时以流式方式请求，每收到一段文本就回调一次；
+    命中缓存时把完整响应作为一段文本回调。
+    只有通过 validate（默认要求是合法JSON）的响应才会写入缓存。
+    """
+    if not CLAUDE_API_KEY:
+        raise ValueError("CLAUDE_API_KEY 环境变量未设置")
+
+    request = _claude_request(prompt, system_prompt)
+
+    # 缓存未命中、真正发出请求时记录token用量
+    usage = {}
+
+    def request_claude() -> str:
+        client = get_anthropic_client(CLAUDE_API_KEY)
+
+        with provider_slot("claude"):
+            if on_token is None:
+                response = client.messages.create(**request)
+            else:
+                with client.messages.stream(**request) as stream:
+                    for text in stream.text_stream:
+                        on_token(text)
+                    response = stream.get_final_message()
+
+        usage["input_tokens"] = response.usage.input_tokens
+        usage["output_tokens"] = response.usage.output_tokens
+        return response.content[0].text.strip()
+
+    result = get_llm_cache().get_or_call(
+        "claude",
+        CLAUDE_MODEL,
+        CLAUDE_TEMPERATURE,
+        request["messages"],
+        request_claude,
+        bypass=not use_cache,
+        validate=validate,
     )
+    get_usage_meter().record("claude", CLAUDE_MODEL, cached=not usage, **usage)
+    if on_token is not None and not usage:
+        on_token(result)
+    return result
+
+
+async def acall_claude(
+    prompt: str,
+    system_prompt: str = "",
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], Any]] = is_json_response,
+) -> str:
+    """call_claude 的asyncio版本（使用当前事件循环共享的异步客户端）"""
+    if not CLAUDE_API_KEY:
+        raise ValueError("CLAUDE_API_KEY 环境变量未设置")
 
-    return response.content[0].text.strip()
+    request = _claude_request(prompt, system_prompt)
+    usage = {}
+
+    async def request_claude() -> str:
+        client = get_async_anthropic_client(CLAUDE_API_KEY)
+
+        async with async_provider_slot("claude"):
+            if on_token is None:
+                response = await client.messages.create(**request)
+            else:
+                async with client.messages.stream(**request) as stream:
+                    async for text in stream.text_stream:
+                        on_token(text)
+                    response = await stream.get_final_message()
+
+        usage["input_tokens"] = response.usage.input_tokens
+        usage["output_tokens"] = response.usage.output_tokens
+        return response.content[0].text.strip()
+
+    result = await get_llm_cache().aget_or_call(
+        "claude",
+        CLAUDE_MODEL,
+        CLAUDE_TEMPERATURE,
+        request["messages"],
+        request_claude,
+        bypass=not use_cache,
+        validate=validate,
+    )
+    get_usage_meter().record("claude", CLAUDE_MODEL, cached=not usage, **usage)
+    if on_token is not None and not usage:
+        on_token(result)
+    return result
 
 
-def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def position_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     持仓分析Agent - 分析交易者的持仓模式和策略
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 持仓分析结果
@@ -49,8 +161,9 @@ def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，评估交易者的持仓模式和投资策略：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - position_type: 持仓类型 ["conservative", "moderate", "aggressive", "mixed"]
@@ -95,12 +208,18 @@ def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
 
 
-def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def signal_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     信号分析Agent - 分析市场信号和交易时机
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 信号分析结果
@@ -113,8 +232,9 @@ def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，识别市场信号和交易时机：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - market_sentiment: 市场情绪 ["bullish", "bearish", "neutral", "volatile"]
@@ -162,12 +282,18 @@ def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
 
 
-def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def industry_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     行业分析Agent - 分析涉及的行业和生态
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 行业分析结果
@@ -180,8 +306,9 @@ def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，识别涉及的行业和生态系统：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - primary_sector: 主要行业 ["DeFi", "NFT", "Gaming", "Infrastructure", "Payment", "Mixed"]
@@ -227,7 +354,10 @@ def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 
 def advisor_agent(
-    position: Dict[str, Any], signals: Dict[str, Any], industry: Dict[str, Any]
+    position: Dict[str, Any],
+    signals: Dict[str, Any],
+    industry: Dict[str, Any],
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     """
     投资顾问Agent - 综合所有分析结果，提供投资建议
@@ -236,6 +366,7 @@ def advisor_agent(
         position: 持仓分析结果
         signals: 信号分析结果
         industry: 行业分析结果
+        on_token: 流式输出回调（每收到一段文本调用一次）
 
     Returns:
         Dict: 投资建议
@@ -287,7 +418,7 @@ def advisor_agent(
     """
 
     try:
-        result = call_claude(prompt, system_prompt)
+        result = call_claude(prompt, system_prompt, on_token=on_token)
         return json.loads(result)
     except Exception as e:
         return {
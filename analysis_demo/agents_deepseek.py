@@ -1,19 +1,34 @@
 import json
 import os
-from typing import Any, Dict, List
-
-import requests
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加backend目录到Python路径（共享LLM响应缓存）
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from clients import (
+    LLM_TIMEOUT_SECONDS,
+    async_provider_slot,
+    get_async_http_client,
+    get_session,
+    provider_slot,
+)
+from features import DEFAULT_SAMPLE_SIZE, format_agent_context
+from incremental import format_previous_result
+from llm_cache import get_llm_cache, is_json_response
+from usage import get_usage_meter
 
 # DeepSeek API配置
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = os.getenv(
+    "DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions"
+)
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_TEMPERATURE = 0.3
 
 
-def call_deepseek(prompt: str, system_prompt: str = "") -> str:
-    """调用DeepSeek API的通用函数"""
-    if not DEEPSEEK_API_KEY:
-        raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
-
+def _deepseek_request(prompt: str, system_prompt: str) -> Dict[str, Any]:
+    """DeepSeek chat completions 的请求头和请求体"""
     headers = {
         "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
         "Content-Type": "application/json",
@@ -26,27 +41,202 @@ def call_deepseek(prompt: str, system_prompt: str = "") -> str:
     messages.append({"role": "user", "content": prompt})
 
     payload = {
-        "model": "deepseek-chat",
+        "model": DEEPSEEK_MODEL,
         "messages": messages,
-        "temperature": 0.3,
+        "temperature": DEEPSEEK_TEMPERATURE,
         "max_tokens": 2000,
     }
+    return {"headers": headers, "payload": payload}
+
+
+def _stream_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {**payload, "stream": True, "stream_options": {"include_usage": True}}
+
+
+def _parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+    """解析一行SSE数据，非数据行返回None，结束标记返回空字典"""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+        return {}
+    return json.loads(data)
+
+
+def _usage_fields(token_usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    token_usage = token_usage or {}
+    return {
+        "input_tokens": token_usage.get("prompt_tokens", 0),
+        "output_tokens": token_usage.get("completion_tokens", 0),
+    }
+
+
+def _chunk_texts(chunk: Dict[str, Any]) -> List[str]:
+    return [
+        text
+        for choice in chunk.get("choices") or []
+        if (text := (choice.get("delta") or {}).get("content"))
+    ]
 
-    response = requests.post(
-        DEEPSEEK_API_URL, headers=headers, json=payload, timeout=60
+
+def call_deepseek(
+    prompt: str,
+    system_prompt: str = "",
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], Any]] = is_json_response,
+) -> str:
+    """
+    调用DeepSeek API的通用函数（相同提示词命中缓存时不再请求）
+
+    使用进程内共享的长连接会话，并发请求数受 DEEPSEEK_MAX_CONCURRENCY 限制。
+    传入 on_token 时以流式方式请求（SSE），每收到一段文本就回调一次；
+    命中缓存时把完整响应作为一段文本回调。
+    只有通过 validate（默认要求是合法JSON）的响应才会写入缓存。
+    """
+    if not DEEPSEEK_API_KEY:
+        raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
+
+    request = _deepseek_request(prompt, system_prompt)
+    headers, payload = request["headers"], request["payload"]
+
+    # 缓存未命中、真正发出请求时记录token用量
+    usage = {}
+
+    def request_deepseek() -> str:
+        with provider_slot("deepseek"):
+            response = get_session("deepseek").post(
+                DEEPSEEK_API_URL,
+                headers=headers,
+                json=payload,
+                timeout=LLM_TIMEOUT_SECONDS,
+            )
+        response.raise_for_status()
+
+        result = response.json()
+        usage.update(_usage_fields(result.get("usage")))
+        return result["choices"][0]["message"]["content"].strip()
+
+    def stream_deepseek() -> str:
+        parts = []
+        token_usage = None
+        with provider_slot("deepseek"):
+            with get_session("deepseek").post(
+                DEEPSEEK_API_URL,
+                headers=headers,
+                json=_stream_payload(payload),
+                timeout=LLM_TIMEOUT_SECONDS,
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    chunk = _parse_sse_line(line)
+                    if chunk is None:
+                        continue
+                    if not chunk:
+                        break
+                    token_usage = chunk.get("usage") or token_usage
+                    for text in _chunk_texts(chunk):
+                        parts.append(text)
+                        on_token(text)
+
+        usage.update(_usage_fields(token_usage))
+        return "".join(parts).strip()
+
+    result = get_llm_cache().get_or_call(
+        "deepseek",
+        DEEPSEEK_MODEL,
+        DEEPSEEK_TEMPERATURE,
+        payload["messages"],
+        request_deepseek if on_token is None else stream_deepseek,
+        bypass=not use_cache,
+        validate=validate,
     )
-    response.raise_for_status()
+    get_usage_meter().record("deepseek", DEEPSEEK_MODEL, cached=not usage, **usage)
+    if on_token is not None and not usage:
+        on_token(result)
+    return result
+
+
+async def acall_deepseek(
+    prompt: str,
+    system_prompt: str = "",
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], Any]] = is_json_response,
+) -> str:
+    """call_deepseek 的asyncio版本（使用当前事件循环共享的 httpx.AsyncClient）"""
+    if not DEEPSEEK_API_KEY:
+        raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
 
-    result = response.json()
-    return result["choices"][0]["message"]["content"].strip()
+    request = _deepseek_request(prompt, system_prompt)
+    headers, payload = request["headers"], request["payload"]
+    usage = {}
+
+    async def request_deepseek() -> str:
+        client = get_async_http_client("deepseek")
+        async with async_provider_slot("deepseek"):
+            response = await client.post(
+                DEEPSEEK_API_URL, headers=headers, json=payload
+            )
+        response.raise_for_status()
+
+        result = response.json()
+        usage.update(_usage_fields(result.get("usage")))
+        return result["choices"][0]["message"]["content"].strip()
+
+    async def stream_deepseek() -> str:
+        parts = []
+        token_usage = None
+        client = get_async_http_client("deepseek")
+        async with async_provider_slot("deepseek"):
+            async with client.stream(
+                "POST", DEEPSEEK_API_URL, headers=headers, json=_stream_payload(payload)
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    chunk = _parse_sse_line(line)
+                    if chunk is None:
+                        continue
+                    if not chunk:
+                        break
+                    token_usage = chunk.get("usage") or token_usage
+                    for text in _chunk_texts(chunk):
+                        parts.append(text)
+                        on_token(text)
+
+        usage.update(_usage_fields(token_usage))
+        return "".join(parts).strip()
+
+    result = await get_llm_cache().aget_or_call(
+        "deepseek",
+        DEEPSEEK_MODEL,
+        DEEPSEEK_TEMPERATURE,
+        payload["messages"],
+        request_deepseek if on_token is None else stream_deepseek,
+        bypass=not use_cache,
+        validate=validate,
+    )
+    get_usage_meter().record("deepseek", DEEPSEEK_MODEL, cached=not usage, **usage)
+    if on_token is not None and not usage:
+        on_token(result)
+    return result
 
 
-def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def position_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     持仓分析Agent - 分析交易者的持仓模式和策略
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 持仓分析结果
@@ -59,8 +249,9 @@ def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，评估交易者的持仓模式和投资策略：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - position_type: 持仓类型 ["conservative", "moderate", "aggressive", "mixed"]
@@ -105,12 +296,18 @@ def position_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
 
 
-def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def signal_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     信号分析Agent - 分析市场信号和交易时机
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 信号分析结果
@@ -123,8 +320,9 @@ def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，识别市场信号和交易时机：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - market_sentiment: 市场情绪 ["bullish", "bearish", "neutral", "volatile"]
@@ -172,12 +370,18 @@ def signal_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
 
 
-def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def industry_agent(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     行业分析Agent - 分析涉及的行业和生态
 
     Args:
         txs: 交易记录列表
+        sample_size: 提示词中附带的交易样本数量
+        previous: 上一次分析结果（增量分析时txs只包含新增交易）
 
     Returns:
         Dict: 行业分析结果
@@ -190,8 +394,9 @@ def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
     prompt = f"""
     请分析以下交易记录，识别涉及的行业和生态系统：
 
-    交易数据：
-    {json.dumps(txs, indent=2, ensure_ascii=False)}
+    {format_previous_result(previous)}
+    交易特征摘要（本地预先计算的统计数据，请直接引用其中的数值，不要重新计算）及部分交易样本：
+    {format_agent_context(txs, sample_size)}
 
     请返回JSON格式的分析结果，包含以下字段：
     - primary_sector: 主要行业 ["DeFi", "NFT", "Gaming", "Infrastructure", "Payment", "Mixed"]
@@ -237,7 +442,10 @@ def industry_agent(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 
 def advisor_agent(
-    position: Dict[str, Any], signals: Dict[str, Any], industry: Dict[str, Any]
+    position: Dict[str, Any],
+    signals: Dict[str, Any],
+    industry: Dict[str, Any],
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     """
     投资顾问Agent - 综合所有分析结果，提供投资建议
@@ -246,6 +454,7 @@ def advisor_agent(
         position: 持仓分析结果
         signals: 信号分析结果
         industry: 行业分析结果
+        on_token: 流式输出回调（每收到一段文本调用一次）
 
     Returns:
         Dict: 投资建议
@@ -297,7 +506,7 @@ def advisor_agent(
     """
 
     try:
-        result = call_deepseek(prompt, system_prompt)
+        result = call_deepseek(prompt, system_prompt, on_token=on_token)
         return json.loads(result)
     except Exception as e:
         return {
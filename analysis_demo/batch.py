@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+批量多Agent分析
+读取地址列表，把地址分配到进程池中并发分析，所有进程共享一个LLM并发上限；
+每完成一个地址就写入检查点，中断后重新运行会跳过已完成的地址，
+结束时输出吞吐量和费用汇总
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set
+
+
+# 添加backend目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import db
+from budget import token_limit
+from concurrency import set_llm_semaphore
+from runner import load_transactions_from_db, save_results_to_db
+from usage import diff_usage, estimate_cost, get_usage_meter, merge_usage
+from workflow import create_workflow_instance
+
+
+# 检查点中视为已完成、续跑时跳过的状态（partial/failed 会重新分析）
+DONE_STATUSES = {"completed", "no_transactions"}
+
+DEFAULT_CHECKPOINT = "analysis_demo/batch_checkpoint.jsonl"
+
+
+def read_addresses(path: str) -> List[str]:
+    """读取地址列表（每行一个地址，忽略空行和#注释，去重并保持顺序）"""
+    addresses: List[str] = []
+    seen: Set[str] = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            address = line.split("#", 1)[0].strip().lower()
+            if address and address not in seen:
+                seen.add(address)
+                addresses.append(address)
+    return addresses
+
+
+def read_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """读取检查点：地址 -> 最后一条记录（忽略写了一半的行）"""
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("address"):
+                records[record["address"]] = record
+    return records
+
+
+def init_worker(semaphore: Any, db_path: str, verbose: bool):
+    """子进程初始化：设置共享的LLM并发信号量和数据库路径"""
+    set_llm_semaphore(semaphore)
+    db.DATABASE_PATH = db_path
+    if not verbose:
+        # 子进程内的分析日志不输出到终端
+        sys.stdout = open(os.devnull, "w")
+
+
+def analyze_address(
+    address: str,
+    provider: str = "claude",
+    db_path: str = "transactions.db",
+    limit: int = 0,
+    mode: str = "auto",
+    incremental: bool = True,
+) -> Dict[str, Any]:
+    """
+    在子进程中分析一个地址并写入数据库
+
+    Returns:
+        Dict: 检查点记录
+    """
+    started = time.perf_counter()
+    meter = get_usage_meter()
+    usage_before = meter.snapshot()
+    record: Dict[str, Any] = {"address": address, "provider": provider}
+
+    try:
+        transactions = load_transactions_from_db(db_path, limit=limit, address=address)
+        record["transaction_count"] = len(transactions)
+        if not transactions:
+            record["status"] = "no_transactions"
+        else:
+            latest = db.get_analysis(address) if incremental else None
+            previous = latest["result"] if latest else {}
+            # 每个地址使用独立的工作流实例
+            results = create_workflow_instance(provider).execute_workflow(
+                transactions,
+                mode=mode,
+                previous=previous,
+                token_budget=token_limit(db.get_analysis_token_usage(address)),
+            )
+            metadata = results.setdefault("metadata", {})
+            metadata["address"] = address
+            record["status"] = metadata.get("status", "failed")
+            record["mode"] = metadata.get("mode")
+            # 超出预算时没有调用LLM，不保存新版本
+            if record["status"] != "budget_exceeded":
+                record["version"] = save_results_to_db(address, results)
+            if results.get("error"):
+                record["error"] = results["error"]
+            if record.get("version") is None and record["status"] in (
+                "completed",
+                "partial",
+            ):
+                record["status"] = "failed"
+                record["error"] = "分析结果写入数据库失败"
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+
+    record["usage"] = diff_usage(meter.snapshot(), usage_before)
+    record["duration"] = round(time.perf_counter() - started, 3)
+    record["finished_at"] = int(time.time())
+    return record
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+def summarize(
+    records: List[Dict[str, Any]], wall_time: float, resumed: int
+) -> Dict[str, Any]:
+    """本次运行的吞吐量和费用汇总"""
+    statuses: Dict[str, int] = {}
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+
+    usage: Dict[str, Dict[str, int]] = {}
+    for record in records:
+        merge_usage(usage, record.get("usage", {}))
+    calls = sum(counters["calls"] for counters in usage.values())
+    cache_hits = sum(counters["cache_hits"] for counters in usage.values())
+    cost = estimate_cost(usage)
+    transactions = sum(record.get("transaction_count", 0) for record in records)
+    durations = [record["duration"] for record in records]
+
+    return {
+        "addresses_processed": len(records),
+        "addresses_resumed": resumed,
+        "status_counts": statuses,
+        "wall_time_seconds": round(wall_time, 3),
+        "addresses_per_minute": (
+            round(len(records) / wall_time * 60, 2) if wall_time else None
+        ),
+        "transactions": transactions,
+        "transactions_per_second": (
+            round(transactions / wall_time, 2) if wall_time else None
+        ),
+        "address_duration_seconds": {
+            "p50": _percentile(durations, 0.5),
+            "p95": _percentile(durations, 0.95),
+            "max": max(durations) if durations else None,
+        },
+        "llm_calls": calls,
+        "llm_requests": calls - cache_hits,
+        "llm_cache_hit_rate": round(cache_hits / calls, 4) if calls else 0.0,
+        "input_tokens": sum(counters["input_tokens"] for counters in usage.values()),
+        "output_tokens": sum(counters["output_tokens"] for counters in usage.values()),
+        "estimated_cost_usd": cost,
+        "cost_per_address_usd": round(cost / len(records), 6) if records else 0.0,
+        "usage_by_model": usage,
+    }
+
+
+def run_batch(
+    addresses: List[str],
+    provider: str = "claude",
+    workers: int = 4,
+    llm_concurrency: int = 8,
+    checkpoint: str = DEFAULT_CHECKPOINT,
+    resume: bool = True,
+    db_path: str = "transactions.db",
+    limit: int = 0,
+    mode: str = "auto",
+    incremental: bool = True,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    批量分析地址列表
+
+    Args:
+        addresses: 地址列表
+        provider: "claude" 或 "deepseek"
+        workers: 进程数
+        llm_concurrency: 所有进程合计同时进行的LLM请求数上限
+        checkpoint: 检查点文件（JSONL，每完成一个地址追加一行）
+        resume: 是否跳过检查点中已完成的地址
+        db_path: 交易数据库路径
+        limit: 每个地址加载的交易数量（<=0 表示全部）
+        mode: 分析模式 auto / single / mapreduce
+        incremental: 是否基于上一次结果增量分析
+        verbose: 是否输出子进程的分析日志
+
+    Returns:
+        Dict: 汇总
+    """
+    done = (
+        {
+            address
+            for address, record in read_checkpoint(checkpoint).items()
+            if record.get("status") in DONE_STATUSES
+        }
+        if resume
+        else set()
+    )
+    pending = [address for address in addresses if address not in done]
+    resumed = len(addresses) - len(pending)
+    print(f"共 {len(addresses)} 个地址，检查点中已完成 {resumed} 个，待分析 {len(pending)} 个")
+
+    # 建表和迁移只在主进程执行一次（已有的数据库可能还没有analyses表）
+    db.DATABASE_PATH = db_path
+    db.init_database()
+
+    records: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    checkpoint_dir = os.path.dirname(checkpoint)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    with multiprocessing.Manager() as manager, open(
+        checkpoint, "a", encoding="utf-8"
+    ) as checkpoint_file:
+        semaphore = manager.BoundedSemaphore(llm_concurrency)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(semaphore, db_path, verbose),
+        ) as executor:
+            in_flight: Dict[Future, str] = {}
+
+            def collect(block: bool):
+                if block:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                else:
+                    finished = [future for future in in_flight if future.done()]
+                for future in finished:
+                    address = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {"address": address, "status": "failed"}
+                        record.update(error=str(e), duration=0.0, usage={})
+                    records.append(record)
+                    checkpoint_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    checkpoint_file.flush()
+                    print(
+                        f"[{len(records)}/{len(pending)}] {address}: "
+                        f"{record['status']} ({record.get('duration', 0):.1f}s)"
+                    )
+
+            for address in pending:
+                # 只保留有限的在途任务，地址列表很长时不会一次性提交
+                while len(in_flight) >= workers * 2:
+                    collect(block=True)
+                future = executor.submit(
+                    analyze_address,
+                    address,
+                    provider,
+                    db_path,
+                    limit,
+                    mode,
+                    incremental,
+                )
+                in_flight[future] = address
+                collect(block=False)
+            while in_flight:
+                collect(block=True)
+
+    return summarize(records, time.perf_counter() - started, resumed)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量多Agent加密货币交易分析")
+    parser.add_argument("addresses", help="地址列表文件（每行一个地址）")
+    parser.add_argument(
+        "--provider", choices=["claude", "deepseek"], default="claude", help="AI提供方"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="进程数")
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=8, help="所有进程合计的LLM并发请求上限"
+    )
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="检查点文件")
+    parser.add_argument("--no-resume", action="store_true", help="忽略检查点，全部重新分析")
+    parser.add_argument("--summary", help="汇总输出文件（默认与检查点同名的 .summary.json）")
+    parser.add_argument("--db", default="transactions.db", help="交易数据库路径")
+    parser.add_argument("--limit", type=int, default=0, help="每个地址加载的交易数量，0表示全部")
+    parser.add_argument(
+        "--mode", choices=["auto", "single", "mapreduce"], default="auto", help="分析模式"
+    )
+    parser.add_argument("--full", action="store_true", help="忽略上一次结果，完整重新分析")
+    parser.add_argument("--verbose", action="store_true", help="输出每个地址的分析日志")
+    args = parser.parse_args()
+
+    addresses = read_addresses(args.addresses)
+    if not addresses:
+        print(f"地址列表为空: {args.addresses}")
+        return
+
+    summary = run_batch(
+        addresses,
+        provider=args.provider,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        checkpoint=args.checkpoint,
+        resume=not args.no_resume,
+        db_path=args.db,
+        limit=args.limit,
+        mode=args.mode,
+        incremental=not args.full,
+        verbose=args.verbose,
+    )
+
+    summary_file = (
+        args.summary or os.path.splitext(args.checkpoint)[0] + ".summary.json"
+    )
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 60)
+    print("批量分析汇总")
+    print("=" * 60)
+    print(
+        f"处理地址: {summary['addresses_processed']} (续跑跳过 {summary['addresses_resumed']})"
+    )
+    print(f"状态: {summary['status_counts']}")
+    print(
+        f"耗时: {summary['wall_time_seconds']}s, 每分钟 {summary['addresses_per_minute']} 个地址"
+    )
+    print(
+        f"LLM调用: {summary['llm_calls']} (缓存命中率 {summary['llm_cache_hit_rate']:.1%}), "
+        f"token: {summary['input_tokens']} 输入 / {summary['output_tokens']} 输出"
+    )
+    print(
+        f"估算费用: ${summary['estimated_cost_usd']:.4f} "
+        f"(每个地址 ${summary['cost_per_address_usd']:.4f})"
+    )
+    print(f"汇总已保存到: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
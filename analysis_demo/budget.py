@@ -0,0 +1,207 @@
+"""
+分析运行的token预算
+执行前用tokenizer估算本次运行的token数（提示词 + 预计输出），
+超过单次运行预算或地址剩余预算时，依次改用单次紧凑特征摘要、更少的交易样本，
+直到估算值落在预算内；仍然超出时拒绝执行
+"""
+
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from features import DEFAULT_SAMPLE_SIZE, format_agent_context
+from mapreduce import (
+    MAP_AGENTS,
+    TOKEN_ESTIMATE_SAMPLE,
+    estimate_tokens_per_tx,
+    plan_chunks,
+)
+
+
+# 单次分析的token预算（提示词 + 输出），0表示不限制
+RUN_TOKEN_BUDGET = int(os.getenv("ANALYSIS_RUN_TOKEN_BUDGET", "0"))
+# 单个地址所有分析版本累计的token预算，0表示不限制
+ADDRESS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_ADDRESS_TOKEN_BUDGET", "0"))
+
+# 每次Agent调用中提示词模板（说明、字段列表、示例）的token数
+PROMPT_OVERHEAD_TOKENS = 700
+# 每次Agent调用预计的输出token数
+EXPECTED_OUTPUT_TOKENS = 500
+# 投资顾问调用的提示词token数（模板 + 三个分析结果）
+ADVISOR_PROMPT_TOKENS = 1800
+
+# 超出预算时依次尝试的交易样本数
+FALLBACK_SAMPLE_SIZES = [DEFAULT_SAMPLE_SIZE, 3, 0]
+
+_token_counter: Optional[Callable[[str], int]] = None
+
+
+class BudgetExceededError(Exception):
+    """最省token的执行方式也超出预算"""
+
+    def __init__(self, estimated_tokens: int, limit: int):
+        super().__init__(f"预计消耗 {estimated_tokens} tokens，超出预算 {limit} tokens")
+        self.estimated_tokens = estimated_tokens
+        self.limit = limit
+
+
+def count_tokens(text: str) -> int:
+    """用tiktoken（cl100k_base）计数，未安装时按约4个字符一个token估算"""
+    global _token_counter
+    if _token_counter is None:
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding("cl100k_base")
+            _token_counter = lambda s: len(encoding.encode(s, disallowed_special=()))
+        except Exception:
+            _token_counter = lambda s: max(1, len(s) // 4)
+    return _token_counter(text)
+
+
+def token_limit(
+    address_tokens_used: int = 0,
+    run_budget: int = RUN_TOKEN_BUDGET,
+    address_budget: int = ADDRESS_TOKEN_BUDGET,
+) -> Optional[int]:
+    """
+    本次运行可用的token数（单次预算与地址剩余预算取小），都未配置时返回None
+
+    Args:
+        address_tokens_used: 该地址之前各版本已消耗的token数
+    """
+    limits = []
+    if run_budget > 0:
+        limits.append(run_budget)
+    if address_budget > 0:
+        limits.append(max(0, address_budget - address_tokens_used))
+    return min(limits) if limits else None
+
+
+def _call_tokens(context_tokens: int) -> int:
+    return context_tokens + PROMPT_OVERHEAD_TOKENS + EXPECTED_OUTPUT_TOKENS
+
+
+def estimate_run_tokens(
+    inputs: Dict[str, List[Dict[str, Any]]],
+    mode: str,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    advisor: bool = True,
+) -> int:
+    """
+    估算一次运行的token数
+
+    Args:
+        inputs: 需要执行的分析Agent -> 其输入交易（增量时为新增交易）
+        mode: "single" 或 "mapreduce"（mapreduce只对完整输入的Agent分块）
+        sample_size: single模式下提示词中的交易样本数
+        advisor: 是否需要执行投资顾问分析
+    """
+    total = 0
+    # 相同输入的提示词相同，只计数一次
+    context_tokens: Dict[Tuple[str, int], int] = {}
+    for txs in inputs.values():
+        if not txs:
+            continue
+        if mode == "mapreduce":
+            tokens_per_tx = estimate_tokens_per_tx(txs[:TOKEN_ESTIMATE_SAMPLE])
+            chunk_size, chunk_sample = plan_chunks(len(txs), tokens_per_tx)
+            chunks = math.ceil(len(txs) / chunk_size)
+            key = (mode, id(txs))
+            if key not in context_tokens:
+                context_tokens[key] = count_tokens(
+                    format_agent_context(txs[:chunk_size], chunk_sample)
+                )
+            total += chunks * _call_tokens(context_tokens[key])
+        else:
+            key = (mode, id(txs))
+            if key not in context_tokens:
+                context_tokens[key] = count_tokens(
+                    format_agent_context(txs, sample_size)
+                )
+            total += _call_tokens(context_tokens[key])
+    if advisor:
+        total += ADVISOR_PROMPT_TOKENS + EXPECTED_OUTPUT_TOKENS
+    return total
+
+
+def plan_budget(
+    inputs: Dict[str, List[Dict[str, Any]]],
+    mode: str,
+    limit: Optional[int],
+    advisor: bool = True,
+) -> Dict[str, Any]:
+    """
+    选择预算内最完整的执行方式
+
+    依次尝试：原模式 + 默认样本数，single模式（全部交易的紧凑特征摘要），
+    再逐步减少样本数。
+
+    Returns:
+        Dict: {"mode", "sample_size", "estimated_tokens", "token_limit", "degraded"}
+
+    Raises:
+        BudgetExceededError: 最省的方式也超出预算
+    """
+    candidates = [(mode, DEFAULT_SAMPLE_SIZE)]
+    candidates += [
+        ("single", size)
+        for size in FALLBACK_SAMPLE_SIZES
+        if ("single", size) not in candidates
+    ]
+
+    estimate = 0
+    for index, (candidate_mode, sample_size) in enumerate(candidates):
+        estimate = estimate_run_tokens(inputs, candidate_mode, sample_size, advisor)
+        if limit is None or estimate <= limit:
+            return {
+                "mode": candidate_mode,
+                "sample_size": sample_size,
+                "estimated_tokens": estimate,
+                "token_limit": limit,
+                "degraded": index > 0,
+            }
+    raise BudgetExceededError(estimate, limit)
+
+
+def plan_stream_budget(
+    head: List[Dict[str, Any]], total: Optional[int], limit: Optional[int]
+) -> Dict[str, Any]:
+    """
+    流式Map-Reduce运行的token预算检查
+
+    流式运行不能把交易全部载入内存，也就不能降级为single模式；只用开头的
+    交易（最多 TOKEN_ESTIMATE_SAMPLE 笔）估算每个分块的提示词长度。
+
+    Args:
+        head: 按时间升序的前若干笔交易
+        total: 交易总数（未知时按 head 的长度估算）
+        limit: token上限（None表示不限制）
+
+    Returns:
+        Dict: 结构同 plan_budget
+
+    Raises:
+        BudgetExceededError: 估算值超出预算
+    """
+    total = total or len(head)
+    estimate = 0
+    sample_size = 0
+    if head:
+        tokens_per_tx = estimate_tokens_per_tx(head)
+        chunk_size, sample_size = plan_chunks(total, tokens_per_tx)
+        # 样本多于已读取的交易时，按单笔token数补足
+        context = count_tokens(format_agent_context(head, sample_size))
+        context += max(0, sample_size - len(head)) * tokens_per_tx
+        chunks = math.ceil(total / chunk_size)
+        estimate = len(MAP_AGENTS) * chunks * _call_tokens(context)
+        estimate += ADVISOR_PROMPT_TOKENS + EXPECTED_OUTPUT_TOKENS
+    if limit is not None and estimate > limit:
+        raise BudgetExceededError(estimate, limit)
+    return {
+        "mode": "mapreduce-stream",
+        "sample_size": sample_size,
+        "estimated_tokens": estimate,
+        "token_limit": limit,
+        "degraded": False,
+    }
@@ -0,0 +1,162 @@
+"""
+LLM客户端池
+每个provider在进程内共享一个长连接客户端（复用TCP/TLS连接，不再每次调用都重新握手），
+并按provider限制同时进行中的请求数；asyncio版本的客户端按事件循环各自缓存
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator
+
+import anthropic
+import httpx
+import requests
+from concurrency import async_llm_slot, llm_slot
+from requests.adapters import HTTPAdapter
+
+
+# Claude API地址（默认使用SDK内置地址，本地压测时可指向stub服务）
+CLAUDE_BASE_URL = os.getenv("CLAUDE_BASE_URL") or None
+
+# 每个provider默认的并发请求上限，可用 <PROVIDER>_MAX_CONCURRENCY 覆盖
+DEFAULT_MAX_CONCURRENCY = 4
+
+# HTTP请求超时（秒）
+LLM_TIMEOUT_SECONDS = 60
+
+_lock = threading.Lock()
+_anthropic_clients: Dict[str, anthropic.Anthropic] = {}
+_sessions: Dict[str, requests.Session] = {}
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+# 事件循环 -> 该循环中的异步客户端和信号量（循环结束后自动释放）
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def max_concurrency(provider: str) -> int:
+    """provider同时进行中的请求上限（同时作为连接池大小）"""
+    value = os.getenv(f"{provider.upper()}_MAX_CONCURRENCY")
+    return max(1, int(value)) if value else DEFAULT_MAX_CONCURRENCY
+
+
+def get_anthropic_client(api_key: str) -> anthropic.Anthropic:
+    """进程内共享的Claude客户端（SDK内部的httpx连接池保持长连接）"""
+    client = _anthropic_clients.get(api_key)
+    if client is None:
+        with _lock:
+            client = _anthropic_clients.get(api_key)
+            if client is None:
+                client = anthropic.Anthropic(api_key=api_key, base_url=CLAUDE_BASE_URL)
+                _anthropic_clients[api_key] = client
+    return client
+
+
+def get_session(provider: str) -> requests.Session:
+    """进程内共享的 requests.Session（连接池大小等于并发上限）"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=max_concurrency(provider)
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[provider] = session
+    return session
+
+
+@contextmanager
+def provider_slot(provider: str) -> Iterator[None]:
+    """占用一个provider并发名额和一个全局LLM并发名额（见 concurrency.llm_slot）"""
+    semaphore = _semaphores.get(provider)
+    if semaphore is None:
+        with _lock:
+            semaphore = _semaphores.setdefault(
+                provider, threading.BoundedSemaphore(max_concurrency(provider))
+            )
+    with semaphore, llm_slot():
+        yield
+
+
+def _current_loop_state() -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _loop_state[loop] = {"clients": {}, "semaphores": {}}
+    return state
+
+
+def get_async_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """当前事件循环共享的异步Claude客户端"""
+    clients = _current_loop_state()["clients"]
+    key = f"claude:{api_key}"
+    if key not in clients:
+        clients[key] = anthropic.AsyncAnthropic(
+            api_key=api_key, base_url=CLAUDE_BASE_URL
+        )
+    return clients[key]
+
+
+def get_async_http_client(provider: str) -> httpx.AsyncClient:
+    """当前事件循环共享的 httpx.AsyncClient（连接池大小等于并发上限）"""
+    clients = _current_loop_state()["clients"]
+    key = f"http:{provider}"
+    if key not in clients:
+        limit = max_concurrency(provider)
+        clients[key] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
+    return clients[key]
+
+
+@asynccontextmanager
+async def async_provider_slot(provider: str) -> AsyncIterator[None]:
+    """provider_slot 的asyncio版本"""
+    semaphores = _current_loop_state()["semaphores"]
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(max_concurrency(provider))
+    async with semaphores[provider], async_llm_slot():
+        yield
+
+
+def close_clients():
+    """关闭同步客户端和会话（之后再使用时重新创建）"""
+    with _lock:
+        clients = list(_anthropic_clients.values()) + list(_sessions.values())
+        _anthropic_clients.clear()
+        _sessions.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_clients():
+    """关闭当前事件循环中的异步客户端"""
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    for client in (state or {}).get("clients", {}).values():
+        if isinstance(client, httpx.AsyncClient):
+            await client.aclose()
+        else:
+            await client.close()
+
+
+def _reset_after_fork():
+    # 子进程不能复用父进程的连接（套接字共享），只丢弃引用，不关闭
+    global _lock
+    _lock = threading.Lock()
+    _anthropic_clients.clear()
+    _sessions.clear()
+    _semaphores.clear()
+    _loop_state.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,55 @@
+"""
+LLM并发控制
+批量分析时多个进程共享一个信号量，限制同时进行中的LLM请求总数；
+未设置信号量时（单次运行）不做限制
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+
+
+# 当前进程使用的全局信号量（multiprocessing.Manager 创建的代理或 threading 信号量）
+_llm_semaphore: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def set_llm_semaphore(semaphore: Optional[Any]):
+    """设置当前进程的LLM并发信号量（None表示不限制）"""
+    global _llm_semaphore
+    with _lock:
+        _llm_semaphore = semaphore
+
+
+def get_llm_semaphore() -> Optional[Any]:
+    """当前进程的LLM并发信号量"""
+    return _llm_semaphore
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """占用一个LLM并发名额（只包住真正的网络请求，缓存命中不占名额）"""
+    semaphore = _llm_semaphore
+    if semaphore is None:
+        yield
+        return
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+@asynccontextmanager
+async def async_llm_slot() -> AsyncIterator[None]:
+    """llm_slot 的asyncio版本（在线程池中等待信号量，不阻塞事件循环）"""
+    semaphore = _llm_semaphore
+    if semaphore is None:
+        yield
+        return
+    await asyncio.to_thread(semaphore.acquire)
+    try:
+        yield
+    finally:
+        semaphore.release()
@@ -0,0 +1,337 @@
+"""
+声明式工作流引擎
+从 workflow_config JSON 加载节点、执行顺序和依赖，按注册表解析Agent函数，
+校验依赖图无环后用 DAGExecutor 执行；节点输出按输入指纹缓存，
+可以只重跑某一个节点（上游结果取自缓存），用于单独迭代某个Agent的提示词
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from executor import COMPLETED, DAGExecutor, topological_order
+from incremental import fingerprint
+
+
+# 节点输入中表示原始交易的名称
+TRANSACTIONS_INPUT = "transactions"
+
+# 默认的节点输出缓存目录
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".workflow_cache")
+
+
+def _agent_modules(provider: str) -> List[str]:
+    return (
+        ["agents_deepseek", "agents"] if provider.lower() == "deepseek" else ["agents"]
+    )
+
+
+def resolve_agent(
+    function: str,
+    provider: str = "claude",
+    registry: Optional[Dict[str, Callable]] = None,
+) -> Callable:
+    """
+    把配置中的 function 名称解析成函数
+
+    依次查找：registry，provider对应的agents模块中的同名函数，
+    "module.attr" 形式的完整路径。
+
+    Raises:
+        ValueError: 找不到函数
+    """
+    if registry and function in registry:
+        return registry[function]
+    for module_name in _agent_modules(provider):
+        fn = getattr(importlib.import_module(module_name), function, None)
+        if callable(fn):
+            return fn
+    if "." in function:
+        module_name, attr = function.rsplit(".", 1)
+        try:
+            fn = getattr(importlib.import_module(module_name), attr, None)
+        except ImportError:
+            fn = None
+        if callable(fn):
+            return fn
+    raise ValueError(f"未找到Agent函数: {function}")
+
+
+def validate_config(config: Dict[str, Any]) -> List[str]:
+    """
+    校验工作流配置并返回拓扑序
+
+    Raises:
+        ValueError: 缺少字段、节点未定义、输入引用了非上游节点或依赖存在环
+    """
+    for field in ["agents", "execution_order"]:
+        if field not in config:
+            raise ValueError(f"工作流配置缺少字段: {field}")
+    agents = {agent["name"]: agent for agent in config["agents"]}
+    missing = [node for node in config["execution_order"] if node not in agents]
+    if missing:
+        raise ValueError(f"执行顺序中的节点没有Agent定义: {missing}")
+
+    dependencies = config.get("dependencies", {})
+    order = topological_order(config["execution_order"], dependencies)
+    for node in order:
+        for name in agents[node].get("inputs", []):
+            if name != TRANSACTIONS_INPUT and name not in dependencies.get(node, []):
+                raise ValueError(f"节点 {node} 的输入 {name} 不是它的上游节点")
+    return order
+
+
+def _hash(payload: Any) -> str:
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class NodeCache:
+    """节点输出缓存：内存 + 可选的磁盘目录（每个输出一个JSON文件）"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Any] = {}
+
+    def _path(self, node: str, key: str) -> str:
+        return os.path.join(self.cache_dir, node, f"{key}.json")
+
+    def get(self, node: str, key: str) -> Optional[Any]:
+        entry_key = f"{node}:{key}"
+        if entry_key in self._entries:
+            return self._entries[entry_key]
+        if self.cache_dir and os.path.exists(self._path(node, key)):
+            with open(self._path(node, key), encoding="utf-8") as f:
+                self._entries[entry_key] = json.load(f)
+            return self._entries[entry_key]
+        return None
+
+    def set(self, node: str, key: str, output: Any):
+        self._entries[f"{node}:{key}"] = output
+        if self.cache_dir:
+            os.makedirs(os.path.dirname(self._path(node, key)), exist_ok=True)
+            with open(self._path(node, key), "w", encoding="utf-8") as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+
+
+class WorkflowEngine:
+    """
+    按 workflow_config 执行的DAG工作流
+
+    配置格式与 AnalysisWorkflow.workflow_config 相同，agents 中每个节点可额外指定：
+        inputs: 按顺序作为位置参数传入的输入（"transactions" 或上游节点名），
+            默认有依赖时为依赖节点的输出，没有依赖时为交易列表
+        params: 额外的关键字参数（如 sample_size）
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        registry: Optional[Dict[str, Callable]] = None,
+        provider: str = "claude",
+        cache: Optional[NodeCache] = None,
+    ):
+        self.config = config
+        self.provider = provider
+        self.order = validate_config(config)
+        self.dependencies = config.get("dependencies", {})
+        self.nodes = {agent["name"]: agent for agent in config["agents"]}
+        self.functions = {
+            name: resolve_agent(node.get("function", name), provider, registry)
+            for name, node in self.nodes.items()
+            if name in self.order
+        }
+        self.cache = cache or NodeCache()
+
+    @classmethod
+    def from_file(cls, filepath: str, **kwargs: Any) -> "WorkflowEngine":
+        """从 save_workflow_config 保存的JSON文件创建"""
+        with open(filepath, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def _inputs(self, node: str) -> List[str]:
+        return self.nodes[node].get("inputs") or (
+            self.dependencies.get(node) or [TRANSACTIONS_INPUT]
+        )
+
+    def ancestors(self, node: str) -> List[str]:
+        """节点及其所有上游节点（拓扑序）"""
+        needed = {node}
+        for name in reversed(self.order):
+            if name in needed:
+                needed.update(self.dependencies.get(name, []))
+        return [name for name in self.order if name in needed]
+
+    def node_key(
+        self, node: str, tx_fingerprint: Dict[str, str], upstream: Dict[str, Any]
+    ) -> str:
+        """节点缓存键：函数、参数、提供方，以及交易指纹或上游输出的哈希"""
+        inputs = [
+            (
+                tx_fingerprint[node]
+                if name == TRANSACTIONS_INPUT
+                else _hash(upstream[name])
+            )
+            for name in self._inputs(node)
+        ]
+        return _hash(
+            {
+                "function": self.nodes[node].get("function", node),
+                "params": self.nodes[node].get("params", {}),
+                "provider": self.provider,
+                "inputs": inputs,
+            }
+        )
+
+    def run(
+        self,
+        transactions: List[Dict[str, Any]],
+        nodes: Optional[Iterable[str]] = None,
+        rerun: Iterable[str] = (),
+        cached_only: Iterable[str] = (),
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        执行工作流
+
+        Args:
+            transactions: 交易列表
+            nodes: 只执行这些节点及其上游（默认全部）
+            rerun: 忽略缓存强制重新执行的节点
+            cached_only: 只能从缓存取结果的节点（缓存未命中时该节点失败，不调用LLM）
+
+        Returns:
+            Dict: 节点 -> {"status", "output", "error", "duration", "cached", "key"}
+        """
+        selected = set(self.order)
+        if nodes is not None:
+            selected = set()
+            for node in nodes:
+                if node not in self.nodes:
+                    raise ValueError(f"未知节点: {node}")
+                selected.update(self.ancestors(node))
+        order = [node for node in self.order if node in selected]
+        rerun, cached_only = set(rerun), set(cached_only)
+
+        tx_fingerprint = {
+            node: fingerprint(
+                transactions, self.nodes[node].get("function", node), self.provider
+            )
+            for node in order
+            if TRANSACTIONS_INPUT in self._inputs(node)
+        }
+        keys: Dict[str, str] = {}
+        cached: Dict[str, bool] = {}
+
+        def make_task(node: str):
+            def task(upstream: Dict[str, Any]) -> Any:
+                key = keys[node] = self.node_key(node, tx_fingerprint, upstream)
+                if node not in rerun:
+                    output = self.cache.get(node, key)
+                    if output is not None:
+                        cached[node] = True
+                        return output
+                if node in cached_only:
+                    raise RuntimeError(f"节点 {node} 没有缓存结果")
+
+                args = [
+                    transactions if name == TRANSACTIONS_INPUT else upstream[name]
+                    for name in self._inputs(node)
+                ]
+                output = self.functions[node](
+                    *args, **self.nodes[node].get("params", {})
+                )
+                # Agent内部出错时返回带error字段的结果，不缓存
+                if not (isinstance(output, dict) and output.get("error")):
+                    self.cache.set(node, key, output)
+                cached[node] = False
+                return output
+
+            return task
+
+        executor = DAGExecutor(
+            order,
+            {node: self.dependencies.get(node, []) for node in order},
+            timeouts={
+                node: self.nodes[node]["timeout"]
+                for node in order
+                if self.nodes[node].get("timeout")
+            },
+        )
+        results = executor.run({node: make_task(node) for node in order})
+        for node, result in results.items():
+            result["cached"] = cached.get(node, False)
+            result["key"] = keys.get(node)
+        return results
+
+    def rerun_node(
+        self, node: str, transactions: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        只重新执行一个节点，上游节点必须已有缓存结果（不会调用上游Agent）
+
+        Returns:
+            Dict: 同 run（包含上游节点）
+        """
+        upstream = [name for name in self.ancestors(node) if name != node]
+        return self.run(transactions, nodes=[node], rerun=[node], cached_only=upstream)
+
+
+def summarize_run(results: Dict[str, Dict[str, Any]]) -> List[str]:
+    """每个节点一行的执行摘要"""
+    lines = []
+    for node, result in results.items():
+        source = "缓存" if result["cached"] else "执行"
+        line = f"{node}: {result['status']}（{source}，{result['duration']:.2f}s）"
+        if result["status"] != COMPLETED:
+            line += f" {result['error']}"
+        lines.append(line)
+    return lines
+
+
+def main():
+    """命令行：按配置执行工作流，或只重跑一个节点"""
+    from runner import load_transactions_from_db
+
+    parser = argparse.ArgumentParser(description="声明式多Agent工作流")
+    parser.add_argument("--config", required=True, help="workflow_config JSON文件")
+    parser.add_argument("--provider", choices=["claude", "deepseek"], default="claude")
+    parser.add_argument("--db", default="transactions.db", help="交易数据库路径")
+    parser.add_argument("--address", help="只加载与该地址相关的交易")
+    parser.add_argument("--limit", type=int, default=20, help="加载的交易数量，0表示全部")
+    parser.add_argument("--rerun", help="只重跑该节点，上游结果取自缓存")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="节点输出缓存目录")
+    parser.add_argument("--output", help="把各节点输出写入该JSON文件")
+    args = parser.parse_args()
+
+    engine = WorkflowEngine.from_file(
+        args.config, provider=args.provider, cache=NodeCache(args.cache_dir)
+    )
+    transactions = load_transactions_from_db(
+        args.db, limit=args.limit, address=args.address
+    )
+    if not transactions:
+        print("错误: 没有可用的交易数据进行分析")
+        return
+
+    if args.rerun:
+        results = engine.rerun_node(args.rerun, transactions)
+    else:
+        results = engine.run(transactions)
+    print("\n".join(summarize_run(results)))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {node: result["output"] for node, result in results.items()},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        print(f"节点输出已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+通用DAG执行器
+按 execution_order / dependencies 并发执行相互独立的节点，支持单节点超时和部分结果
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+# 节点状态
+COMPLETED = "completed"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+# 节点函数接收上游节点的输出字典，返回本节点输出
+NodeFunction = Callable[[Dict[str, Any]], Any]
+
+
+def topological_order(
+    execution_order: List[str], dependencies: Dict[str, List[str]]
+) -> List[str]:
+    """
+    校验依赖图并返回拓扑序（同层节点保持 execution_order 中的顺序）
+
+    Raises:
+        ValueError: 依赖了未知节点或存在环
+    """
+    nodes = list(execution_order)
+    for node, deps in dependencies.items():
+        if node not in nodes:
+            raise ValueError(f"依赖配置中的节点未在执行顺序中定义: {node}")
+        for dep in deps:
+            if dep not in nodes:
+                raise ValueError(f"节点 {node} 依赖了未知节点: {dep}")
+
+    remaining = {node: set(dependencies.get(node, [])) for node in nodes}
+    ordered: List[str] = []
+    while remaining:
+        ready = [node for node in nodes if node in remaining and not remaining[node]]
+        if not ready:
+            raise ValueError(f"工作流依赖存在环: {sorted(remaining)}")
+        for node in ready:
+            ordered.append(node)
+            del remaining[node]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return ordered
+
+
+class DAGExecutor:
+    """
+    并发DAG执行器
+
+    依赖全部完成的节点会立即提交到线程池；超时的节点被标记为 timeout
+    （线程无法被强制终止，其结果会被丢弃），依赖它的下游节点被标记为 skipped。
+    """
+
+    def __init__(
+        self,
+        execution_order: List[str],
+        dependencies: Optional[Dict[str, List[str]]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            execution_order: 节点列表
+            dependencies: 节点 -> 上游节点列表
+            timeouts: 节点 -> 超时秒数
+            default_timeout: 未单独配置时的超时秒数（None表示不限制）
+            max_workers: 线程数（默认等于节点数）
+        """
+        self.dependencies = dependencies or {}
+        self.order = topological_order(execution_order, self.dependencies)
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers or max(1, len(self.order))
+
+    def _timeout_for(self, node: str) -> Optional[float]:
+        return self.timeouts.get(node, self.default_timeout)
+
+    def run(
+        self,
+        tasks: Dict[str, NodeFunction],
+        on_start: Optional[Callable[[str], None]] = None,
+        on_finish: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        执行所有节点
+
+        Args:
+            tasks: 节点 -> 节点函数
+            on_start: 节点开始时的回调
+            on_finish: 节点结束时的回调（包括失败、超时和跳过）
+
+        Returns:
+            Dict: 节点 -> {"status", "output", "error", "duration"}
+        """
+        missing = [node for node in self.order if node not in tasks]
+        if missing:
+            raise ValueError(f"缺少节点函数: {missing}")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        running: Dict[Future, str] = {}
+        started_at: Dict[str, float] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="workflow"
+        )
+
+        def finish(node: str, status: str, output: Any = None, error: str = None):
+            start = started_at.get(node)
+            results[node] = {
+                "status": status,
+                "output": output,
+                "error": error,
+                "duration": time.perf_counter() - start if start else 0.0,
+            }
+            if on_finish:
+                on_finish(node, results[node])
+
+        def schedule_ready():
+            for node in self.order:
+                if node in results or node in started_at:
+                    continue
+                deps = self.dependencies.get(node, [])
+                if any(dep not in results for dep in deps):
+                    continue
+                failed = [dep for dep in deps if results[dep]["status"] != COMPLETED]
+                if failed:
+                    finish(node, SKIPPED, error=f"上游节点未完成: {failed}")
+                    continue
+                upstream = {dep: results[dep]["output"] for dep in deps}
+                started_at[node] = time.perf_counter()
+                if on_start:
+                    on_start(node)
+                # 在调用方的上下文中执行（用量统计等上下文变量随任务传递）
+                future = executor.submit(
+                    contextvars.copy_context().run, tasks[node], upstream
+                )
+                running[future] = node
+
+        try:
+            schedule_ready()
+            while running:
+                now = time.perf_counter()
+                deadlines = [
+                    started_at[node] + self._timeout_for(node) - now
+                    for node in running.values()
+                    if self._timeout_for(node) is not None
+                ]
+                wait_for = max(0.0, min(deadlines)) if deadlines else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        finish(node, COMPLETED, output=future.result())
+                    except Exception as e:
+                        finish(node, FAILED, error=str(e))
+
+                now = time.perf_counter()
+                for future, node in list(running.items()):
+                    timeout = self._timeout_for(node)
+                    if timeout is not None and now - started_at[node] >= timeout:
+                        running.pop(future)
+                        future.cancel()
+                        finish(node, TIMEOUT, error=f"执行超时（{timeout}秒）")
+
+                schedule_ready()
+        finally:
+            # 不等待超时的线程结束
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
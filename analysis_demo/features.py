@@ -0,0 +1,596 @@
+"""
+交易特征提取
+在调用LLM之前用NumPy/pandas一次性计算交易统计特征，
+Agent只接收紧凑的特征摘要和少量交易样本，而不是全部原始记录
+"""
+
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+WEI_PER_ETH = 1e18
+WEI_PER_GWEI = 1e9
+
+# 默认放入提示词的交易样本数量
+DEFAULT_SAMPLE_SIZE = 10
+
+# 交易规模分布区间（ETH）
+SIZE_BUCKETS = [0, 0.01, 0.1, 1, 10, 100, np.inf]
+SIZE_LABELS = ["<0.01", "0.01-0.1", "0.1-1", "1-10", "10-100", ">=100"]
+
+# 流式特征提取时用于估计分位数的蓄水池样本大小
+RESERVOIR_SIZE = 10000
+
+
+def _first_present(
+    df: pd.DataFrame, columns: List[str], default: Any = None
+) -> pd.Series:
+    """兼容数据库行（from_addr/time）和Etherscan行（from/timeStamp）两种字段名"""
+    result = pd.Series(default, index=df.index, dtype=object)
+    for column in reversed(columns):
+        if column in df.columns:
+            result = df[column].where(df[column].notna(), result)
+    return result
+
+
+def _parse_json_column(values: pd.Series) -> pd.DataFrame:
+    """解析parsed_json列（每行一次json.loads），返回展开后的DataFrame"""
+
+    def load(value: Any) -> Dict[str, Any]:
+        if isinstance(value, dict):
+            return value
+        if not value:
+            return {}
+        try:
+            parsed = json.loads(value)
+        except (TypeError, ValueError):
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+
+    return pd.DataFrame.from_records(
+        [load(value) for value in values], index=values.index
+    )
+
+
+def _round(value: Any, digits: int = 6) -> Any:
+    if value is None or (isinstance(value, float) and not np.isfinite(value)):
+        return None
+    return round(float(value), digits)
+
+
+def _percentiles(values: np.ndarray, digits: int = 6) -> Dict[str, Any]:
+    if values.size == 0:
+        return {"mean": None, "median": None, "p10": None, "p90": None, "max": None}
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {
+        "mean": _round(values.mean(), digits),
+        "median": _round(median, digits),
+        "p10": _round(p10, digits),
+        "p90": _round(p90, digits),
+        "max": _round(values.max(), digits),
+    }
+
+
+def _histogram(values: pd.Series, top: int = 10) -> Dict[str, int]:
+    counts = values.dropna().astype(str).value_counts()
+    return {str(key): int(count) for key, count in counts.head(top).items()}
+
+
+def to_frame(txs: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    把交易记录转换成规范化的DataFrame
+
+    列: hash, from, to, value_eth, time, action, token, risk_level,
+        gas_used, gas_price_gwei
+    """
+    raw = pd.DataFrame.from_records(txs)
+    if raw.empty:
+        return pd.DataFrame(
+            columns=[
+                "hash",
+                "from",
+                "to",
+                "value_eth",
+                "time",
+                "action",
+                "token",
+                "risk_level",
+                "gas_used",
+                "gas_price_gwei",
+            ]
+        )
+
+    parsed = (
+        _parse_json_column(raw["parsed_json"])
+        if "parsed_json" in raw.columns
+        else pd.DataFrame(index=raw.index)
+    )
+
+    def parsed_column(name: str) -> pd.Series:
+        if name in parsed.columns:
+            return parsed[name]
+        return pd.Series(None, index=raw.index, dtype=object)
+
+    def numeric_column(parsed_name: str, raw_name: str) -> pd.Series:
+        # 优先使用parsed_json中的字段，缺失时回退到Etherscan原始字段
+        values = pd.to_numeric(parsed_column(parsed_name), errors="coerce")
+        if raw_name in raw.columns:
+            values = values.fillna(pd.to_numeric(raw[raw_name], errors="coerce"))
+        return values
+
+    frame = pd.DataFrame(
+        {
+            "hash": _first_present(raw, ["hash"], ""),
+            "from": _first_present(raw, ["from_addr", "from"], "")
+            .astype(str)
+            .str.lower(),
+            "to": _first_present(raw, ["to_addr", "to"], "").astype(str).str.lower(),
+            "value_eth": pd.to_numeric(
+                _first_present(raw, ["value"], 0), errors="coerce"
+            ).fillna(0.0)
+            / WEI_PER_ETH,
+            "time": pd.to_numeric(
+                _first_present(raw, ["time", "timeStamp"], 0), errors="coerce"
+            ),
+            "action": parsed_column("action"),
+            "token": parsed_column("token"),
+            "risk_level": parsed_column("risk_level"),
+            "gas_used": numeric_column("gas_used", "gasUsed"),
+            "gas_price_gwei": numeric_column("gas_price", "gasPrice") / WEI_PER_GWEI,
+        }
+    )
+    return frame
+
+
+def infer_focus_address(frame: pd.DataFrame) -> Optional[str]:
+    """被分析的地址：在from/to中出现次数最多的地址"""
+    participants = pd.concat([frame["from"], frame["to"]])
+    participants = participants[participants != ""]
+    if participants.empty:
+        return None
+    return participants.value_counts().index[0]
+
+
+def extract_features(
+    txs: List[Dict[str, Any]], address: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    一次向量化计算交易特征
+
+    Args:
+        txs: 交易记录列表（数据库行或Etherscan原始记录）
+        address: 被分析的地址（默认取出现次数最多的地址）
+
+    Returns:
+        Dict: 交易量、规模分布、时间间隔、对手方集中度、Gas统计和行为分布
+    """
+    frame = to_frame(txs)
+    return features_from_frame(frame, address)
+
+
+def features_from_frame(
+    frame: pd.DataFrame, address: Optional[str] = None
+) -> Dict[str, Any]:
+    """在规范化的DataFrame上计算特征（见 to_frame）"""
+    count = int(len(frame))
+    if count == 0:
+        return {"transaction_count": 0}
+
+    address = (address or infer_focus_address(frame) or "").lower()
+    values = frame["value_eth"].to_numpy(dtype=float)
+
+    # 交易量
+    outgoing = (frame["from"] == address).to_numpy()
+    incoming = (frame["to"] == address).to_numpy()
+    volume = {
+        "total_eth": _round(values.sum()),
+        "outgoing_eth": _round(values[outgoing].sum()),
+        "incoming_eth": _round(values[incoming].sum()),
+        "net_flow_eth": _round(values[incoming].sum() - values[outgoing].sum()),
+        "outgoing_count": int(outgoing.sum()),
+        "incoming_count": int(incoming.sum()),
+    }
+
+    # 交易规模分布
+    size_buckets = pd.cut(values, bins=SIZE_BUCKETS, labels=SIZE_LABELS, right=False)
+    size_distribution = {
+        **_percentiles(values),
+        "std": _round(values.std()),
+        "zero_value_share": _round((values == 0).mean(), 4),
+        "buckets": {
+            str(label): int(n)
+            for label, n in pd.Series(size_buckets).value_counts(sort=False).items()
+        },
+    }
+
+    # 时间与交易间隔
+    times = np.sort(frame["time"].dropna().to_numpy(dtype=float))
+    gaps = np.diff(times)
+    timing: Dict[str, Any] = {
+        "first_time": None,
+        "last_time": None,
+        "span_days": None,
+        "tx_per_day": None,
+    }
+    if times.size:
+        span_days = (times[-1] - times[0]) / 86400
+        timing = {
+            "first_time": pd.Timestamp(times[0], unit="s").isoformat() + "Z",
+            "last_time": pd.Timestamp(times[-1], unit="s").isoformat() + "Z",
+            "span_days": _round(span_days, 3),
+            "tx_per_day": _round(count / span_days, 3) if span_days > 0 else None,
+        }
+    inter_arrival = _percentiles(gaps, digits=1)
+    inter_arrival["burstiness_cv"] = (
+        _round(gaps.std() / gaps.mean(), 3) if gaps.size and gaps.mean() > 0 else None
+    )
+
+    # 对手方集中度
+    counterparties = np.where(outgoing, frame["to"], frame["from"])
+    counterparties = pd.Series(counterparties)
+    counterparties = counterparties[
+        (counterparties != "") & (counterparties != address)
+    ]
+    shares = counterparties.value_counts(normalize=True)
+    counterparty = {
+        "unique": int(shares.size),
+        "hhi": _round((shares**2).sum(), 4),
+        "top": [
+            {"address": addr, "share": _round(share, 4)}
+            for addr, share in shares.head(5).items()
+        ],
+    }
+
+    # Gas统计
+    gas_used = frame["gas_used"].dropna().to_numpy(dtype=float)
+    gas_price = frame["gas_price_gwei"].dropna().to_numpy(dtype=float)
+    fees = (frame["gas_used"] * frame["gas_price_gwei"]).dropna().to_numpy(dtype=float)
+    gas = {
+        "gas_used": _percentiles(gas_used, digits=1),
+        "gas_price_gwei": _percentiles(gas_price, digits=3),
+        "total_fee_eth": _round(fees.sum() / WEI_PER_GWEI),
+    }
+
+    return {
+        "address": address or None,
+        "transaction_count": count,
+        "volume": volume,
+        "size_distribution_eth": size_distribution,
+        "timing": timing,
+        "inter_arrival_seconds": inter_arrival,
+        "counterparty_concentration": counterparty,
+        "gas": gas,
+        "action_histogram": _histogram(frame["action"]),
+        "token_histogram": _histogram(frame["token"]),
+        "risk_level_histogram": _histogram(frame["risk_level"]),
+    }
+
+
+def sample_transactions(
+    txs: List[Dict[str, Any]], sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    选取少量紧凑的交易样本（最近的一半 + 金额最大的一半），不含raw_json
+
+    Returns:
+        List[Dict]: 按时间排序的紧凑交易记录
+    """
+    frame = to_frame(txs)
+    return sample_from_frame(frame, sample_size)
+
+
+def sample_from_frame(
+    frame: pd.DataFrame, sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> List[Dict[str, Any]]:
+    """在规范化的DataFrame上选取交易样本（见 sample_transactions）"""
+    if sample_size <= 0 or frame.empty:
+        return []
+
+    recent = frame.nlargest((sample_size + 1) // 2, "time").index
+    largest = frame.drop(index=recent).nlargest(sample_size // 2, "value_eth").index
+    sample = frame.loc[recent.append(largest)].sort_values("time")
+
+    return [
+        {
+            "hash": row["hash"],
+            "from": row["from"],
+            "to": row["to"],
+            "value_eth": _round(row["value_eth"]),
+            "time": (
+                pd.Timestamp(row["time"], unit="s").isoformat() + "Z"
+                if pd.notna(row["time"])
+                else None
+            ),
+            "action": row["action"],
+            "token": row["token"],
+        }
+        for row in sample.to_dict("records")
+    ]
+
+
+def build_agent_context(
+    txs: List[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    address: Optional[str] = None,
+) -> Dict[str, Any]:
+    """构建Agent提示词上下文：特征摘要 + 少量交易样本"""
+    frame = to_frame(txs)
+    return {
+        "features": features_from_frame(frame, address),
+        "sample_transactions": sample_from_frame(frame, sample_size),
+    }
+
+
+def format_agent_context(
+    txs: List[Dict[str, Any]], sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> str:
+    """提示词中使用的紧凑JSON"""
+    return json.dumps(
+        build_agent_context(txs, sample_size),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+class StreamingStats:
+    """
+    流式数值统计：数量、均值、标准差和最大值精确计算，
+    分位数由固定大小的均匀蓄水池样本估计（内存与数据量无关）
+    """
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE, seed: int = 0):
+        self.reservoir_size = reservoir_size
+        self.reservoir = np.empty(0, dtype=float)
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.max: Optional[float] = None
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+
+        seen = self.count
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.squares += float((values**2).sum())
+        batch_max = float(values.max())
+        self.max = batch_max if self.max is None else max(self.max, batch_max)
+
+        # 蓄水池抽样（Algorithm R）：先填满，之后第i个值以 size/(i+1) 的概率替换
+        free = max(0, self.reservoir_size - self.reservoir.size)
+        if free:
+            self.reservoir = np.concatenate([self.reservoir, values[:free]])
+            values = values[free:]
+            seen += free
+        if values.size:
+            slots = self.rng.integers(0, np.arange(seen, seen + values.size) + 1)
+            accepted = slots < self.reservoir_size
+            self.reservoir[slots[accepted]] = values[accepted]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return float(np.sqrt(max(0.0, self.squares / self.count - self.mean**2)))
+
+    def summary(self, digits: int = 6) -> Dict[str, Any]:
+        """与 _percentiles 相同的结构"""
+        result = _percentiles(self.reservoir, digits)
+        if self.count:
+            result["mean"] = _round(self.mean, digits)
+            result["max"] = _round(self.max, digits)
+        return result
+
+
+class FeatureAccumulator:
+    """
+    流式特征提取：按批次更新，结果与 extract_features 结构相同
+
+    计数、交易量、规模区间、时间范围、对手方和行为分布精确计算，
+    中位数等分位数为蓄水池样本估计值。批次需按时间升序输入（交易间隔跨批次计算）。
+    未指定地址时使用第一批中出现次数最多的地址。
+    """
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        reservoir_size: int = RESERVOIR_SIZE,
+    ):
+        self.address = address.lower() if address else None
+        self.sample_size = sample_size
+        self.count = 0
+        self.outgoing_eth = 0.0
+        self.incoming_eth = 0.0
+        self.outgoing_count = 0
+        self.incoming_count = 0
+        self.zero_count = 0
+        self.size_buckets = Counter()
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.counterparties: Counter = Counter()
+        self.actions: Counter = Counter()
+        self.tokens: Counter = Counter()
+        self.risk_levels: Counter = Counter()
+        self.total_fee_gwei = 0.0
+        self.values = StreamingStats(reservoir_size, seed=1)
+        self.gaps = StreamingStats(reservoir_size, seed=2)
+        self.gas_used = StreamingStats(reservoir_size, seed=3)
+        self.gas_price = StreamingStats(reservoir_size, seed=4)
+        # 交易样本候选：最近的和金额最大的各 sample_size 笔
+        self.candidates: Optional[pd.DataFrame] = None
+
+    def update(self, txs: List[Dict[str, Any]]) -> "FeatureAccumulator":
+        """用一批交易更新统计"""
+        frame = to_frame(txs)
+        if frame.empty:
+            return self
+        if self.address is None:
+            self.address = infer_focus_address(frame) or ""
+
+        values = frame["value_eth"].to_numpy(dtype=float)
+        outgoing = (frame["from"] == self.address).to_numpy()
+        incoming = (frame["to"] == self.address).to_numpy()
+        self.count += len(frame)
+        self.outgoing_eth += float(values[outgoing].sum())
+        self.incoming_eth += float(values[incoming].sum())
+        self.outgoing_count += int(outgoing.sum())
+        self.incoming_count += int(incoming.sum())
+        self.zero_count += int((values == 0).sum())
+        self.values.add(values)
+        buckets = pd.cut(values, bins=SIZE_BUCKETS, labels=SIZE_LABELS, right=False)
+        self.size_buckets.update(pd.Series(buckets).value_counts().to_dict())
+
+        times = np.sort(frame["time"].dropna().to_numpy(dtype=float))
+        if times.size:
+            if self.last_time is not None:
+                times_with_previous = np.concatenate([[self.last_time], times])
+            else:
+                times_with_previous = times
+            self.gaps.add(np.diff(times_with_previous))
+            if self.first_time is None:
+                self.first_time = float(times[0])
+            self.last_time = float(times[-1])
+
+        counterparties = pd.Series(np.where(outgoing, frame["to"], frame["from"]))
+        self.counterparties.update(
+            counterparties[(counterparties != "") & (counterparties != self.address)]
+            .value_counts()
+            .to_dict()
+        )
+
+        self.gas_used.add(frame["gas_used"].dropna().to_numpy(dtype=float))
+        self.gas_price.add(frame["gas_price_gwei"].dropna().to_numpy(dtype=float))
+        fees = (frame["gas_used"] * frame["gas_price_gwei"]).dropna()
+        self.total_fee_gwei += float(fees.sum())
+
+        for counter, column in [
+            (self.actions, "action"),
+            (self.tokens, "token"),
+            (self.risk_levels, "risk_level"),
+        ]:
+            counter.update(frame[column].dropna().astype(str).value_counts().to_dict())
+
+        candidates = (
+            frame.reset_index(drop=True)
+            if self.candidates is None
+            else pd.concat([self.candidates, frame], ignore_index=True)
+        )
+        keep = candidates.nlargest(self.sample_size, "time").index.union(
+            candidates.nlargest(self.sample_size, "value_eth").index
+        )
+        self.candidates = candidates.loc[keep].reset_index(drop=True)
+        return self
+
+    def features(self) -> Dict[str, Any]:
+        """当前累计的特征（结构见 extract_features）"""
+        if self.count == 0:
+            return {"transaction_count": 0}
+
+        timing: Dict[str, Any] = {
+            "first_time": None,
+            "last_time": None,
+            "span_days": None,
+            "tx_per_day": None,
+        }
+        if self.first_time is not None:
+            span_days = (self.last_time - self.first_time) / 86400
+            timing = {
+                "first_time": pd.Timestamp(self.first_time, unit="s").isoformat() + "Z",
+                "last_time": pd.Timestamp(self.last_time, unit="s").isoformat() + "Z",
+                "span_days": _round(span_days, 3),
+                "tx_per_day": (
+                    _round(self.count / span_days, 3) if span_days > 0 else None
+                ),
+            }
+        inter_arrival = self.gaps.summary(digits=1)
+        inter_arrival["burstiness_cv"] = (
+            _round(self.gaps.std / self.gaps.mean, 3)
+            if self.gaps.count and self.gaps.mean > 0
+            else None
+        )
+
+        total_counterparties = sum(self.counterparties.values())
+        shares = {
+            address: count / total_counterparties
+            for address, count in self.counterparties.items()
+        }
+
+        def histogram(counter: Counter) -> Dict[str, int]:
+            return {key: int(count) for key, count in counter.most_common(10)}
+
+        return {
+            "address": self.address or None,
+            "transaction_count": self.count,
+            "volume": {
+                "total_eth": _round(self.values.total),
+                "outgoing_eth": _round(self.outgoing_eth),
+                "incoming_eth": _round(self.incoming_eth),
+                "net_flow_eth": _round(self.incoming_eth - self.outgoing_eth),
+                "outgoing_count": self.outgoing_count,
+                "incoming_count": self.incoming_count,
+            },
+            "size_distribution_eth": {
+                **self.values.summary(),
+                "std": _round(self.values.std),
+                "zero_value_share": _round(self.zero_count / self.count, 4),
+                "buckets": {
+                    label: int(self.size_buckets.get(label, 0)) for label in SIZE_LABELS
+                },
+            },
+            "timing": timing,
+            "inter_arrival_seconds": inter_arrival,
+            "counterparty_concentration": {
+                "unique": len(shares),
+                "hhi": _round(sum(share**2 for share in shares.values()), 4),
+                "top": [
+                    {
+                        "address": address,
+                        "share": _round(count / total_counterparties, 4),
+                    }
+                    for address, count in self.counterparties.most_common(5)
+                ],
+            },
+            "gas": {
+                "gas_used": self.gas_used.summary(digits=1),
+                "gas_price_gwei": self.gas_price.summary(digits=3),
+                "total_fee_eth": _round(self.total_fee_gwei / WEI_PER_GWEI),
+            },
+            "action_histogram": histogram(self.actions),
+            "token_histogram": histogram(self.tokens),
+            "risk_level_histogram": histogram(self.risk_levels),
+        }
+
+    def context(self) -> Dict[str, Any]:
+        """Agent提示词上下文（结构见 build_agent_context）"""
+        return {
+            "features": self.features(),
+            "sample_transactions": (
+                sample_from_frame(self.candidates, self.sample_size)
+                if self.candidates is not None
+                else []
+            ),
+        }
+
+
+def extract_features_streaming(
+    batches: Iterable[List[Dict[str, Any]]], address: Optional[str] = None
+) -> Dict[str, Any]:
+    """对按时间升序的交易批次（如 loader.iter_batches）流式提取特征"""
+    accumulator = FeatureAccumulator(address)
+    for batch in batches:
+        accumulator.update(batch)
+    return accumulator.features()
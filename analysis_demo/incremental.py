@@ -0,0 +1,121 @@
+"""
+增量分析
+为每个Agent的结果记录输入指纹（交易哈希集合 + 提示词版本），
+再次分析时跳过输入未变化的Agent；只新增了交易时，只把新增交易和上一次结果交给Agent
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# 提示词版本：修改某个Agent的提示词或输出结构后需递增，使旧结果失效
+PROMPT_VERSIONS = {
+    "position_agent": "1",
+    "signal_agent": "1",
+    "industry_agent": "1",
+    "advisor_agent": "1",
+}
+
+# 增量计划中的动作
+UNCHANGED = "unchanged"
+DELTA = "delta"
+FULL = "full"
+
+
+def tx_time(tx: Dict[str, Any]) -> int:
+    """交易时间戳（兼容数据库行和Etherscan行）"""
+    try:
+        return int(tx.get("time") or tx.get("timeStamp") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fingerprint(
+    txs: Iterable[Dict[str, Any]], agent_name: str, provider: str = ""
+) -> str:
+    """交易哈希集合（与顺序无关） + Agent提示词版本 + 提供方 的sha256"""
+    digest = hashlib.sha256()
+    digest.update(
+        f"{provider.lower()}|{agent_name}|{PROMPT_VERSIONS.get(agent_name, '')}".encode()
+    )
+    for tx_hash in sorted(str(tx.get("hash", "")) for tx in txs):
+        digest.update(b"\n")
+        digest.update(tx_hash.encode())
+    return digest.hexdigest()
+
+
+def combine_fingerprints(agent_name: str, upstream: Dict[str, str]) -> str:
+    """依赖上游结果的Agent（投资顾问）的指纹：上游指纹 + 自身提示词版本"""
+    payload = json.dumps(
+        {
+            "agent": agent_name,
+            "version": PROMPT_VERSIONS.get(agent_name, ""),
+            "upstream": upstream,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def make_record(
+    txs: List[Dict[str, Any]], agent_name: str, provider: str = ""
+) -> Dict[str, Any]:
+    """写入结果元数据的指纹记录"""
+    return {
+        "fingerprint": fingerprint(txs, agent_name, provider),
+        "prompt_version": PROMPT_VERSIONS.get(agent_name, ""),
+        "watermark": max((tx_time(tx) for tx in txs), default=0),
+        "transaction_count": len(txs),
+    }
+
+
+def plan_agent(
+    txs: List[Dict[str, Any]],
+    agent_name: str,
+    previous_record: Optional[Dict[str, Any]],
+    previous_result: Optional[Dict[str, Any]],
+    provider: str = "",
+) -> Dict[str, Any]:
+    """
+    决定某个分析Agent本次如何执行
+
+    Returns:
+        Dict: {"action": unchanged/delta/full, "record": 本次指纹记录,
+               "delta": 新增交易（仅delta时）}
+    """
+    record = make_record(txs, agent_name, provider)
+    plan: Dict[str, Any] = {"action": FULL, "record": record, "delta": []}
+
+    usable = (
+        previous_record
+        and isinstance(previous_result, dict)
+        and not previous_result.get("error")
+    )
+    if not usable:
+        return plan
+
+    if previous_record.get("fingerprint") == record["fingerprint"]:
+        plan["action"] = UNCHANGED
+        return plan
+
+    # 水位线之前的交易集合与上次完全相同时，只有水位线之后的交易是新增的
+    watermark = previous_record.get("watermark", 0)
+    before = [tx for tx in txs if tx_time(tx) <= watermark]
+    if fingerprint(before, agent_name, provider) == previous_record.get("fingerprint"):
+        plan["action"] = DELTA
+        plan["delta"] = [tx for tx in txs if tx_time(tx) > watermark]
+    return plan
+
+
+def format_previous_result(previous: Optional[Dict[str, Any]]) -> str:
+    """增量分析时放入提示词的上一次结果说明（非增量时为空）"""
+    if not previous:
+        return ""
+    return f"""
+    这是一次增量分析。以下是基于此前全部交易得出的上一次分析结果：
+    {json.dumps(previous, ensure_ascii=False, separators=(",", ":"))}
+
+    下面只给出此后新增的交易，请结合上一次结果更新分析，返回覆盖全部交易的完整结果
+    （数量类字段如总交易量需在上一次结果的基础上累加）：
+    """
@@ -0,0 +1,157 @@
+"""
+交易数据流式加载
+用生成器按固定批次从SQLite游标中逐批读取交易（fetchmany），
+列投影和时间/地址条件直接下推到SQL，内存占用只与批次大小有关
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# transactions 表的全部列
+COLUMNS = ["hash", "from_addr", "to_addr", "value", "time", "raw_json", "parsed_json"]
+
+# 分析所需的列（不读取体积最大的raw_json）
+ANALYSIS_COLUMNS = ["hash", "from_addr", "to_addr", "value", "time", "parsed_json"]
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def simple_parse(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """parsed_json为空时使用的简单解析结果"""
+    value = int(tx.get("value") or "0")
+    return {
+        "action": "transfer" if value > 0 else "unknown",
+        "token": "ETH",
+        "amount": str(value / 10**18),
+        "time": datetime.fromtimestamp(int(tx.get("time") or "0")).isoformat() + "Z",
+        "confidence": 0.5,
+        "description": "EN: Simple parsed transaction | CN: 简单解析的交易",
+        "risk_level": "medium",
+        "gas_used": tx.get("gas_used", "0"),
+        "gas_price": tx.get("gas_price", "0"),
+    }
+
+
+def _where(
+    address: Optional[str], start_time: Optional[int], end_time: Optional[int]
+) -> Tuple[str, List[Any]]:
+    conditions, params = [], []
+    if address:
+        conditions.append("(from_addr = ? OR to_addr = ?)")
+        params += [address.lower(), address.lower()]
+    if start_time is not None:
+        conditions.append("time >= ?")
+        params.append(int(start_time))
+    if end_time is not None:
+        conditions.append("time < ?")
+        params.append(int(end_time))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def build_query(
+    columns: Optional[Sequence[str]] = None,
+    address: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    order: str = "asc",
+    limit: Optional[int] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    生成查询语句和参数
+
+    Args:
+        columns: 读取的列（默认全部列）
+        address: 只读取 from_addr 或 to_addr 等于该地址的交易（地址按小写存储）
+        start_time: 起始时间戳（包含）
+        end_time: 结束时间戳（不包含）
+        order: 按时间排序方向 asc / desc
+        limit: 最多读取的条数（None或<=0表示不限制）
+
+    Raises:
+        ValueError: 未知的列或排序方向
+    """
+    columns = list(columns or COLUMNS)
+    unknown = [column for column in columns if column not in COLUMNS]
+    if unknown:
+        raise ValueError(f"未知的列: {unknown}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"未知的排序方向: {order}")
+
+    where, params = _where(address, start_time, end_time)
+    sql = f"SELECT {', '.join(columns)} FROM transactions{where}"
+    sql += f" ORDER BY time {order.upper()}"
+    if limit and limit > 0:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def iter_batches(
+    db_path: str = "transactions.db",
+    columns: Optional[Sequence[str]] = None,
+    address: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    order: str = "asc",
+    limit: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    按批次流式读取交易（参数见 build_query）
+
+    parsed_json为空的行会补上简单解析结果（需要读取parsed_json列）。
+
+    Yields:
+        List[Dict]: 每批最多 batch_size 笔交易
+    """
+    sql, params = build_query(columns, address, start_time, end_time, order, limit)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(sql, params)
+        fill_parsed = columns is None or "parsed_json" in columns
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                tx = dict(row)
+                if fill_parsed and not tx.get("parsed_json"):
+                    try:
+                        tx["parsed_json"] = json.dumps(simple_parse(tx))
+                    except Exception as e:
+                        print(f"解析交易 {tx.get('hash', 'unknown')} 失败: {e}")
+                        continue
+                batch.append(tx)
+            yield batch
+    finally:
+        conn.close()
+
+
+def iter_transactions(
+    db_path: str = "transactions.db", **kwargs: Any
+) -> Iterator[Dict[str, Any]]:
+    """逐笔流式读取交易（参数见 iter_batches）"""
+    for batch in iter_batches(db_path, **kwargs):
+        yield from batch
+
+
+def count_transactions(
+    db_path: str = "transactions.db",
+    address: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> int:
+    """满足条件的交易数（用于Map-Reduce规划分块）"""
+    where, params = _where(address, start_time, end_time)
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM transactions{where}", params
+        ).fetchone()[0]
+    finally:
+        conn.close()
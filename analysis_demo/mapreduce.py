@@ -0,0 +1,290 @@
+"""
+长交易历史的Map-Reduce分析
+把任意长度的交易历史按时间顺序切分成受token预算约束的分块，
+并发地对每个分块运行持仓/信号/行业Agent，再把分块结论合并回原有结果结构
+"""
+
+import contextvars
+import json
+import math
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from features import extract_features, sample_transactions
+
+
+# 每个分块提示词中交易部分的token预算
+DEFAULT_CHUNK_TOKEN_BUDGET = 6000
+# 分块数上限；超过时分块变大，Agent只看到分块特征和预算内的样本
+DEFAULT_MAX_CHUNKS = 64
+# 并发执行的Agent调用数
+DEFAULT_MAX_WORKERS = 8
+# 估算单笔紧凑交易token数时采样的交易数
+TOKEN_ESTIMATE_SAMPLE = 50
+
+MAP_AGENTS = ["position_agent", "signal_agent", "industry_agent"]
+
+# 按分块交易数加权平均的数值字段
+NUMERIC_FIELDS = {
+    "position_agent": ["diversification_score", "confidence"],
+    "signal_agent": ["timing_quality", "signal_strength", "confidence"],
+    "industry_agent": ["adoption_level", "innovation_score", "confidence"],
+}
+
+# 按分块交易数加权取众数的分类字段
+CATEGORICAL_FIELDS = {
+    "position_agent": [
+        "position_type",
+        "holding_period",
+        "risk_tolerance",
+        "strategy_type",
+    ],
+    "signal_agent": [
+        "market_sentiment",
+        "trading_frequency",
+        "price_sensitivity",
+        "market_phase",
+    ],
+    "industry_agent": [
+        "primary_sector",
+        "ecosystem",
+        "protocol_interaction",
+        "token_categories",
+        "industry_trend",
+    ],
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数（约4个字符一个token）"""
+    return max(1, len(text) // 4)
+
+
+def estimate_tokens_per_tx(txs: List[Dict[str, Any]]) -> int:
+    """用紧凑样本格式估算单笔交易在提示词中占用的token数"""
+    sample = sample_transactions(txs[:TOKEN_ESTIMATE_SAMPLE], TOKEN_ESTIMATE_SAMPLE)
+    if not sample:
+        return 1
+    text = json.dumps(sample, ensure_ascii=False, separators=(",", ":"))
+    return max(1, math.ceil(estimate_tokens(text) / len(sample)))
+
+
+def iter_chunks(
+    txs: Iterable[Dict[str, Any]], chunk_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """按输入顺序切分成固定大小的分块（输入需已按时间升序排列）"""
+    chunk: List[Dict[str, Any]] = []
+    for tx in txs:
+        chunk.append(tx)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def plan_chunks(
+    total: Optional[int],
+    tokens_per_tx: int,
+    token_budget: int = DEFAULT_CHUNK_TOKEN_BUDGET,
+    max_chunks: Optional[int] = DEFAULT_MAX_CHUNKS,
+) -> Tuple[int, int]:
+    """
+    计算分块大小和每个分块的样本数
+
+    Returns:
+        Tuple[int, int]: (每块交易数, 每块放入提示词的交易样本数)
+    """
+    budget_rows = max(1, token_budget // tokens_per_tx)
+    chunk_size = budget_rows
+    if total and max_chunks:
+        chunk_size = max(chunk_size, math.ceil(total / max_chunks))
+    return chunk_size, min(chunk_size, budget_rows)
+
+
+class ChunkReducer:
+    """增量合并同一Agent在各分块上的结论（只保留小字典，不保留交易）"""
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.weighted_sums: Dict[str, float] = defaultdict(float)
+        self.weights: Dict[str, float] = defaultdict(float)
+        self.categories: Dict[str, Counter] = defaultdict(Counter)
+        self.signals: Counter = Counter()
+        self.chunk_volumes: List[Tuple[int, float]] = []
+        self.latest: Tuple[int, Optional[Dict[str, Any]]] = (-1, None)
+        self.completed_chunks = 0
+        self.failed_chunks = 0
+        self.transaction_count = 0
+        self.total_volume = 0.0
+
+    def add(
+        self,
+        index: int,
+        result: Dict[str, Any],
+        tx_count: int,
+        features: Dict[str, Any],
+    ):
+        volume = features.get("volume", {}).get("total_eth") or 0.0
+        self.chunk_volumes.append((index, volume))
+        self.transaction_count += tx_count
+        self.total_volume += volume
+
+        if not isinstance(result, dict) or result.get("error"):
+            self.failed_chunks += 1
+            return
+        self.completed_chunks += 1
+
+        for field in NUMERIC_FIELDS.get(self.agent_name, []):
+            try:
+                value = float(result.get(field))
+            except (TypeError, ValueError):
+                continue
+            self.weighted_sums[field] += value * tx_count
+            self.weights[field] += tx_count
+
+        for field in CATEGORICAL_FIELDS.get(self.agent_name, []):
+            value = result.get(field)
+            if isinstance(value, str) and value and value != "unknown":
+                self.categories[field][value] += tx_count
+
+        for signal in result.get("signals") or []:
+            if isinstance(signal, str):
+                self.signals[signal] += tx_count
+
+        if index > self.latest[0]:
+            self.latest = (index, result)
+
+    def _volume_trend(self) -> str:
+        volumes = [volume for _, volume in sorted(self.chunk_volumes)]
+        if len(volumes) < 2:
+            return "stable"
+        half = len(volumes) // 2
+        early = sum(volumes[:half]) / half
+        late = sum(volumes[half:]) / (len(volumes) - half)
+        if early == 0 and late == 0:
+            return "stable"
+        change = (late - early) / max(early, late)
+        if change > 0.2:
+            return "increasing"
+        if change < -0.2:
+            return "decreasing"
+        return "stable"
+
+    def result(self) -> Dict[str, Any]:
+        """合并为与单次分析相同结构的结果"""
+        merged: Dict[str, Any] = {}
+        for field, total_weight in self.weights.items():
+            merged[field] = round(self.weighted_sums[field] / total_weight, 4)
+        for field, counts in self.categories.items():
+            merged[field] = counts.most_common(1)[0][0]
+
+        if self.agent_name == "position_agent":
+            merged["total_volume"] = str(round(self.total_volume, 6))
+            merged["avg_transaction_size"] = str(
+                round(self.total_volume / max(1, self.transaction_count), 6)
+            )
+        if self.agent_name == "signal_agent":
+            merged["volume_trend"] = self._volume_trend()
+            merged["signals"] = [signal for signal, _ in self.signals.most_common(10)]
+
+        latest_summary = (self.latest[1] or {}).get("summary", "")
+        merged["summary"] = (
+            f"EN: Merged from {self.completed_chunks} time-ordered chunks "
+            f"({self.transaction_count} txs); latest period: {latest_summary} "
+            f"| CN: 由{self.completed_chunks}个按时间排序的分块合并"
+            f"（共{self.transaction_count}笔交易）"
+        )
+        merged["chunk_stats"] = {
+            "completed": self.completed_chunks,
+            "failed": self.failed_chunks,
+        }
+        if not self.completed_chunks:
+            merged["error"] = "所有分块分析均失败"
+            merged.setdefault("confidence", 0.0)
+        return merged
+
+
+def map_reduce_analysis(
+    txs: Iterable[Dict[str, Any]],
+    agent_functions: Dict[str, Callable],
+    total: Optional[int] = None,
+    token_budget: int = DEFAULT_CHUNK_TOKEN_BUDGET,
+    max_chunks: Optional[int] = DEFAULT_MAX_CHUNKS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    对交易历史执行Map-Reduce分析
+
+    Args:
+        txs: 按时间升序排列的交易（列表或迭代器，迭代器时只遍历一次）
+        agent_functions: Agent名称 -> Agent函数，分析Agent需接受 sample_size 参数
+            （只运行其中属于 MAP_AGENTS 的Agent）
+        total: 交易总数（用于控制分块数；传入列表时自动计算）
+        token_budget: 每个分块提示词中交易部分的token预算
+        max_chunks: 分块数上限
+        max_workers: 并发Agent调用数
+
+    Returns:
+        Dict: Agent名称 -> 合并后的结果
+    """
+    if isinstance(txs, list):
+        total = len(txs)
+        head = txs[:TOKEN_ESTIMATE_SAMPLE]
+        rest: Iterable[Dict[str, Any]] = txs[TOKEN_ESTIMATE_SAMPLE:]
+    else:
+        iterator = iter(txs)
+        head = [tx for _, tx in zip(range(TOKEN_ESTIMATE_SAMPLE), iterator)]
+        rest = iterator
+
+    tokens_per_tx = estimate_tokens_per_tx(head)
+    chunk_size, sample_size = plan_chunks(
+        total, tokens_per_tx, token_budget, max_chunks
+    )
+
+    def all_txs() -> Iterator[Dict[str, Any]]:
+        yield from head
+        yield from rest
+
+    names = [name for name in MAP_AGENTS if name in agent_functions]
+    reducers = {name: ChunkReducer(name) for name in names}
+    in_flight: Dict[Future, Tuple[str, int, int, Dict[str, Any]]] = {}
+
+    def drain(block: bool):
+        if block:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        else:
+            done = [future for future in in_flight if future.done()]
+        for future in done:
+            name, index, tx_count, features = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": str(e)}
+            reducers[name].add(index, result, tx_count, features)
+
+    chunk_count = 0
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="mapreduce"
+    ) as executor:
+        for index, chunk in enumerate(iter_chunks(all_txs(), chunk_size)):
+            chunk_count += 1
+            features = extract_features(chunk)
+            for name in names:
+                # 限制在途任务数，保证内存只与并发数相关
+                while len(in_flight) >= max_workers * 2:
+                    drain(block=True)
+                future = executor.submit(
+                    contextvars.copy_context().run,
+                    agent_functions[name],
+                    chunk,
+                    sample_size=sample_size,
+                )
+                in_flight[future] = (name, index, len(chunk), features)
+            drain(block=False)
+        while in_flight:
+            drain(block=True)
+
+    print(f"Map-Reduce分析完成: 共{chunk_count}块, 每块最多{chunk_size}笔交易")
+    return {name: reducer.result() for name, reducer in reducers.items()}
@@ -0,0 +1,411 @@
+"""
+多Agent分析运行流程（run.py 和 run_deepseek.py 共用）
+从数据库读取交易记录，按指定的AI提供方执行多Agent分析，保存结果
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+
+# 添加backend目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from budget import RUN_TOKEN_BUDGET, token_limit
+from db import get_analysis, get_analysis_token_usage, init_database, save_analysis
+from features import infer_focus_address, to_frame
+from loader import ANALYSIS_COLUMNS, count_transactions, iter_transactions
+from workflow import create_workflow_instance, result_fingerprints
+
+
+# AI提供方 -> 输出中的版本标识、API密钥环境变量
+PROVIDERS = {
+    "claude": {"label": "", "api_key_env": "CLAUDE_API_KEY"},
+    "deepseek": {"label": " (DeepSeek版本)", "api_key_env": "DEEPSEEK_API_KEY"},
+}
+
+RESULT_FILE = "analysis_demo/result.json"
+
+
+def load_transactions_from_db(
+    db_path: str = "transactions.db", limit: int = 20, address: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    从数据库加载交易记录
+
+    Args:
+        db_path: 数据库文件路径
+        limit: 加载记录数量限制（<=0 表示不限制）
+        address: 只加载与该地址相关的交易（默认全部）
+
+    Returns:
+        List[Dict]: 交易记录列表
+    """
+    if not os.path.exists(db_path):
+        print(f"数据库文件不存在: {db_path}")
+        return []
+
+    try:
+        # 按批次流式读取最近的交易，只读取分析需要的列
+        transactions = list(
+            iter_transactions(
+                db_path,
+                columns=ANALYSIS_COLUMNS,
+                address=address,
+                order="desc",
+                limit=limit if limit > 0 else None,
+            )
+        )
+
+        print(f"从数据库加载了 {len(transactions)} 笔交易")
+        return transactions
+
+    except Exception as e:
+        print(f"从数据库加载交易失败: {e}")
+        return []
+
+
+def create_sample_transactions() -> List[Dict[str, Any]]:
+    """
+    创建示例交易数据（当数据库为空时使用）
+
+    Returns:
+        List[Dict]: 示例交易数据
+    """
+    sample_txs = [
+        {
+            "hash": "0x1234567890abcdef1234567890abcdef12345678",
+            "from_addr": "0xabcdef1234567890abcdef1234567890abcdef12",
+            "to_addr": "0x9876543210fedcba9876543210fedcba98765432",
+            "value": "1500000000000000000",  # 1.5 ETH
+            "time": 1642234567,
+            "raw_json": json.dumps(
+                {
+                    "hash": "0x1234567890abcdef1234567890abcdef12345678",
+                    "from": "0xabcdef1234567890abcdef1234567890abcdef12",
+                    "to": "0x9876543210fedcba9876543210fedcba98765432",
+                    "value": "1500000000000000000",
+                    "timeStamp": "1642234567",
+                    "gas": "21000",
+                    "gasPrice": "20000000000",
+                    "gasUsed": "21000",
+                }
+            ),
+            "parsed_json": json.dumps(
+                {
+                    "action": "transfer",
+                    "token": "ETH",
+                    "amount": "1.5",
+                    "time": "2024-01-15T10:30:00Z",
+                    "confidence": 0.95,
+                    "description": "EN: ETH transfer between addresses | CN: 以太坊地址间转账",
+                    "risk_level": "low",
+                    "gas_used": "21000",
+                    "gas_price": "20000000000",
+                }
+            ),
+        },
+        {
+            "hash": "0x2345678901bcdef1234567890abcdef1234567890",
+            "from_addr": "0x9876543210fedcba9876543210fedcba98765432",
+            "to_addr": "0x1234567890abcdef1234567890abcdef12345678",
+            "value": "500000000000000000",  # 0.5 ETH
+            "time": 1642234568,
+            "raw_json": json.dumps(
+                {
+                    "hash": "0x2345678901bcdef1234567890abcdef1234567890",
+                    "from": "0x9876543210fedcba9876543210fedcba98765432",
+                    "to": "0x1234567890abcdef1234567890abcdef12345678",
+                    "value": "500000000000000000",
+                    "timeStamp": "1642234568",
+                    "gas": "21000",
+                    "gasPrice": "25000000000",
+                    "gasUsed": "21000",
+                }
+            ),
+            "parsed_json": json.dumps(
+                {
+                    "action": "transfer",
+                    "token": "ETH",
+                    "amount": "0.5",
+                    "time": "2024-01-15T10:31:00Z",
+                    "confidence": 0.95,
+                    "description": "EN: ETH transfer between addresses | CN: 以太坊地址间转账",
+                    "risk_level": "low",
+                    "gas_used": "21000",
+                    "gas_price": "25000000000",
+                }
+            ),
+        },
+    ]
+
+    print(f"创建了 {len(sample_txs)} 笔示例交易")
+    return sample_txs
+
+
+def load_previous_result(result_file: str) -> Dict[str, Any]:
+    """读取上一次的分析结果（用于增量分析），不存在或无法解析时返回空字典"""
+    if not os.path.exists(result_file):
+        return {}
+    try:
+        with open(result_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"读取上一次分析结果失败，将完整分析: {e}")
+        return {}
+
+
+def load_previous_analysis(address: str, result_file: str) -> Dict[str, Any]:
+    """读取该地址最新版本的分析结果，数据库中没有时回退到结果文件"""
+    try:
+        latest = get_analysis(address)
+    except Exception as e:
+        print(f"从数据库读取上一次分析结果失败: {e}")
+        latest = None
+    if latest:
+        print(f"基于地址 {address} 的第 {latest['version']} 版分析结果增量分析")
+        return latest["result"]
+    return load_previous_result(result_file)
+
+
+def get_token_budget(address: str, run_budget: Optional[int] = None) -> Optional[int]:
+    """本次运行的token上限（见 budget.token_limit），None表示不限制"""
+    try:
+        used = get_analysis_token_usage(address) if address else 0
+    except Exception as e:
+        print(f"读取地址已消耗的token数失败: {e}")
+        used = 0
+    return token_limit(
+        used, run_budget=RUN_TOKEN_BUDGET if run_budget is None else run_budget
+    )
+
+
+def save_results_to_db(address: str, results: Dict[str, Any]) -> Optional[int]:
+    """把分析结果作为该地址的新版本写入数据库analyses表，返回版本号"""
+    try:
+        return save_analysis(address, results, result_fingerprints(results))
+    except Exception as e:
+        print(f"分析结果写入数据库失败: {e}")
+        return None
+
+
+def print_summary(results: Dict[str, Any]):
+    """打印关键结果"""
+    print("\n" + "=" * 60)
+    print("分析结果摘要")
+    print("=" * 60)
+
+    if "advisor_analysis" in results:
+        advisor = results["advisor_analysis"]
+        print(f"总体评分: {advisor.get('overall_rating', 'N/A')}/10")
+        print(f"风险评估: {advisor.get('risk_assessment', 'N/A')}")
+        print(f"投资建议: {advisor.get('recommendation', 'N/A')}")
+        print(f"信心水平: {advisor.get('confidence_level', 'N/A')}")
+        print(f"建议总结: {advisor.get('summary', 'N/A')}")
+
+    usage = results.get("metadata", {}).get("usage") or {}
+    if usage.get("total"):
+        total = usage["total"]
+        estimated = (usage.get("budget") or {}).get("estimated_tokens", "N/A")
+        print(
+            f"Token用量: 输入 {total['input_tokens']} / 输出 {total['output_tokens']}"
+            f"（预估 {estimated}），估算费用 ${total['cost_usd']}"
+        )
+
+    print("\n详细结果请查看 result.json 文件")
+
+
+def run_stream_analysis(
+    provider: str = "claude",
+    address: Optional[str] = None,
+    db_path: str = "transactions.db",
+    token_budget: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    流式分析数据库中的全部交易：按时间升序逐批读取并逐块分析，
+    不把完整交易历史载入内存（不做增量分析）
+
+    Args:
+        provider: "claude" 或 "deepseek"
+        address: 被分析的地址（默认全部交易，地址从第一批交易中推断）
+        db_path: 数据库文件路径
+        token_budget: 单次运行的token预算（默认 ANALYSIS_RUN_TOKEN_BUDGET，0表示不限制）
+    """
+    print("=" * 60)
+    print(f"开始执行多Agent分析工作流{PROVIDERS[provider]['label']}（流式）")
+    print("=" * 60)
+
+    if not os.path.exists(db_path):
+        print(f"数据库文件不存在: {db_path}")
+        return None
+
+    total = count_transactions(db_path, address=address)
+    if total == 0:
+        print("错误: 数据库中没有可分析的交易")
+        return None
+
+    workflow = create_workflow_instance(provider)
+    transactions = iter_transactions(
+        db_path, columns=ANALYSIS_COLUMNS, address=address, order="asc"
+    )
+    results = workflow.execute_stream(
+        transactions,
+        total=total,
+        address=address,
+        # 未指定地址时地址在分析中才推断出来，只能按单次预算限制
+        token_budget=get_token_budget((address or "").lower(), token_budget),
+    )
+    if results["metadata"]["status"] == "budget_exceeded":
+        print(f"分析未执行: {results['error']}")
+        return results
+
+    address = results["metadata"].get("address", "")
+    version = save_results_to_db(address, results) if address else None
+    if version is not None:
+        print(f"\n分析结果已保存到数据库: 地址 {address} 第 {version} 版")
+
+    with open(RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"分析结果已保存到: {RESULT_FILE}")
+
+    print_summary(results)
+    return results
+
+
+def run_analysis(
+    provider: str = "claude",
+    limit: int = 20,
+    mode: str = "auto",
+    incremental: bool = True,
+    address: Optional[str] = None,
+    token_budget: Optional[int] = None,
+):
+    """
+    运行完整的分析流程
+
+    Args:
+        provider: "claude" 或 "deepseek"
+        limit: 从数据库加载的交易数量（<=0 表示全部）
+        mode: 分析模式 auto / single / mapreduce
+        incremental: 是否基于上一次结果增量分析
+        address: 被分析的地址（默认取交易中出现次数最多的地址）
+        token_budget: 单次运行的token预算（默认 ANALYSIS_RUN_TOKEN_BUDGET，0表示不限制）
+    """
+    print("=" * 60)
+    print(f"开始执行多Agent分析工作流{PROVIDERS[provider]['label']}")
+    print("=" * 60)
+
+    # 检查环境变量
+    api_key_env = PROVIDERS[provider]["api_key_env"]
+    if not os.getenv(api_key_env):
+        print(f"警告: {api_key_env} 环境变量未设置，将使用示例数据")
+
+    # 加载交易数据
+    transactions = load_transactions_from_db(limit=limit, address=address)
+
+    if not transactions:
+        print("数据库中没有交易记录，使用示例数据")
+        transactions = create_sample_transactions()
+
+    if not transactions:
+        print("错误: 没有可用的交易数据进行分析")
+        return
+
+    address = (address or infer_focus_address(to_frame(transactions)) or "").lower()
+    print(f"准备分析地址 {address} 的 {len(transactions)} 笔交易")
+
+    # 创建工作流实例
+    workflow = create_workflow_instance(provider)
+
+    previous = load_previous_analysis(address, RESULT_FILE) if incremental else {}
+
+    # 执行工作流
+    try:
+        results = workflow.execute_workflow(
+            transactions,
+            mode=mode,
+            previous=previous,
+            token_budget=get_token_budget(address, token_budget),
+        )
+        results["metadata"]["address"] = address
+        if results["metadata"]["status"] == "budget_exceeded":
+            print(f"分析未执行: {results['error']}")
+            return
+
+        # 保存结果：数据库按地址保留历史版本，result.json 供 /analysis 兼容读取
+        version = save_results_to_db(address, results)
+        if version is not None:
+            print(f"\n分析结果已保存到数据库: 地址 {address} 第 {version} 版")
+
+        with open(RESULT_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+        print(f"分析结果已保存到: {RESULT_FILE}")
+
+        print_summary(results)
+
+    except Exception as e:
+        print(f"分析执行失败: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+
+def main(provider: str = "claude"):
+    """命令行入口（provider 为 "claude" 或 "deepseek"）"""
+    label = PROVIDERS[provider]["label"]
+    parser = argparse.ArgumentParser(description=f"多Agent加密货币交易分析{label}")
+    parser.add_argument("--limit", type=int, default=20, help="加载的交易数量，0表示全部")
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "single", "mapreduce"],
+        default="auto",
+        help="分析模式：长历史使用mapreduce分块分析",
+    )
+    parser.add_argument("--address", help="被分析的地址，只加载与该地址相关的交易")
+    parser.add_argument("--full", action="store_true", help="忽略上一次结果，所有Agent完整重新分析")
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="单次运行的token预算，超出时自动改用紧凑摘要/更少样本（0表示不限制）",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="流式分析全部交易（逐批读取，适合内存放不下的长历史，忽略--limit/--mode）",
+    )
+    args = parser.parse_args()
+
+    print(f"多Agent加密货币交易分析系统{label}")
+    print("=" * 60)
+
+    # 检查数据库
+    db_path = "transactions.db"
+    if os.path.exists(db_path):
+        print(f"找到数据库文件: {db_path}")
+    else:
+        print(f"数据库文件不存在: {db_path}")
+        print("将使用示例数据进行演示")
+    # 建表和数据迁移每次运行只执行一次，保存结果时不再重复初始化
+    init_database()
+
+    # 运行分析
+    if args.stream:
+        run_stream_analysis(
+            provider,
+            address=args.address,
+            db_path=db_path,
+            token_budget=args.token_budget,
+        )
+        return
+
+    run_analysis(
+        provider,
+        limit=args.limit,
+        mode=args.mode,
+        incremental=not args.full,
+        address=args.address,
+        token_budget=args.token_budget,
+    )
@@ -0,0 +1,143 @@
+"""
+LLM用量统计
+按 (provider, model) 累计调用次数、缓存命中、token数和估算费用，
+批量分析时每个地址分析前后各取一次快照求差；
+单次分析和单个Agent的用量用 track_usage 按上下文统计（并发的分析互不干扰）
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# 每百万token的价格（美元）: (输入, 输出)；价格变化时更新
+PRICES_PER_MILLION = {
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "deepseek-chat": (0.27, 1.10),
+}
+
+COUNTER_FIELDS = ["calls", "cache_hits", "input_tokens", "output_tokens"]
+
+# 当前上下文中正在统计用量的计数器（可嵌套，例如单次分析 + 单个Agent）
+_scopes: ContextVar[Tuple[Dict[str, Dict[str, int]], ...]] = ContextVar(
+    "llm_usage_scopes", default=()
+)
+
+
+class UsageMeter:
+    """进程内LLM用量计数器（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(COUNTER_FIELDS, 0)
+        )
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached: bool = False,
+    ):
+        """记录一次LLM调用（cached为True表示命中响应缓存，没有产生费用）"""
+        delta = {
+            "calls": 1,
+            "cache_hits": int(cached),
+            "input_tokens": int(input_tokens or 0),
+            "output_tokens": int(output_tokens or 0),
+        }
+        with self._lock:
+            counters = self._counters[(provider, model)]
+            for field, value in delta.items():
+                counters[field] += value
+            for scope in _scopes.get():
+                merge_usage(scope, {f"{provider}/{model}": delta})
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """当前累计值: "provider/model" -> 计数"""
+        with self._lock:
+            return {
+                f"{provider}/{model}": dict(counters)
+                for (provider, model), counters in self._counters.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+def diff_usage(
+    after: Dict[str, Dict[str, int]], before: Dict[str, Dict[str, int]]
+) -> Dict[str, Dict[str, int]]:
+    """两次快照之差"""
+    result = {}
+    for key, counters in after.items():
+        base = before.get(key, {})
+        delta = {
+            field: counters[field] - base.get(field, 0) for field in COUNTER_FIELDS
+        }
+        if any(delta.values()):
+            result[key] = delta
+    return result
+
+
+def merge_usage(
+    total: Dict[str, Dict[str, int]], usage: Dict[str, Dict[str, int]]
+) -> Dict[str, Dict[str, int]]:
+    """把 usage 累加到 total 中（原地修改并返回total）"""
+    for key, counters in usage.items():
+        target = total.setdefault(key, dict.fromkeys(COUNTER_FIELDS, 0))
+        for field in COUNTER_FIELDS:
+            target[field] += counters.get(field, 0)
+    return total
+
+
+@contextmanager
+def track_usage(
+    counters: Optional[Dict[str, Dict[str, int]]] = None,
+) -> Iterator[Dict[str, Dict[str, int]]]:
+    """
+    统计代码块内的LLM用量（格式同 UsageMeter.snapshot）
+
+    线程池中的任务需通过 contextvars.copy_context().run 提交才会计入
+    （DAGExecutor 和 map_reduce_analysis 已这样做）。传入 counters 时在其基础上累加。
+    """
+    counters = {} if counters is None else counters
+    token = _scopes.set(_scopes.get() + (counters,))
+    try:
+        yield counters
+    finally:
+        _scopes.reset(token)
+
+
+def usage_totals(usage: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """把按 provider/model 分开的用量汇总成一组计数和估算费用"""
+    totals: Dict[str, Any] = dict.fromkeys(COUNTER_FIELDS, 0)
+    for counters in usage.values():
+        for field in COUNTER_FIELDS:
+            totals[field] += counters.get(field, 0)
+    totals["cost_usd"] = estimate_cost(usage)
+    return totals
+
+
+def estimate_cost(usage: Dict[str, Dict[str, int]]) -> float:
+    """按 PRICES_PER_MILLION 估算费用（美元），未知模型按0计"""
+    cost = 0.0
+    for key, counters in usage.items():
+        model = key.split("/", 1)[-1]
+        input_price, output_price = PRICES_PER_MILLION.get(model, (0.0, 0.0))
+        cost += counters.get("input_tokens", 0) * input_price / 1_000_000
+        cost += counters.get("output_tokens", 0) * output_price / 1_000_000
+    return round(cost, 6)
+
+
+_meter = UsageMeter()
+
+
+def get_usage_meter() -> UsageMeter:
+    """进程内共享的用量计数器"""
+    return _meter
@@ -4,15 +4,124 @@
 """
 
 import json
-from typing import Any, Dict, List
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from agents import advisor_agent, industry_agent, position_agent, signal_agent
+from budget import BudgetExceededError, plan_budget, plan_stream_budget
+from executor import COMPLETED, FAILED, DAGExecutor
+from features import FeatureAccumulator
+from incremental import (
+    DELTA,
+    FULL,
+    PROMPT_VERSIONS,
+    UNCHANGED,
+    combine_fingerprints,
+    plan_agent,
+)
+from mapreduce import (
+    DEFAULT_MAX_WORKERS,
+    MAP_AGENTS,
+    TOKEN_ESTIMATE_SAMPLE,
+    map_reduce_analysis,
+)
+from usage import merge_usage, track_usage, usage_totals
+
+
+# Agent名称 -> 结果字段名
+RESULT_KEYS = {
+    "position_agent": "position_analysis",
+    "signal_agent": "signal_analysis",
+    "industry_agent": "industry_analysis",
+    "advisor_agent": "advisor_analysis",
+}
+
+# 默认单个Agent超时（秒）
+DEFAULT_AGENT_TIMEOUT = 120
+
+# auto模式下超过该交易数时使用Map-Reduce分析
+MAPREDUCE_THRESHOLD = 200
+
+# 流式分析时全量特征统计的批次大小
+STREAM_FEATURE_BATCH = 1000
+
+
+def _observe(
+    transactions: Iterable[Dict[str, Any]],
+    accumulator: FeatureAccumulator,
+    batch_size: int = STREAM_FEATURE_BATCH,
+) -> Iterator[Dict[str, Any]]:
+    """原样产出交易，同时按批次更新特征统计"""
+    batch = []
+    for tx in transactions:
+        batch.append(tx)
+        if len(batch) >= batch_size:
+            accumulator.update(batch)
+            batch = []
+        yield tx
+    if batch:
+        accumulator.update(batch)
+
+
+def _metered(fn: Callable, counters: Dict[str, Dict[str, int]]) -> Callable:
+    """调用期间的LLM用量计入 counters"""
+
+    def call(*args, **kwargs):
+        with track_usage(counters):
+            return fn(*args, **kwargs)
+
+    return call
+
+
+def _node_outcome(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Agent内部捕获LLM错误后返回带error字段的结果，节点虽正常结束也按失败处理，
+    避免整次运行被记为completed（之后会被当作最新结果复用，不再重试）
+    """
+    output = node["output"]
+    if node["status"] == COMPLETED and isinstance(output, dict) and output.get("error"):
+        return {**node, "status": FAILED, "error": output["error"]}
+    return node
+
+
+def _usage_metadata(
+    agent_usage: Dict[str, Dict[str, Dict[str, int]]],
+    budget: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """本次运行的token用量（合计和各Agent）以及预算规划"""
+    total: Dict[str, Dict[str, int]] = {}
+    for usage in agent_usage.values():
+        merge_usage(total, usage)
+    return {
+        "total": usage_totals(total),
+        "agents": {
+            name: usage_totals(usage) for name, usage in agent_usage.items() if usage
+        },
+        "budget": budget,
+    }
 
 
 class AnalysisWorkflow:
     """分析工作流类"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        agent_functions: Optional[Dict[str, Callable]] = None,
+        provider: str = "Claude",
+    ):
+        """
+        Args:
+            agent_functions: Agent名称 -> Agent函数（默认使用Claude版本的agents）
+            provider: AI提供方名称，写入结果元数据
+        """
+        self.agent_functions = agent_functions or {
+            "position_agent": position_agent,
+            "signal_agent": signal_agent,
+            "industry_agent": industry_agent,
+            "advisor_agent": advisor_agent,
+        }
+        self.provider = provider
         self.workflow_config = {
             "name": "Crypto Transaction Analysis Workflow",
             "version": "1.0.0",
@@ -21,21 +130,25 @@ class AnalysisWorkflow:
                 {
                     "name": "position_agent",
                     "description": "Analyzes position and investment strategy",
+                    "timeout": DEFAULT_AGENT_TIMEOUT,
                     "function": "position_agent",
                 },
                 {
                     "name": "signal_agent",
                     "description": "Analyzes market signals and timing",
+                    "timeout": DEFAULT_AGENT_TIMEOUT,
                     "function": "signal_agent",
                 },
                 {
                     "name": "industry_agent",
                     "description": "Analyzes industry and ecosystem involvement",
+                    "timeout": DEFAULT_AGENT_TIMEOUT,
                     "function": "industry_agent",
                 },
                 {
                     "name": "advisor_agent",
                     "description": "Provides comprehensive investment advice",
+                    "timeout": DEFAULT_AGENT_TIMEOUT,
                     "function": "advisor_agent",
                 },
             ],
@@ -50,50 +163,251 @@ class AnalysisWorkflow:
             },
         }
 
-    def execute_workflow(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def execute_workflow(
+        self,
+        transactions: List[Dict[str, Any]],
+        mode: str = "auto",
+        previous: Optional[Dict[str, Any]] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        token_budget: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         执行完整的工作流分析
 
+        持仓、信号、行业分析互不依赖，会并发执行；投资顾问分析在它们完成后执行。
+        某个Agent超时或返回了带error字段的结果时，其余Agent的结果仍会返回（status为partial）。
+
+        传入上一次的结果时按指纹增量执行：输入交易未变化的Agent直接复用上一次结果，
+        只新增了交易的Agent只分析新增交易并在上一次结果的基础上更新，
+        三个分析结果都未变化时投资顾问分析也被复用。
+
         Args:
             transactions: 交易记录列表
+            mode: "single" 一次分析全部交易；"mapreduce" 按时间分块分析后合并；
+                "auto" 交易数超过 MAPREDUCE_THRESHOLD 时使用mapreduce
+            previous: 上一次 execute_workflow 的返回结果（用于增量分析）
+            on_event: 进度事件回调，依次收到 workflow_started、每个Agent的
+                agent_started / agent_finished（附带结果）、投资顾问的 advisor_token
+                流式文本，以及最后的 workflow_finished（附带完整结果）
+            token_budget: 本次运行的token上限（见 budget.token_limit）；预计超出时
+                改用紧凑特征摘要和更少的交易样本，仍超出时不执行（status为budget_exceeded）
 
         Returns:
-            Dict: 完整的分析结果
+            Dict: 完整的分析结果，metadata.usage 中记录本次运行的token用量
         """
         results = {}
+        agent_usage: Dict[str, Dict[str, Dict[str, int]]] = {
+            name: {} for name in self.agent_functions
+        }
+        agents = {
+            name: _metered(fn, agent_usage[name])
+            for name, fn in self.agent_functions.items()
+        }
 
+        if mode == "auto":
+            mode = "mapreduce" if len(transactions) > MAPREDUCE_THRESHOLD else "single"
+
+        def emit(event_type: str, **fields):
+            if on_event is None:
+                return
+            try:
+                on_event({"type": event_type, **fields})
+            except Exception as e:
+                # 事件消费方出错不影响分析
+                print(f"工作流事件回调失败: {e}")
+
+        previous = previous or {}
+        previous_fingerprints = previous.get("metadata", {}).get("fingerprints", {})
+        plans = {
+            name: plan_agent(
+                transactions,
+                name,
+                previous_fingerprints.get(name),
+                previous.get(RESULT_KEYS[name]),
+                self.provider,
+            )
+            for name in MAP_AGENTS
+        }
+        advisor_record = {
+            "fingerprint": combine_fingerprints(
+                "advisor_agent",
+                {name: plan["record"]["fingerprint"] for name, plan in plans.items()},
+            ),
+            "prompt_version": PROMPT_VERSIONS["advisor_agent"],
+        }
+        previous_advisor = previous.get(RESULT_KEYS["advisor_agent"])
+        reuse_advisor = (
+            isinstance(previous_advisor, dict)
+            and not previous_advisor.get("error")
+            and previous_fingerprints.get("advisor_agent", {}).get("fingerprint")
+            == advisor_record["fingerprint"]
+        )
+
+        # 执行前估算token数，超出预算时降级
+        inputs = {
+            name: plan["delta"] if plan["action"] == DELTA else transactions
+            for name, plan in plans.items()
+            if plan["action"] != UNCHANGED
+        }
         try:
-            # Step 1: 持仓分析
-            print("执行持仓分析...")
-            position_result = position_agent(transactions)
-            results["position_analysis"] = position_result
-
-            # Step 2: 信号分析
-            print("执行信号分析...")
-            signal_result = signal_agent(transactions)
-            results["signal_analysis"] = signal_result
-
-            # Step 3: 行业分析
-            print("执行行业分析...")
-            industry_result = industry_agent(transactions)
-            results["industry_analysis"] = industry_result
-
-            # Step 4: 投资顾问分析
+            budget = plan_budget(inputs, mode, token_budget, advisor=not reuse_advisor)
+        except BudgetExceededError as e:
+            print(f"超出token预算，未执行分析: {e}")
+            results["error"] = str(e)
+            results["metadata"] = {
+                "workflow_version": self.workflow_config["version"],
+                "transaction_count": len(transactions),
+                "analysis_timestamp": datetime.now().isoformat() + "Z",
+                "ai_provider": self.provider,
+                "status": "budget_exceeded",
+                "usage": _usage_metadata(
+                    {},
+                    {"estimated_tokens": e.estimated_tokens, "token_limit": e.limit},
+                ),
+            }
+            emit("workflow_finished", result=results)
+            return results
+        if budget["degraded"]:
+            print(
+                f"预计token数超出预算 {token_budget}，改用{budget['mode']}模式、"
+                f"{budget['sample_size']}笔交易样本"
+            )
+        mode = budget["mode"]
+        sample_size = budget["sample_size"]
+
+        emit("workflow_started", transaction_count=len(transactions), mode=mode)
+
+        ordered: List[Dict[str, Any]] = []
+        full_agents = [name for name in MAP_AGENTS if plans[name]["action"] == FULL]
+        if mode == "mapreduce" and full_agents:
+            print(f"使用Map-Reduce模式分析 {len(transactions)} 笔交易...")
+            ordered = sorted(transactions, key=lambda tx: int(tx.get("time") or 0))
+            # 各Agent节点并发执行，平分原来的分块并发数
+            map_workers = max(1, DEFAULT_MAX_WORKERS // len(full_agents))
+
+        def run_analysis_agent(name: str, label: str):
+            def task(upstream: Dict[str, Any]) -> Dict[str, Any]:
+                plan = plans[name]
+                if plan["action"] == UNCHANGED:
+                    print(f"{label}的输入交易未变化，复用上一次结果")
+                    return previous[RESULT_KEYS[name]]
+                if plan["action"] == DELTA:
+                    print(f"执行{label}（增量：{len(plan['delta'])} 笔新增交易）...")
+                    return agents[name](
+                        plan["delta"],
+                        sample_size=sample_size,
+                        previous=previous[RESULT_KEYS[name]],
+                    )
+                if mode == "mapreduce":
+                    # 在节点内执行，受节点超时约束并产生 agent_started/finished 事件
+                    print(f"执行{label}（Map-Reduce）...")
+                    return map_reduce_analysis(
+                        ordered, {name: agents[name]}, max_workers=map_workers
+                    )[name]
+                print(f"执行{label}...")
+                return agents[name](transactions, sample_size=sample_size)
+
+            return task
+
+        def run_advisor(upstream: Dict[str, Any]) -> Dict[str, Any]:
+            if reuse_advisor:
+                print("投资顾问分析的上游结果未变化，复用上一次结果")
+                return previous_advisor
             print("执行投资顾问分析...")
-            advisor_result = advisor_agent(
-                position_result, signal_result, industry_result
+            stream = {}
+            if on_event is not None:
+                stream["on_token"] = lambda text: emit("advisor_token", text=text)
+            return agents["advisor_agent"](
+                upstream["position_agent"],
+                upstream["signal_agent"],
+                upstream["industry_agent"],
+                **stream,
+            )
+
+        tasks = {
+            "position_agent": run_analysis_agent("position_agent", "持仓分析"),
+            "signal_agent": run_analysis_agent("signal_agent", "信号分析"),
+            "industry_agent": run_analysis_agent("industry_agent", "行业分析"),
+            "advisor_agent": run_advisor,
+        }
+
+        try:
+            executor = DAGExecutor(
+                self.workflow_config["execution_order"],
+                self.workflow_config["dependencies"],
+                timeouts={
+                    agent["name"]: agent["timeout"]
+                    for agent in self.workflow_config["agents"]
+                    if agent.get("timeout")
+                },
             )
-            results["advisor_analysis"] = advisor_result
+            actions = {name: plan["action"] for name, plan in plans.items()}
+            actions["advisor_agent"] = UNCHANGED if reuse_advisor else FULL
+
+            def on_start(name: str):
+                emit("agent_started", agent=name, result_key=RESULT_KEYS[name])
+
+            def on_finish(name: str, node: Dict[str, Any]):
+                node = _node_outcome(node)
+                emit(
+                    "agent_finished",
+                    agent=name,
+                    result_key=RESULT_KEYS[name],
+                    status=node["status"],
+                    duration=round(node["duration"], 3),
+                    incremental=actions[name],
+                    result=node["output"],
+                    error=node["error"],
+                )
+
+            node_results = {
+                name: _node_outcome(node)
+                for name, node in executor.run(
+                    tasks, on_start=on_start, on_finish=on_finish
+                ).items()
+            }
+
+            for name, node in node_results.items():
+                # 出错的Agent仍保留其返回的兜底结果（带error字段）
+                if node["output"] is not None:
+                    results[RESULT_KEYS[name]] = node["output"]
+
+            completed = {
+                name
+                for name, node in node_results.items()
+                if node["status"] == COMPLETED
+            }
+            all_completed = len(completed) == len(node_results)
+            # 上游有Agent失败时投资顾问基于兜底结果分析，不记录指纹，下一次重新执行
+            if not completed.issuperset(MAP_AGENTS):
+                completed.discard("advisor_agent")
+            records = {name: plan["record"] for name, plan in plans.items()}
+            records["advisor_agent"] = advisor_record
 
             # 添加元数据
             results["metadata"] = {
                 "workflow_version": self.workflow_config["version"],
                 "transaction_count": len(transactions),
-                "analysis_timestamp": "2024-01-01T00:00:00Z",  # 实际使用时应该用当前时间
-                "status": "completed",
+                "analysis_timestamp": datetime.now().isoformat() + "Z",
+                "ai_provider": self.provider,
+                "mode": mode,
+                "status": "completed" if all_completed else "partial",
+                "agent_status": {
+                    name: {
+                        "status": node["status"],
+                        "duration": round(node["duration"], 3),
+                        "incremental": actions[name],
+                        **({"error": node["error"]} if node["error"] else {}),
+                    }
+                    for name, node in node_results.items()
+                },
+                # 下一次增量分析时用来判断输入是否变化
+                "fingerprints": {name: records[name] for name in completed},
+                "usage": _usage_metadata(agent_usage, budget),
             }
 
-            print("工作流执行完成")
+            print("工作流执行完成" if all_completed else "工作流部分完成")
+            emit("workflow_finished", result=results)
             return results
 
         except Exception as e:
@@ -102,11 +416,115 @@ class AnalysisWorkflow:
             results["metadata"] = {
                 "workflow_version": self.workflow_config["version"],
                 "transaction_count": len(transactions),
-                "analysis_timestamp": "2024-01-01T00:00:00Z",
+                "analysis_timestamp": datetime.now().isoformat() + "Z",
+                "ai_provider": self.provider,
                 "status": "failed",
+                "usage": _usage_metadata(agent_usage, budget),
             }
+            emit("workflow_finished", result=results)
             return results
 
+    def execute_stream(
+        self,
+        transactions: Iterable[Dict[str, Any]],
+        total: Optional[int] = None,
+        address: Optional[str] = None,
+        token_budget: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        流式执行工作流：交易只遍历一次，内存占用与交易总数无关
+
+        三个分析Agent使用Map-Reduce逐块分析后合并，投资顾问基于合并结果分析；
+        同时流式统计全部交易的特征（见 FeatureAccumulator），写入 metadata.features。
+        流式模式不做增量指纹（需要完整交易集合），下一次分析总是全量执行。
+
+        Args:
+            transactions: 按时间升序排列的交易迭代器（如 loader.iter_transactions）
+            total: 交易总数（用于规划分块，如 loader.count_transactions）
+            address: 分析的地址（为空时从第一批交易中推断）
+            token_budget: 本次运行的token上限；按开头的交易估算，超出时不执行
+                （status为budget_exceeded，见 budget.plan_stream_budget）
+
+        Returns:
+            Dict: 完整的分析结果（结构同 execute_workflow）
+        """
+        iterator = iter(transactions)
+        head = list(islice(iterator, TOKEN_ESTIMATE_SAMPLE))
+        try:
+            budget = plan_stream_budget(head, total, token_budget)
+        except BudgetExceededError as e:
+            print(f"超出token预算，未执行分析: {e}")
+            return {
+                "error": str(e),
+                "metadata": {
+                    "workflow_version": self.workflow_config["version"],
+                    "transaction_count": total,
+                    "analysis_timestamp": datetime.now().isoformat() + "Z",
+                    "ai_provider": self.provider,
+                    "mode": "mapreduce-stream",
+                    "status": "budget_exceeded",
+                    "usage": _usage_metadata(
+                        {},
+                        {
+                            "estimated_tokens": e.estimated_tokens,
+                            "token_limit": e.limit,
+                        },
+                    ),
+                },
+            }
+
+        accumulator = FeatureAccumulator(address)
+        agent_usage: Dict[str, Dict[str, Dict[str, int]]] = {
+            name: {} for name in self.agent_functions
+        }
+        agents = {
+            name: _metered(fn, agent_usage[name])
+            for name, fn in self.agent_functions.items()
+        }
+        results: Dict[str, Any] = {}
+        status = "completed"
+
+        try:
+            print(f"使用流式Map-Reduce模式分析 {total or '未知数量的'} 笔交易...")
+            mapped = map_reduce_analysis(
+                _observe(chain(head, iterator), accumulator),
+                {name: agents[name] for name in MAP_AGENTS},
+                total=total,
+            )
+            for name in MAP_AGENTS:
+                results[RESULT_KEYS[name]] = mapped[name]
+
+            print("执行投资顾问分析...")
+            results[RESULT_KEYS["advisor_agent"]] = agents["advisor_agent"](
+                mapped["position_agent"],
+                mapped["signal_agent"],
+                mapped["industry_agent"],
+            )
+            if any(
+                isinstance(result, dict) and result.get("error")
+                for result in results.values()
+            ):
+                status = "partial"
+        except Exception as e:
+            print(f"工作流执行失败: {e}")
+            results["error"] = str(e)
+            status = "failed"
+
+        results["metadata"] = {
+            "workflow_version": self.workflow_config["version"],
+            "transaction_count": accumulator.count,
+            "analysis_timestamp": datetime.now().isoformat() + "Z",
+            "ai_provider": self.provider,
+            "mode": "mapreduce-stream",
+            "status": status,
+            "features": accumulator.features(),
+            "usage": _usage_metadata(agent_usage, budget),
+        }
+        if accumulator.address:
+            results["metadata"]["address"] = accumulator.address
+        print("工作流执行完成" if status == "completed" else f"工作流{status}")
+        return results
+
     def get_workflow_config(self) -> Dict[str, Any]:
         """获取工作流配置"""
         return self.workflow_config
@@ -119,6 +537,38 @@ class AnalysisWorkflow:
             json.dump(self.workflow_config, f, indent=2, ensure_ascii=False)
         print(f"工作流配置已保存到: {filepath}")
 
+    def load_workflow_config(
+        self, filepath: str = "analysis_demo/workflow_config.json"
+    ):
+        """
+        从文件加载工作流配置
+
+        Raises:
+            ValueError: 配置缺少字段、节点未定义或依赖存在环
+        """
+        from engine import validate_config
+
+        with open(filepath, encoding="utf-8") as f:
+            config = json.load(f)
+        validate_config(config)
+        self.workflow_config = config
+
+    def create_engine(self, cache_dir: Optional[str] = None):
+        """
+        按当前配置创建声明式工作流引擎（见 engine.WorkflowEngine）
+
+        Args:
+            cache_dir: 节点输出缓存目录（默认只缓存在内存中）
+        """
+        from engine import NodeCache, WorkflowEngine
+
+        return WorkflowEngine(
+            self.workflow_config,
+            registry=self.agent_functions,
+            provider=self.provider,
+            cache=NodeCache(cache_dir),
+        )
+
 
 # OpenManus兼容的工作流定义
 WORKFLOW_DEFINITION = {
@@ -200,8 +650,35 @@ WORKFLOW_DEFINITION = {
 }
 
 
-def create_workflow_instance():
-    """创建工作流实例"""
+def result_fingerprints(results: Dict[str, Any]) -> Dict[str, str]:
+    """结果字段名 -> 输入指纹（写入数据库analyses表时使用）"""
+    fingerprints = results.get("metadata", {}).get("fingerprints", {})
+    return {
+        RESULT_KEYS[name]: record["fingerprint"]
+        for name, record in fingerprints.items()
+        if name in RESULT_KEYS
+    }
+
+
+def create_workflow_instance(provider: str = "claude"):
+    """
+    创建工作流实例
+
+    Args:
+        provider: "claude" 或 "deepseek"
+    """
+    if provider == "deepseek":
+        import agents_deepseek
+
+        return AnalysisWorkflow(
+            agent_functions={
+                "position_agent": agents_deepseek.position_agent,
+                "signal_agent": agents_deepseek.signal_agent,
+                "industry_agent": agents_deepseek.industry_agent,
+                "advisor_agent": agents_deepseek.advisor_agent,
+            },
+            provider="DeepSeek",
+        )
     return AnalysisWorkflow()
 
 
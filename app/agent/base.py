@@ -4,10 +4,12 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
+from app.context import ContextCompactor
 from app.llm import LLM
 from app.logger import logger
 from app.sandbox.client import SANDBOX_CLIENT
 from app.schema import ROLE_TYPE, AgentState, Memory, Message
+from app.telemetry import llm_call_context
 
 
 class BaseAgent(BaseModel, ABC):
@@ -35,6 +37,9 @@ class BaseAgent(BaseModel, ABC):
     state: AgentState = Field(
         default=AgentState.IDLE, description="Current agent state"
     )
+    compactor: Optional[ContextCompactor] = Field(
+        None, description="Keeps memory within the configured token budget"
+    )
 
     # Execution control
     max_steps: int = Field(default=10, description="Maximum steps before termination")
@@ -53,6 +58,8 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        if self.compactor is None:
+            self.compactor = ContextCompactor(self.llm)
         return self
 
     @asynccontextmanager
@@ -138,7 +145,8 @@ class BaseAgent(BaseModel, ABC):
             ):
                 self.current_step += 1
                 logger.info(f"Executing step {self.current_step}/{self.max_steps}")
-                step_result = await self.step()
+                with llm_call_context(self.name, self.current_step):
+                    step_result = await self.step()
 
                 # Check for stuck state
                 if self.is_stuck():
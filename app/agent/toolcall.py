@@ -42,27 +42,30 @@ class ToolCallAgent(ReActAgent):
             user_msg = Message.user_message(self.next_step_prompt)
             self.messages += [user_msg]
 
+        system_msgs = (
+            [Message.system_message(self.system_prompt)] if self.system_prompt else None
+        )
+        tools = self.available_tools.to_params()
+        if self.compactor and self.compactor.enabled:
+            await self.compactor.compact(
+                self.memory, reserved_tokens=self._request_overhead(system_msgs, tools)
+            )
+
         try:
             # Get response with tool options
             response = await self.llm.ask_tool(
                 messages=self.messages,
-                system_msgs=(
-                    [Message.system_message(self.system_prompt)]
-                    if self.system_prompt
-                    else None
-                ),
-                tools=self.available_tools.to_params(),
+                system_msgs=system_msgs,
+                tools=tools,
                 tool_choice=self.tool_choices,
             )
         except ValueError:
             raise
         except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
-                )
+            # TokenLimitExceeded is not retried, but may still arrive wrapped
+            token_limit_error = e if isinstance(e, TokenLimitExceeded) else e.__cause__
+            if isinstance(token_limit_error, TokenLimitExceeded):
+                logger.error(f"🚨 Token limit error: {token_limit_error}")
                 self.memory.add_message(
                     Message.assistant_message(
                         f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
@@ -128,6 +131,17 @@ class ToolCallAgent(ReActAgent):
             )
             return False
 
+    def _request_overhead(
+        self, system_msgs: Optional[List[Message]], tools: List[dict]
+    ) -> int:
+        """Tokens a request spends on the system prompt and tool definitions"""
+        tokens = sum(self.llm.count_tokens(str(tool)) for tool in tools)
+        if system_msgs:
+            tokens += self.llm.count_message_tokens(
+                self.llm.format_messages(system_msgs)
+            )
+        return tokens
+
     async def act(self) -> str:
         """Execute tool calls and handle their results"""
         if not self.tool_calls:
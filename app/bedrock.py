@@ -12,6 +12,9 @@ import boto3
 # Tmp solution
 CURRENT_TOOLUSE_ID = None
 
+# Converse API prompt cache checkpoint, placed after the content to cache
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
 
 # Class to handle OpenAI-style response formatting
 class OpenAIResponse:
@@ -81,6 +84,8 @@ class ChatCompletions:
                     }
                 }
                 bedrock_tools.append(bedrock_tool)
+                if tool.get("cache_control"):
+                    bedrock_tools.append(CACHE_POINT)
         return bedrock_tools
 
     def _convert_openai_messages_to_bedrock_format(self, messages):
@@ -129,6 +134,11 @@ class ChatCompletions:
                 bedrock_messages.append(bedrock_message)
             else:
                 raise ValueError(f"Invalid role: {message.get('role')}")
+            if message.get("cache_control"):
+                if message.get("role") == "system":
+                    system_prompt = system_prompt + [CACHE_POINT]
+                else:
+                    bedrock_messages[-1]["content"].append(CACHE_POINT)
         return system_prompt, bedrock_messages
 
     def _convert_bedrock_response_to_openai_format(self, bedrock_response):
@@ -158,6 +168,15 @@ class ChatCompletions:
                     }
                     openai_tool_calls.append(openai_tool_call)
 
+        # Bedrock counts cache reads and writes separately from inputTokens
+        usage = bedrock_response.get("usage", {})
+        cache_read_tokens = usage.get("cacheReadInputTokens", 0)
+        prompt_tokens = (
+            usage.get("inputTokens", 0)
+            + cache_read_tokens
+            + usage.get("cacheWriteInputTokens", 0)
+        )
+
         # Construct final OpenAI format response
         openai_format = {
             "id": f"chatcmpl-{uuid.uuid4()}",
@@ -181,13 +200,10 @@ class ChatCompletions:
                 }
             ],
             "usage": {
-                "completion_tokens": bedrock_response.get("usage", {}).get(
-                    "outputTokens", 0
-                ),
-                "prompt_tokens": bedrock_response.get("usage", {}).get(
-                    "inputTokens", 0
-                ),
-                "total_tokens": bedrock_response.get("usage", {}).get("totalTokens", 0),
+                "completion_tokens": usage.get("outputTokens", 0),
+                "prompt_tokens": prompt_tokens,
+                "total_tokens": usage.get("totalTokens", 0),
+                "prompt_tokens_details": {"cached_tokens": cache_read_tokens},
             },
         }
         return OpenAIResponse(openai_format)
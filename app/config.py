@@ -28,6 +28,23 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    prompt_cache: bool = Field(
+        False,
+        description="Mark stable prompt prefixes for provider prompt caching "
+        "(Bedrock, Claude via OpenRouter)",
+    )
+    response_cache_size: int = Field(
+        0, description="Deterministic (temperature 0) responses to cache, 0 disables"
+    )
+    response_cache_ttl: float = Field(
+        300.0, description="Seconds a cached response stays valid"
+    )
+    requests_per_minute: Optional[int] = Field(
+        None, description="Client-side request rate limit (None for unlimited)"
+    )
+    tokens_per_minute: Optional[int] = Field(
+        None, description="Client-side token rate limit (None for unlimited)"
+    )
 
 
 class ProxySettings(BaseModel):
@@ -66,6 +83,55 @@ class RunflowSettings(BaseModel):
     )
 
 
+class TransportSettings(BaseModel):
+    """Configuration for the HTTP connection pools shared by LLM clients"""
+
+    max_connections: int = Field(
+        100, description="Maximum concurrent connections per endpoint"
+    )
+    max_keepalive_connections: int = Field(
+        20, description="Idle connections kept open per endpoint"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle connection is kept open"
+    )
+    http2: bool = Field(False, description="Use HTTP/2 (requires the h2 package)")
+    warm_up: bool = Field(
+        True, description="Open connections to the LLM endpoints at startup"
+    )
+
+
+class TelemetrySettings(BaseModel):
+    """Configuration for per-call LLM telemetry"""
+
+    buffer_size: int = Field(
+        1000, description="Most recent LLM call records kept in memory"
+    )
+    sink: Optional[str] = Field(
+        None,
+        description="Also append records to this .jsonl or SQLite (.db/.sqlite) file",
+    )
+
+
+class ContextSettings(BaseModel):
+    """Configuration for agent conversation compaction"""
+
+    max_tokens: Optional[int] = Field(
+        None,
+        description="Token budget for the agent's conversation history (None disables compaction)",
+    )
+    max_tool_output_tokens: int = Field(
+        2000, description="Tool outputs longer than this are truncated first"
+    )
+    summary_tokens: int = Field(
+        1000, description="Tokens reserved for the rolling summary message"
+    )
+    summary_llm: str = Field(
+        "summary",
+        description="LLM config used to write summaries (falls back to [llm])",
+    )
+
+
 class BrowserSettings(BaseModel):
     headless: bool = Field(False, description="Whether to run browser in headless mode")
     disable_security: bool = Field(
@@ -167,6 +233,15 @@ class AppConfig(BaseModel):
     run_flow_config: Optional[RunflowSettings] = Field(
         None, description="Run flow configuration"
     )
+    context_config: Optional[ContextSettings] = Field(
+        None, description="Conversation compaction configuration"
+    )
+    transport_config: Optional[TransportSettings] = Field(
+        None, description="LLM HTTP transport configuration"
+    )
+    telemetry_config: Optional[TelemetrySettings] = Field(
+        None, description="LLM call telemetry configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -224,6 +299,11 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "prompt_cache": base_llm.get("prompt_cache", False),
+            "response_cache_size": base_llm.get("response_cache_size", 0),
+            "response_cache_ttl": base_llm.get("response_cache_ttl", 300.0),
+            "requests_per_minute": base_llm.get("requests_per_minute"),
+            "tokens_per_minute": base_llm.get("tokens_per_minute"),
         }
 
         # handle browser config.
@@ -283,6 +363,24 @@ class Config:
             run_flow_settings = RunflowSettings(**run_flow_config)
         else:
             run_flow_settings = RunflowSettings()
+
+        context_config = raw_config.get("context")
+        if context_config:
+            context_settings = ContextSettings(**context_config)
+        else:
+            context_settings = ContextSettings()
+
+        transport_config = raw_config.get("transport")
+        if transport_config:
+            transport_settings = TransportSettings(**transport_config)
+        else:
+            transport_settings = TransportSettings()
+
+        telemetry_config = raw_config.get("telemetry")
+        if telemetry_config:
+            telemetry_settings = TelemetrySettings(**telemetry_config)
+        else:
+            telemetry_settings = TelemetrySettings()
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -296,6 +394,9 @@ class Config:
             "search_config": search_settings,
             "mcp_config": mcp_settings,
             "run_flow_config": run_flow_settings,
+            "context_config": context_settings,
+            "transport_config": transport_settings,
+            "telemetry_config": telemetry_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -326,6 +427,21 @@ class Config:
         """Get the Run Flow configuration"""
         return self._config.run_flow_config
 
+    @property
+    def context_config(self) -> ContextSettings:
+        """Get the conversation compaction configuration"""
+        return self._config.context_config
+
+    @property
+    def transport_config(self) -> TransportSettings:
+        """Get the LLM HTTP transport configuration"""
+        return self._config.transport_config
+
+    @property
+    def telemetry_config(self) -> TelemetrySettings:
+        """Get the LLM call telemetry configuration"""
+        return self._config.telemetry_config
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
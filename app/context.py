@@ -0,0 +1,190 @@
+from typing import List, Optional
+
+from app.config import ContextSettings, config
+from app.llm import LLM
+from app.logger import logger
+from app.prompt.context import SUMMARY_PROMPT
+from app.schema import Memory, Message, Role
+
+
+SUMMARY_PREFIX = "[Summary of the earlier conversation]"
+
+
+def truncate_text(text: str, tokens: int, max_tokens: int) -> str:
+    """Keep the head and tail of a text so that it fits in about max_tokens"""
+    if tokens <= max_tokens:
+        return text
+    keep = max(1, int(len(text) * max_tokens / tokens)) // 2
+    omitted = len(text) - 2 * keep
+    return f"{text[:keep]}\n... [{omitted} characters truncated] ...\n{text[-keep:]}"
+
+
+def group_turns(messages: List[Message]) -> List[List[Message]]:
+    """Split messages into groups that keep tool calls with their tool results"""
+    groups: List[List[Message]] = []
+    for message in messages:
+        if message.role == Role.TOOL and groups:
+            groups[-1].append(message)
+        else:
+            groups.append([message])
+    return groups
+
+
+class ContextCompactor:
+    """Keeps an agent's memory within a token budget.
+
+    Large tool outputs are truncated first. If that is not enough, the oldest
+    turns are replaced by a rolling summary message written by a (cheaper)
+    summary model. A tool call and its results are always kept or summarized
+    together.
+    """
+
+    # Summarizing down to this share of the budget leaves room for the next
+    # few steps, so the summary model is not called on every step
+    TARGET_RATIO = 0.6
+
+    def __init__(
+        self,
+        llm: LLM,
+        settings: Optional[ContextSettings] = None,
+        summary_llm: Optional[LLM] = None,
+    ):
+        self.llm = llm
+        self.settings = settings or config.context_config
+        self._summary_llm = summary_llm
+
+    @property
+    def summary_llm(self) -> LLM:
+        if self._summary_llm is None:
+            self._summary_llm = LLM(config_name=self.settings.summary_llm)
+        return self._summary_llm
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.max_tokens)
+
+    def count(self, messages: List[Message]) -> int:
+        """Token count of messages as the LLM will see them"""
+        return self.llm.count_message_tokens(LLM.format_messages(messages))
+
+    def truncate_tool_outputs(self, messages: List[Message], excess: int) -> int:
+        """Truncate the oldest oversized tool outputs until excess tokens are saved.
+
+        Returns:
+            int: The number of tokens saved
+        """
+        saved = 0
+        for message in messages:
+            if saved >= excess:
+                break
+            if message.role != Role.TOOL or not message.content:
+                continue
+            tokens = self.llm.count_tokens(message.content)
+            if tokens <= self.settings.max_tool_output_tokens:
+                continue
+            message.content = truncate_text(
+                message.content, tokens, self.settings.max_tool_output_tokens
+            )
+            saved += tokens - self.llm.count_tokens(message.content)
+        return saved
+
+    async def compact(self, memory: Memory, reserved_tokens: int = 0) -> bool:
+        """Compact memory in place if it exceeds the budget.
+
+        Args:
+            memory: The agent memory to compact
+            reserved_tokens: Tokens the request needs besides the history
+                (system prompt, tool definitions)
+
+        Returns:
+            bool: True if the memory was changed
+        """
+        if not self.enabled:
+            return False
+        budget = self.settings.max_tokens - reserved_tokens
+        tokens = self.count(memory.messages)
+        if tokens <= budget:
+            return False
+
+        tokens -= self.truncate_tool_outputs(memory.messages, tokens - budget)
+        if tokens <= budget:
+            logger.info(
+                f"🗜️ Truncated tool outputs to fit the context ({tokens} tokens)"
+            )
+            return True
+
+        await self.summarize_older_turns(memory, budget)
+        return True
+
+    async def summarize_older_turns(self, memory: Memory, budget: int) -> None:
+        """Replace the oldest turns with a rolling summary message"""
+        groups = group_turns(memory.messages)
+        previous_summary = ""
+        first = groups[0][0] if groups else None
+        if first and first.content and first.content.startswith(SUMMARY_PREFIX):
+            previous_summary = first.content[len(SUMMARY_PREFIX) :].strip()
+            groups = groups[1:]
+
+        # Keep the newest turns that fit next to the summary
+        keep_budget = int(budget * self.TARGET_RATIO) - self.settings.summary_tokens
+        kept: List[List[Message]] = []
+        kept_tokens = 0
+        for group in reversed(groups):
+            group_tokens = self.count(group)
+            if kept and kept_tokens + group_tokens > keep_budget:
+                break
+            kept.insert(0, group)
+            kept_tokens += group_tokens
+
+        old = [
+            message for group in groups[: len(groups) - len(kept)] for message in group
+        ]
+        if not old:
+            logger.warning(
+                f"⚠️ Latest turn alone exceeds the context budget ({kept_tokens} tokens)"
+            )
+            return
+
+        try:
+            summary = await self.summarize(previous_summary, old)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to summarize earlier conversation: {e}")
+            summary = (
+                f"{previous_summary}\n({len(old)} earlier messages were removed "
+                "without a summary)"
+            ).strip()
+
+        memory.messages = [
+            Message.user_message(f"{SUMMARY_PREFIX}\n{summary}"),
+            *(message for group in kept for message in group),
+        ]
+        logger.info(
+            f"🗜️ Summarized {len(old)} earlier messages "
+            f"({self.count(memory.messages)} tokens now)"
+        )
+
+    async def summarize(self, previous_summary: str, messages: List[Message]) -> str:
+        """Ask the summary model for an updated rolling summary"""
+        max_tokens = self.settings.max_tool_output_tokens
+        lines = []
+        for message in messages:
+            header = message.role
+            if message.name:
+                header += f" ({message.name})"
+            text = message.content or ""
+            text = truncate_text(text, self.llm.count_tokens(text), max_tokens)
+            for tool_call in message.tool_calls or []:
+                text += (
+                    f"\n-> {tool_call.function.name}({tool_call.function.arguments})"
+                )
+            lines.append(f"{header}: {text}")
+
+        prompt = SUMMARY_PROMPT.format(
+            # About 0.75 words per token
+            max_words=int(self.settings.summary_tokens * 0.75),
+            previous_summary=previous_summary or "(none)",
+            transcript="\n\n".join(lines),
+        )
+        return await self.summary_llm.ask(
+            [Message.user_message(prompt)], stream=False, temperature=0
+        )
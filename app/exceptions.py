@@ -11,3 +11,7 @@ class OpenManusError(Exception):
 
 class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
+
+
+class EmptyResponseError(OpenManusError, ValueError):
+    """Exception raised when the LLM returns an empty or invalid response"""
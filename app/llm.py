@@ -1,9 +1,28 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
 import math
-from typing import Dict, List, Optional, Union
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import tiktoken
+import httpx
 from openai import (
+    APIConnectionError,
     APIError,
+    APIStatusError,
     AsyncAzureOpenAI,
     AsyncOpenAI,
     AuthenticationError,
@@ -12,23 +31,39 @@ from openai import (
 )
 from openai.types.chat import ChatCompletion, ChatCompletionMessage
 from tenacity import (
+    RetryCallState,
+    RetryError,
     retry,
-    retry_if_exception_type,
+    retry_if_exception,
     stop_after_attempt,
+    stop_before_delay,
     wait_random_exponential,
 )
 
-from app.bedrock import BedrockClient
 from app.config import LLMSettings, config
-from app.exceptions import TokenLimitExceeded
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
 from app.logger import logger  # Assuming a logger is set up in your app
+from app.rate_limit import get_rate_limiter, parse_retry_after
 from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
     TOOL_CHOICE_VALUES,
+    Function,
     Message,
+    StreamDelta,
+    StreamStats,
+    ToolCall,
     ToolChoice,
 )
+from app.telemetry import (
+    LLMCallRecord,
+    annotate_call,
+    current_call,
+    new_call_record,
+    telemetry,
+    track_llm_call,
+)
+from app.transport import get_http_client
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -41,6 +76,28 @@ MULTIMODAL_MODELS = [
     "claude-3-haiku-20240307",
 ]
 
+# Marks the end of a cacheable prompt prefix (Anthropic prompt caching)
+CACHE_CONTROL = {"type": "ephemeral"}
+# OpenAI-compatible endpoints that pass cache_control content parts through to
+# Claude. Anthropic's own OpenAI-compatible endpoint rejects them.
+ANTHROPIC_CACHE_HOSTS = ("openrouter.ai",)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model: str):
+    """Load the tiktoken encoding for a model, once per process
+
+    tiktoken is imported here rather than at module load, and LLM instances
+    using the same model share the encoding.
+    """
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # If the model is not in tiktoken's presets, use cl100k_base as default
+        return tiktoken.get_encoding("cl100k_base")
+
 
 class TokenCounter:
     # Token constants
@@ -54,12 +111,61 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
-    def __init__(self, tokenizer):
-        self.tokenizer = tokenizer
+    # Text cache constants: shorter texts are cheaper to encode than to look up
+    CACHE_MIN_CHARS = 256
+    CACHE_MAX_CHARS = 8_000_000
+
+    def __init__(
+        self,
+        tokenizer=None,
+        cache_max_chars: int = CACHE_MAX_CHARS,
+        model: Optional[str] = None,
+    ):
+        # Without a tokenizer, the model's encoding is loaded on first use
+        self._tokenizer = tokenizer
+        self.model = model
+        self.cache_max_chars = cache_max_chars
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._cached_chars = 0
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(self.model or "")
+        return self._tokenizer
 
     def count_text(self, text: str) -> int:
-        """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        """
+        Calculate tokens for a text string
+
+        Counts for long texts are kept in an LRU cache keyed by the text itself,
+        so each tool observation in a growing history is encoded once. Lookups
+        are cheap because str objects cache their hash and the formatted
+        message dicts share the content strings of the Message objects.
+        """
+        if not text:
+            return 0
+        if len(text) < self.CACHE_MIN_CHARS or self.cache_max_chars <= 0:
+            return len(self.tokenizer.encode(text))
+
+        tokens = self._cache.get(text)
+        if tokens is not None:
+            self._cache.move_to_end(text)
+            return tokens
+
+        tokens = len(self.tokenizer.encode(text))
+        if len(text) <= self.cache_max_chars:
+            self._cache[text] = tokens
+            self._cached_chars += len(text)
+            while self._cached_chars > self.cache_max_chars:
+                evicted, _ = self._cache.popitem(last=False)
+                self._cached_chars -= len(evicted)
+        return tokens
+
+    def clear_cache(self) -> None:
+        """Drop all cached text token counts"""
+        self._cache.clear()
+        self._cached_chars = 0
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -171,6 +277,162 @@ class TokenCounter:
         return total_tokens
 
 
+class ResponseCache:
+    """Bounded LRU cache of LLM responses with a time-to-live"""
+
+    def __init__(self, max_size: int = 0, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_size <= 0 or value is None:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+async def print_stream(stream: AsyncIterator[StreamDelta]) -> str:
+    """Print streamed content to stdout as it arrives and return the full text"""
+    collected = []
+    async for delta in stream:
+        if delta.content:
+            collected.append(delta.content)
+            print(delta.content, end="", flush=True)
+    print()  # Newline after streaming
+    return "".join(collected)
+
+
+async def _one(item: Any) -> AsyncIterator[Any]:
+    yield item
+
+
+def _copy_response(value: Any) -> Any:
+    # Callers sharing one response must not see each other's changes
+    return value.model_copy(deep=True) if hasattr(value, "model_copy") else value
+
+
+def coalesce_requests(method: Callable[..., Awaitable[Any]]):
+    """Share identical deterministic requests and serve repeats from the cache
+
+    Adds a ``use_cache`` keyword (default True) to the wrapped method. When
+    the request is deterministic (temperature 0), concurrent identical calls
+    share one upstream call and, if the response cache is enabled, later
+    identical calls are answered from it.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self: "LLM", *args, use_cache: bool = True, **kwargs):
+        key = None
+        if use_cache:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = self.request_key(method.__name__, bound.arguments)
+        if key is None:
+            return await method(self, *args, **kwargs)
+        return await self._coalesce(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+# Retry policy for LLM calls: attempts, total time per call, longest single wait
+RETRY_ATTEMPTS = 6
+RETRY_MAX_SECONDS = 120.0
+RETRY_MAX_WAIT = 60.0
+# HTTP statuses worth retrying (timeout, conflict, rate limit), plus all 5xx
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_backoff = wait_random_exponential(min=1, max=RETRY_MAX_WAIT)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    if isinstance(exc, APIStatusError):
+        return exc.status_code
+    # botocore ClientError (Bedrock)
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether a failed LLM call may succeed if retried
+
+    Timeouts, connection errors, empty responses, 429s and 5xx responses are
+    transient. Token limit, authentication, bad request and other client
+    errors fail fast.
+    """
+    if isinstance(
+        exc,
+        (
+            APIConnectionError,  # Includes APITimeoutError
+            EmptyResponseError,
+            asyncio.TimeoutError,
+            httpx.TransportError,
+        ),
+    ):
+        return True
+    status_code = _status_code(exc)
+    if status_code is None:
+        return False
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+
+
+def wait_for_retry(retry_state: RetryCallState) -> float:
+    """Wait as long as the response's Retry-After asks, else back off randomly"""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if isinstance(response, httpx.Response):
+        retry_after = parse_retry_after(response.headers)
+        if retry_after is not None:
+            return min(retry_after, RETRY_MAX_WAIT)
+    return _backoff(retry_state)
+
+
+def record_retry(retry_state: RetryCallState) -> None:
+    """Count a retry and the time it costs on the LLM instance"""
+    llm = retry_state.args[0]
+    # Failed attempts and waits of this call so far, including the coming wait
+    lost = retry_state.seconds_since_start + retry_state.next_action.sleep
+    counted = getattr(retry_state, "lost_seconds", 0.0)
+    retry_state.lost_seconds = lost
+    llm.retry_count += 1
+    llm.retry_seconds += lost - counted
+    record = current_call()
+    if record:
+        record.retries += 1
+        record.retry_seconds += lost - counted
+    logger.warning(
+        f"LLM call failed ({retry_state.outcome.exception()!r}), retry "
+        f"{retry_state.attempt_number} in {retry_state.next_action.sleep:.1f}s"
+    )
+
+
+# Shared by the ask methods; exhausting the retries raises tenacity.RetryError
+retry_transient = retry(
+    wait=wait_for_retry,
+    stop=stop_after_attempt(RETRY_ATTEMPTS) | stop_before_delay(RETRY_MAX_SECONDS),
+    retry=retry_if_exception(is_transient_error),
+    before_sleep=record_retry,
+)
+
+
 class LLM:
     _instances: Dict[str, "LLM"] = {}
 
@@ -196,56 +458,257 @@ class LLM:
             self.api_key = llm_config.api_key
             self.api_version = llm_config.api_version
             self.base_url = llm_config.base_url
+            self.prompt_cache = getattr(llm_config, "prompt_cache", False)
+            self.response_cache = ResponseCache(
+                getattr(llm_config, "response_cache_size", 0),
+                getattr(llm_config, "response_cache_ttl", 300.0),
+            )
+            self._inflight: Dict[str, asyncio.Future] = {}
+            # Shared with every LLM on the same endpoint, fed by the HTTP client
+            self.rate_limiter = get_rate_limiter(
+                self.base_url,
+                self.api_key,
+                getattr(llm_config, "requests_per_minute", None),
+                getattr(llm_config, "tokens_per_minute", None),
+            )
 
             # Add token counting related attributes
             self.total_input_tokens = 0
             self.total_completion_tokens = 0
+            self.total_cached_tokens = 0
+            self.retry_count = 0
+            self.retry_seconds = 0.0
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
                 else None
             )
 
-            # Initialize tokenizer
-            try:
-                self.tokenizer = tiktoken.encoding_for_model(self.model)
-            except KeyError:
-                # If the model is not in tiktoken's presets, use cl100k_base as default
-                self.tokenizer = tiktoken.get_encoding("cl100k_base")
-
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
-                )
-            elif self.api_type == "aws":
-                self.client = BedrockClient()
-            else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            # The tokenizer is loaded on the first token count
+            self.token_counter = TokenCounter(model=self.model)
+
+            self.client = self._create_client()
+
+    def _create_client(self):
+        if self.api_type == "azure":
+            return AsyncAzureOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                api_version=self.api_version,
+                http_client=get_http_client(self.base_url, self.api_key),
+            )
+        if self.api_type == "aws":
+            # boto3 is only imported when Bedrock is configured
+            from app.bedrock import BedrockClient
+
+            return BedrockClient()
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=get_http_client(self.base_url, self.api_key),
+        )
+
+    @property
+    def client(self):
+        """The API client, rebuilt when its shared HTTP client was closed
 
-            self.token_counter = TokenCounter(self.tokenizer)
+        Closing any client on an endpoint (e.g. ``AsyncOpenAI.close()``) closes
+        the pool shared with every other LLM instance on it.
+        """
+        is_closed = getattr(self._client, "is_closed", None)
+        if callable(is_closed) and is_closed() is True:
+            self._client = self._create_client()
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    @property
+    def tokenizer(self):
+        return self.token_counter.tokenizer
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
-        if not text:
-            return 0
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count_text(text)
 
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
-    def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
-        """Update token counts"""
+    def update_token_count(
+        self,
+        input_tokens: int,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        record: Optional[LLMCallRecord] = None,
+    ) -> None:
+        """Update token counts
+
+        Args:
+            input_tokens: Prompt tokens, including those read from the prompt cache
+            completion_tokens: Generated tokens
+            cached_tokens: Prompt tokens served from the provider's prompt cache
+            record: Telemetry record of the call, defaults to the current call
+        """
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        self.total_cached_tokens += cached_tokens
+        record = record or current_call()
+        if record:
+            record.add_usage(input_tokens, completion_tokens, cached_tokens)
         logger.info(
-            f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
-            f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
+            f"Token usage: Input={input_tokens}, Cached={cached_tokens}, Completion={completion_tokens}, "
+            f"Cumulative Input={self.total_input_tokens}, Cumulative Cached={self.total_cached_tokens}, "
+            f"Cumulative Completion={self.total_completion_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
 
+    def request_key(self, method: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """Key identifying a deterministic request, None if it is not deterministic"""
+        temperature = arguments.get("temperature")
+        if temperature is None:
+            temperature = self.temperature
+        if self.model in REASONING_MODELS or temperature != 0:
+            return None
+
+        payload = {
+            name: value
+            for name, value in arguments.items()
+            if name not in ("self", "timeout")
+        }
+        for name in ("messages", "system_msgs"):
+            if payload.get(name):
+                payload[name] = [
+                    message.to_dict() if isinstance(message, Message) else message
+                    for message in payload[name]
+                ]
+        payload.update(method=method, model=self.model, max_tokens=self.max_tokens)
+        text = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    async def _coalesce(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info("Serving LLM response from cache")
+            return _copy_response(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return _copy_response(await asyncio.shield(inflight))
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The request we were sharing was cancelled, send our own
+                return await self._coalesce(key, call)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here if nobody was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        self.response_cache.put(key, result)
+        return result
+
+    def clear_response_cache(self) -> None:
+        """Drop all cached responses"""
+        self.response_cache.clear()
+
+    @staticmethod
+    def cached_tokens(usage) -> int:
+        """Prompt tokens served from cache, as reported in a response's usage"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details else None
+        if cached is None:
+            # Anthropic-style usage passed through by compatible gateways
+            cached = getattr(usage, "cache_read_input_tokens", None)
+        return cached or 0
+
+    def _cache_style(self) -> Optional[str]:
+        """How this endpoint takes prompt cache markers, None if it takes none"""
+        if not self.prompt_cache:
+            return None
+        if self.api_type == "aws":
+            return "bedrock"
+        base_url = (self.base_url or "").lower()
+        if "claude" in self.model.lower() and any(
+            host in base_url for host in ANTHROPIC_CACHE_HOSTS
+        ):
+            return "anthropic"
+        # OpenAI and most compatible providers cache long prompt prefixes
+        # automatically, keeping the prefix stable is all that is needed
+        return None
+
+    @staticmethod
+    def _mark_content(message: dict) -> dict:
+        """Copy of a message with cache_control on its last content part"""
+        content = message.get("content")
+        if not content or not isinstance(content, (str, list)):
+            return message
+        if isinstance(content, str):
+            parts = [{"type": "text", "text": content}]
+        else:
+            parts = [
+                dict(part) if isinstance(part, dict) else {"type": "text", "text": part}
+                for part in content
+            ]
+        parts[-1]["cache_control"] = CACHE_CONTROL
+        return {**message, "content": parts}
+
+    def apply_prompt_cache(
+        self, messages: List[dict], tools: Optional[List[dict]] = None
+    ) -> Tuple[List[dict], Optional[List[dict]]]:
+        """Order tools stably and mark cacheable prompt prefixes
+
+        Tools are sorted by name so the schema prefix does not depend on the
+        order tools were registered in. For Claude models behind an endpoint
+        that accepts cache_control (see ANTHROPIC_CACHE_HOSTS), cache
+        breakpoints go on the tool definitions, the last system message and the latest
+        message, so each request reads the previous request's prefix from the
+        cache. Bedrock gets the same breakpoints as message-level markers,
+        which BedrockClient turns into cachePoint blocks.
+
+        Returns:
+            Tuple: Messages and tools to send (copies where changed)
+        """
+        if tools:
+            tools = sorted(
+                tools, key=lambda tool: tool.get("function", {}).get("name", "")
+            )
+        style = self._cache_style()
+        if style is None:
+            return messages, tools
+
+        if tools:
+            tools = tools[:-1] + [{**tools[-1], "cache_control": CACHE_CONTROL}]
+
+        last_system = max(
+            (i for i, message in enumerate(messages) if message["role"] == "system"),
+            default=None,
+        )
+        marked = {len(messages) - 1} | (
+            {last_system} if last_system is not None else set()
+        )
+        messages = list(messages)
+        for i in marked:
+            if i < 0:
+                continue
+            if style == "bedrock":
+                messages[i] = {**messages[i], "cache_control": CACHE_CONTROL}
+            else:
+                messages[i] = self._mark_content(messages[i])
+        return messages, tools
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
@@ -351,13 +814,9 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @track_llm_call
+    @retry_transient
+    @coalesce_requests
     async def ask(
         self,
         messages: List[Union[dict, Message]],
@@ -373,6 +832,8 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            use_cache (bool): Share/cache the response if the request is
+                deterministic (see coalesce_requests)
 
         Returns:
             str: The generated response
@@ -403,6 +864,7 @@ class LLM:
                 # Raise a special exception that won't be retried
                 raise TokenLimitExceeded(error_message)
 
+            messages, _ = self.apply_prompt_cache(messages)
             params = {
                 "model": self.model,
                 "messages": messages,
@@ -423,39 +885,24 @@ class LLM:
                 )
 
                 if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
+                    raise EmptyResponseError("Empty or invalid response from LLM")
 
                 # Update token counts
                 self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    self.cached_tokens(response.usage),
                 )
+                annotate_call(stop_reason=response.choices[0].finish_reason)
 
                 return response.choices[0].message.content
 
-            # Streaming request, For streaming, update estimated token count before making the request
-            self.update_token_count(input_tokens)
-
-            response = await self.client.chat.completions.create(**params, stream=True)
-
-            collected_messages = []
-            completion_text = ""
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                completion_text += chunk_message
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
+            # Streaming request, printed as the deltas arrive
+            full_response = (
+                await print_stream(self._stream(params, input_tokens))
+            ).strip()
             if not full_response:
-                raise ValueError("Empty response from streaming LLM")
-
-            # estimate completion tokens for streaming response
-            completion_tokens = self.count_tokens(completion_text)
-            logger.info(
-                f"Estimated completion tokens for streaming response: {completion_tokens}"
-            )
-            self.total_completion_tokens += completion_tokens
+                raise EmptyResponseError("Empty response from streaming LLM")
 
             return full_response
 
@@ -478,13 +925,8 @@ class LLM:
             logger.exception(f"Unexpected error in ask")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @track_llm_call
+    @retry_transient
     async def ask_with_images(
         self,
         messages: List[Union[dict, Message]],
@@ -573,6 +1015,7 @@ class LLM:
                 raise TokenLimitExceeded(self.get_limit_error_message(input_tokens))
 
             # Set up API parameters
+            all_messages, _ = self.apply_prompt_cache(all_messages)
             params = {
                 "model": self.model,
                 "messages": all_messages,
@@ -593,9 +1036,13 @@ class LLM:
                 response = await self.client.chat.completions.create(**params)
 
                 if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
+                    raise EmptyResponseError("Empty or invalid response from LLM")
 
-                self.update_token_count(response.usage.prompt_tokens)
+                self.update_token_count(
+                    response.usage.prompt_tokens,
+                    cached_tokens=self.cached_tokens(response.usage),
+                )
+                annotate_call(stop_reason=response.choices[0].finish_reason)
                 return response.choices[0].message.content
 
             # Handle streaming request
@@ -612,7 +1059,7 @@ class LLM:
             full_response = "".join(collected_messages).strip()
 
             if not full_response:
-                raise ValueError("Empty response from streaming LLM")
+                raise EmptyResponseError("Empty response from streaming LLM")
 
             return full_response
 
@@ -634,13 +1081,9 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @track_llm_call
+    @retry_transient
+    @coalesce_requests
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -662,6 +1105,8 @@ class LLM:
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
             **kwargs: Additional completion arguments
+            use_cache: Share/cache the response if the request is deterministic
+                (see coalesce_requests)
 
         Returns:
             ChatCompletionMessage: The model's response
@@ -711,6 +1156,7 @@ class LLM:
                         raise ValueError("Each tool must be a dict with 'type' field")
 
             # Set up the completion request
+            messages, tools = self.apply_prompt_cache(messages, tools)
             params = {
                 "model": self.model,
                 "messages": messages,
@@ -741,8 +1187,11 @@ class LLM:
 
             # Update token counts
             self.update_token_count(
-                response.usage.prompt_tokens, response.usage.completion_tokens
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+                self.cached_tokens(response.usage),
             )
+            annotate_call(stop_reason=response.choices[0].finish_reason)
 
             return response.choices[0].message
 
@@ -764,3 +1213,218 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def ask_batch(
+        self,
+        message_lists: List[List[Union[dict, Message]]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> List[Union[str, Exception]]:
+        """
+        Send several independent prompts to the LLM concurrently.
+
+        Requests run at most max_concurrency at a time; the endpoint's rate
+        limiter (app.rate_limit) spaces them out within the configured and
+        provider-reported request/token limits.
+
+        Args:
+            message_lists: One list of conversation messages per request
+            system_msgs: Optional system messages to prepend to every request
+            max_concurrency: Maximum number of requests in flight
+            **kwargs: Additional arguments for ask (temperature, use_cache)
+
+        Returns:
+            List[Union[str, Exception]]: The response for each request in
+                input order, or the exception that request failed with
+
+        Raises:
+            ValueError: If stream=True is passed; batches are never streamed
+        """
+        if kwargs.pop("stream", False):
+            raise ValueError("ask_batch does not stream, use ask_stream per request")
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(messages: List[Union[dict, Message]]) -> str:
+            async with semaphore:
+                return await self.ask(
+                    messages, system_msgs=system_msgs, stream=False, **kwargs
+                )
+
+        results = await asyncio.gather(
+            *(run(messages) for messages in message_lists), return_exceptions=True
+        )
+        # Report the error of the last attempt rather than tenacity's wrapper
+        return [
+            result.last_attempt.exception() or result
+            if isinstance(result, RetryError)
+            else result
+            for result in results
+        ]
+
+    async def ask_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        tools: Optional[List[dict]] = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: Optional[float] = None,
+        timeout: int = 300,
+        **kwargs,
+    ) -> AsyncIterator[StreamDelta]:
+        """
+        Stream the LLM response as it is generated.
+
+        Args:
+            messages: List of conversation messages
+            system_msgs: Optional system messages to prepend
+            tools: Optional tools the model may call
+            tool_choice: Tool choice strategy (only used with tools)
+            temperature: Sampling temperature for the response
+            timeout: Request timeout in seconds
+            **kwargs: Additional completion arguments
+
+        Yields:
+            StreamDelta: Content and tool-call argument deltas, then a final
+                delta with the finish reason, assembled tool calls and timing
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tool_choice or messages are invalid
+            OpenAIError: If the API call fails (not retried once streaming)
+        """
+        if tools and tool_choice not in TOOL_CHOICE_VALUES:
+            raise ValueError(f"Invalid tool_choice: {tool_choice}")
+
+        supports_images = self.model in MULTIMODAL_MODELS
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        input_tokens = self.count_message_tokens(messages)
+        if tools:
+            input_tokens += sum(self.count_tokens(str(tool)) for tool in tools)
+        if not self.check_token_limit(input_tokens):
+            raise TokenLimitExceeded(self.get_limit_error_message(input_tokens))
+
+        messages, tools = self.apply_prompt_cache(messages, tools)
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "timeout": timeout,
+            **kwargs,
+        }
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = tool_choice
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+
+        record = new_call_record(self.model, "ask_stream")
+        start = time.perf_counter()
+        try:
+            async for delta in self._stream(params, input_tokens, record):
+                yield delta
+        except BaseException as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            telemetry.record(record)
+
+    async def _stream(
+        self,
+        params: dict,
+        input_tokens: int,
+        record: Optional[LLMCallRecord] = None,
+    ) -> AsyncIterator[StreamDelta]:
+        """Send a streaming request and translate its chunks into StreamDeltas"""
+        record = record or current_call()
+        # For streaming, update estimated token count before making the request
+        self.update_token_count(input_tokens, record=record)
+
+        start = time.perf_counter()
+        first_token_at = None
+        finish_reason = None
+        generated: List[str] = []
+        tool_calls: Dict[int, Dict[str, str]] = {}
+
+        response = await self.client.chat.completions.create(**params, stream=True)
+        # Clients without streaming support (Bedrock) answer in one piece
+        chunks = response if hasattr(response, "__aiter__") else _one(response)
+
+        async for chunk in chunks:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            delta = getattr(choice, "delta", None) or getattr(choice, "message", None)
+            if delta is None:
+                continue
+
+            if delta.content:
+                first_token_at = first_token_at or time.perf_counter()
+                generated.append(delta.content)
+                yield StreamDelta(content=delta.content)
+
+            for index, tool_call in enumerate(delta.tool_calls or []):
+                index = getattr(tool_call, "index", index)
+                call = tool_calls.setdefault(
+                    index, {"id": "", "name": "", "arguments": ""}
+                )
+                function = tool_call.function
+                call["id"] = tool_call.id or call["id"]
+                call["name"] += (function.name or "") if function else ""
+                arguments = (function.arguments or "") if function else ""
+                call["arguments"] += arguments
+                first_token_at = first_token_at or time.perf_counter()
+                generated.append(arguments)
+                yield StreamDelta(
+                    tool_call_index=index,
+                    tool_call_id=tool_call.id,
+                    tool_name=function.name if function else None,
+                    tool_arguments=arguments,
+                )
+
+        end = time.perf_counter()
+        # Estimate completion tokens for streaming response
+        completion_tokens = self.count_tokens("".join(generated))
+        self.total_completion_tokens += completion_tokens
+        stats = StreamStats(
+            time_to_first_token=first_token_at - start if first_token_at else None,
+            duration=end - start,
+            completion_tokens=completion_tokens,
+            tokens_per_second=(
+                completion_tokens / (end - first_token_at)
+                if first_token_at and end > first_token_at
+                else None
+            ),
+        )
+        logger.info(
+            f"Streamed {completion_tokens} tokens (estimated), "
+            f"first token after {stats.time_to_first_token or 0:.2f}s, "
+            f"{stats.tokens_per_second or 0:.1f} tokens/s"
+        )
+        if record:
+            record.add_usage(0, completion_tokens)
+            record.time_to_first_token = stats.time_to_first_token
+            record.stop_reason = finish_reason or "stop"
+        yield StreamDelta(
+            finish_reason=finish_reason or "stop",
+            tool_calls=[
+                ToolCall(
+                    id=call["id"],
+                    function=Function(name=call["name"], arguments=call["arguments"]),
+                )
+                for _, call in sorted(tool_calls.items())
+            ]
+            or None,
+            stats=stats,
+        )
@@ -0,0 +1,17 @@
+SUMMARY_PROMPT = """
+You are compressing the earlier part of an AI agent's working session so the agent can keep going with less context.
+
+Write a concise summary that preserves:
+1. The user's original request and any constraints or preferences they stated
+2. Key facts, results, file paths, URLs and identifiers discovered so far
+3. What has been done, what failed and why
+4. Open questions and the next steps the agent was about to take
+
+Do not add anything that is not in the transcript. Keep it under {max_words} words.
+
+Previous summary (may be empty):
+{previous_summary}
+
+Transcript to summarize:
+{transcript}
+"""
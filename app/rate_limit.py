@@ -0,0 +1,272 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, MutableMapping, Optional, Tuple
+
+import httpx
+
+from app.logger import logger
+
+
+# Window used for the per-minute limits
+WINDOW_SECONDS = 60.0
+# Pause after a 429 that carries no retry hint
+DEFAULT_RETRY_AFTER = 1.0
+# Completion tokens charged up front when max_tokens allows more; corrected
+# from the response's usage once it arrives
+EXPECTED_COMPLETION_TOKENS = 500
+# Request extension that exempts a request (e.g. a connection warm-up) from
+# the limiter: ``client.head(url, extensions={SKIP_RATE_LIMIT: True})``
+SKIP_RATE_LIMIT = "skip_rate_limit"
+# Request extension holding the request's entry in its limiter's window
+_WINDOW_ENTRY = "rate_limit_entry"
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit reset such as "1s", "6m0s", "20ms" or "0.5" into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to a response's retry-after(-ms) header"""
+    retry_after_ms = parse_duration(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    return parse_duration(headers.get("retry-after"))
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Client-side requests/tokens-per-minute limiter for one LLM endpoint
+
+    Requests wait in ``acquire`` while the configured per-minute limits are
+    used up, while the provider's ``x-ratelimit-remaining-*`` headers say the
+    quota is exhausted, or after a 429 until its ``retry-after`` has passed.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # [send time, tokens] per request in the last minute; tokens are
+        # corrected in place once the response reports its usage
+        self._sent: Deque[List[float]] = deque()
+        self._blocked_until = 0.0
+        self._remaining_requests: Optional[int] = None
+        self._remaining_tokens: Optional[int] = None
+        self._requests_reset_at = 0.0
+        self._tokens_reset_at = 0.0
+        # Queues waiters in order; an asyncio.Lock only works on one event
+        # loop, so each loop using the limiter gets its own
+        self._loop_locks: MutableMapping[
+            asyncio.AbstractEventLoop, asyncio.Lock
+        ] = weakref.WeakKeyDictionary()
+        # Guards the state shared by the loops (and threads) using the limiter
+        self._state_lock = threading.Lock()
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            lock = self._loop_locks.get(loop)
+            if lock is None:
+                lock = self._loop_locks[loop] = asyncio.Lock()
+        return lock
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        while self._sent and self._sent[0][0] <= now - WINDOW_SECONDS:
+            self._sent.popleft()
+
+        waits = [self._blocked_until - now]
+        if (
+            self._remaining_requests is not None
+            and self._remaining_requests <= 0
+            and self._requests_reset_at > now
+        ):
+            waits.append(self._requests_reset_at - now)
+        if (
+            self._remaining_tokens is not None
+            and self._remaining_tokens < tokens
+            and self._tokens_reset_at > now
+        ):
+            waits.append(self._tokens_reset_at - now)
+        if self._sent:
+            window_end = self._sent[0][0] + WINDOW_SECONDS - now
+            if self.requests_per_minute and len(self._sent) >= self.requests_per_minute:
+                waits.append(window_end)
+            if self.tokens_per_minute and (
+                sum(sent for _, sent in self._sent) + tokens > self.tokens_per_minute
+            ):
+                waits.append(window_end)
+        return max(waits)
+
+    async def acquire(self, tokens: int = 0) -> List[float]:
+        """Wait until a request of about ``tokens`` tokens may be sent
+
+        Returns:
+            List[float]: The request's [send time, tokens] window entry, for
+                ``correct`` once the actual usage is known
+        """
+        async with self._loop_lock():
+            while True:
+                with self._state_lock:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now)
+                    if wait <= 0:
+                        entry = [now, tokens]
+                        self._sent.append(entry)
+                        # Spend the reported quota until the next response updates it
+                        if self._remaining_requests is not None:
+                            self._remaining_requests -= 1
+                        if self._remaining_tokens is not None:
+                            self._remaining_tokens -= tokens
+                        return entry
+                logger.info(f"Rate limit reached, waiting {wait:.2f}s")
+                await asyncio.sleep(wait)
+
+    def correct(self, entry: List[float], tokens: int) -> None:
+        """Replace a request's estimated tokens with its actual usage"""
+        with self._state_lock:
+            entry[1] = tokens
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update the limits from a response's rate-limit headers"""
+        with self._state_lock:
+            self._observe(status_code, headers)
+
+    def _observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        remaining_requests = _int_header(headers, "x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            self._remaining_requests = remaining_requests
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            self._requests_reset_at = now + (reset or 0.0)
+        remaining_tokens = _int_header(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self._remaining_tokens = remaining_tokens
+            reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            self._tokens_reset_at = now + (reset or 0.0)
+
+        if status_code == 429:
+            retry_after = parse_retry_after(headers)
+            if retry_after is None:
+                retry_after = max(
+                    self._requests_reset_at - now,
+                    self._tokens_reset_at - now,
+                    DEFAULT_RETRY_AFTER,
+                )
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.warning(f"Rate limited by the provider, pausing {retry_after:.2f}s")
+
+
+# (base_url, api_key) -> limiter shared by every LLM instance using it
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    base_url: str,
+    api_key: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> RateLimiter:
+    """Get the process-wide limiter for an LLM endpoint, setting any given limits"""
+    key = (base_url, api_key)
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter()
+    if requests_per_minute:
+        limiter.requests_per_minute = requests_per_minute
+    if tokens_per_minute:
+        limiter.tokens_per_minute = tokens_per_minute
+    return limiter
+
+
+def _json_body(request: httpx.Request) -> Dict[str, Any]:
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """Rough token cost of a completion request: prompt (about 4 bytes per
+    token) plus the expected completion, capped by its max_tokens"""
+    body = _json_body(request)
+    if not body:
+        return 0
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+    completion = EXPECTED_COMPLETION_TOKENS
+    if max_tokens:
+        completion = min(completion, int(max_tokens))
+    return len(request.content) // 4 + completion
+
+
+async def response_tokens(response: httpx.Response) -> Optional[int]:
+    """Total tokens a completion response reports in its usage, if any
+
+    Streamed responses are not read here; their estimate stands.
+    """
+    if response.status_code >= 400 or _json_body(response.request).get("stream"):
+        return None
+    if "json" not in response.headers.get("content-type", ""):
+        return None
+    try:
+        await response.aread()
+        usage = response.json().get("usage") or {}
+    except (ValueError, AttributeError, httpx.HTTPError):
+        return None
+    total = usage.get("total_tokens")
+    if total is None and "prompt_tokens" in usage:
+        total = usage["prompt_tokens"] + usage.get("completion_tokens", 0)
+    return total
+
+
+def rate_limit_hooks(base_url: str, api_key: str) -> Dict[str, list]:
+    """httpx event hooks that run every request to the endpoint through its limiter"""
+
+    async def on_request(request: httpx.Request) -> None:
+        if request.extensions.get(SKIP_RATE_LIMIT):
+            return
+        request.extensions[_WINDOW_ENTRY] = await get_rate_limiter(
+            base_url, api_key
+        ).acquire(estimate_request_tokens(request))
+
+    async def on_response(response: httpx.Response) -> None:
+        if response.request.extensions.get(SKIP_RATE_LIMIT):
+            return
+        limiter = get_rate_limiter(base_url, api_key)
+        limiter.observe(response.status_code, response.headers)
+        entry = response.request.extensions.get(_WINDOW_ENTRY)
+        if entry is not None:
+            tokens = await response_tokens(response)
+            if tokens is not None:
+                limiter.correct(entry, tokens)
+
+    return {"request": [on_request], "response": [on_response]}
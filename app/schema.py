@@ -51,6 +51,37 @@ class ToolCall(BaseModel):
     function: Function
 
 
+class StreamStats(BaseModel):
+    """Timing of a streamed LLM response"""
+
+    time_to_first_token: Optional[float] = Field(
+        default=None, description="Seconds until the first content or tool delta"
+    )
+    duration: float = Field(default=0.0, description="Seconds for the whole stream")
+    completion_tokens: int = Field(default=0, description="Estimated output tokens")
+    tokens_per_second: Optional[float] = Field(
+        default=None, description="Output tokens per second after the first token"
+    )
+
+
+class StreamDelta(BaseModel):
+    """One increment of a streamed LLM response
+
+    Content and tool-call argument deltas arrive as they are generated. The
+    last delta has ``finish_reason`` and ``stats`` set and carries the
+    assembled ``tool_calls``.
+    """
+
+    content: Optional[str] = None
+    tool_call_index: Optional[int] = None
+    tool_call_id: Optional[str] = None
+    tool_name: Optional[str] = None
+    tool_arguments: Optional[str] = None
+    finish_reason: Optional[str] = None
+    tool_calls: Optional[List[ToolCall]] = None
+    stats: Optional[StreamStats] = None
+
+
 class Message(BaseModel):
     """Represents a chat message in the conversation"""
 
@@ -165,14 +196,21 @@ class Memory(BaseModel):
         self.messages.append(message)
         # Optional: Implement message limit
         if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+            self._trim()
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
         self.messages.extend(messages)
         # Optional: Implement message limit
         if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+            self._trim()
+
+    def _trim(self) -> None:
+        """Keep the latest max_messages, without orphaned tool results at the start"""
+        messages = self.messages[-self.max_messages :]
+        while messages and messages[0].role == Role.TOOL:
+            messages = messages[1:]
+        self.messages = messages
 
     def clear(self) -> None:
         """Clear all messages"""
@@ -0,0 +1,229 @@
+import functools
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from pydantic import BaseModel, Field
+
+from app.config import config
+from app.logger import logger
+
+
+class LLMCallRecord(BaseModel):
+    """Usage and timing of one LLM call, retries included"""
+
+    timestamp: datetime = Field(default_factory=datetime.now)
+    model: str
+    method: str
+    agent: Optional[str] = None
+    step: Optional[int] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    time_to_first_token: Optional[float] = None
+    latency: float = 0.0
+    retries: int = 0
+    retry_seconds: float = 0.0
+    stop_reason: Optional[str] = None
+    error: Optional[str] = None
+
+    def add_usage(
+        self, prompt_tokens: int, completion_tokens: int = 0, cached_tokens: int = 0
+    ) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+
+
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+SQLITE_COLUMNS = list(LLMCallRecord.model_fields)
+
+
+class Telemetry:
+    """In-memory ring buffer of LLM call records with an optional file sink
+
+    The sink is a JSONL file, or a SQLite database (table ``llm_calls``) when
+    its suffix is .db, .sqlite or .sqlite3.
+    """
+
+    def __init__(self, buffer_size: int = 1000, sink: Optional[str] = None):
+        self.records: Deque[LLMCallRecord] = deque(maxlen=buffer_size)
+        self.sink = Path(sink) if sink else None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def record(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self.sink:
+                try:
+                    self._write(record)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Failed to write LLM telemetry to {self.sink}: {e}")
+
+    def _write(self, record: LLMCallRecord) -> None:
+        self.sink.parent.mkdir(parents=True, exist_ok=True)
+        if self.sink.suffix not in SQLITE_SUFFIXES:
+            with self.sink.open("a", encoding="utf-8") as f:
+                f.write(record.model_dump_json() + "\n")
+            return
+        if self._db is None:
+            self._db = sqlite3.connect(self.sink, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS llm_calls ({', '.join(SQLITE_COLUMNS)})"
+            )
+        row = record.model_dump(mode="json")
+        self._db.execute(
+            f"INSERT INTO llm_calls ({', '.join(SQLITE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SQLITE_COLUMNS))})",
+            [row[column] for column in SQLITE_COLUMNS],
+        )
+        self._db.commit()
+
+    def summary(self, by: Sequence[str] = ("agent", "step")) -> List[Dict[str, Any]]:
+        """Aggregate the buffered records, most total latency first
+
+        Args:
+            by: Record fields to group by, e.g. ("agent",) or ("model",)
+
+        Returns:
+            List[Dict[str, Any]]: One row per group with the group fields,
+                calls, errors, retries, tokens and latency totals
+        """
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            key = tuple(getattr(record, field) for field in by)
+            row = groups.setdefault(
+                key,
+                {
+                    **dict(zip(by, key)),
+                    "calls": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_tokens": 0,
+                    "latency": 0.0,
+                    "max_latency": 0.0,
+                    "retry_seconds": 0.0,
+                },
+            )
+            row["calls"] += 1
+            row["errors"] += record.error is not None
+            row["retries"] += record.retries
+            row["prompt_tokens"] += record.prompt_tokens
+            row["completion_tokens"] += record.completion_tokens
+            row["cached_tokens"] += record.cached_tokens
+            row["latency"] += record.latency
+            row["max_latency"] = max(row["max_latency"], record.latency)
+            row["retry_seconds"] += record.retry_seconds
+        rows = sorted(groups.values(), key=lambda row: row["latency"], reverse=True)
+        for row in rows:
+            row["mean_latency"] = row["latency"] / row["calls"]
+        return rows
+
+    def log_summary(self, by: Sequence[str] = ("agent", "step"), limit: int = 10):
+        """Log the groups that took the most LLM time"""
+        for row in self.summary(by)[:limit]:
+            group = ", ".join(f"{field}={row[field]}" for field in by)
+            logger.info(
+                f"📊 LLM {group}: {row['calls']} calls, {row['latency']:.1f}s "
+                f"(max {row['max_latency']:.1f}s, {row['retries']} retries), "
+                f"tokens in={row['prompt_tokens']} cached={row['cached_tokens']} "
+                f"out={row['completion_tokens']}"
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+telemetry = Telemetry(config.telemetry_config.buffer_size, config.telemetry_config.sink)
+
+# (agent name, step) the running agent is on, set by BaseAgent.run
+_call_context: ContextVar[Tuple[Optional[str], Optional[int]]] = ContextVar(
+    "llm_call_context", default=(None, None)
+)
+# Record of the LLM call in progress in this task
+_current_call: ContextVar[Optional[LLMCallRecord]] = ContextVar(
+    "llm_current_call", default=None
+)
+
+
+@contextmanager
+def llm_call_context(agent: Optional[str], step: Optional[int]) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to an agent step"""
+    token = _call_context.set((agent, step))
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call() -> Optional[LLMCallRecord]:
+    """The record of the LLM call in progress, if any"""
+    return _current_call.get()
+
+
+def annotate_call(**fields: Any) -> None:
+    """Set fields on the record of the LLM call in progress, if any"""
+    record = _current_call.get()
+    if record:
+        for name, value in fields.items():
+            setattr(record, name, value)
+
+
+def new_call_record(model: str, method: str) -> LLMCallRecord:
+    agent, step = _call_context.get()
+    return LLMCallRecord(model=model, method=method, agent=agent, step=step)
+
+
+def track_llm_call(method: Callable[..., Awaitable[Any]]):
+    """Record the usage and timing of each call to an LLM method
+
+    Applied outside the retry decorator, so latency and retries cover the
+    whole call. Usage, stop reason and retries are filled in through
+    current_call() while the call runs.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        record = new_call_record(self.model, method.__name__)
+        token = _current_call.set(record)
+        start = time.perf_counter()
+        try:
+            return await method(self, *args, **kwargs)
+        except BaseException as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            _current_call.reset(token)
+            telemetry.record(record)
+
+    return wrapper
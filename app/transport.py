@@ -0,0 +1,120 @@
+import asyncio
+import importlib.util
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+from app.config import TransportSettings, config
+from app.logger import logger
+from app.rate_limit import SKIP_RATE_LIMIT, rate_limit_hooks
+
+
+# (base_url, api_key) -> HTTP client shared by every LLM instance using it
+_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+_lock = threading.Lock()
+# Running warm-up tasks; the event loop only keeps weak references to tasks
+_warm_up_tasks: Set[asyncio.Task] = set()
+
+
+def _create_client(
+    settings: TransportSettings, base_url: str, api_key: str
+) -> httpx.AsyncClient:
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the h2 package is missing, using HTTP/1.1")
+        http2 = False
+    # DefaultAsyncHttpxClient keeps the OpenAI SDK's timeout and redirect defaults
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        http2=http2,
+        # Every request passes the endpoint's rate limiter (see app.rate_limit)
+        event_hooks=rate_limit_hooks(base_url, api_key),
+    )
+
+
+def get_http_client(
+    base_url: str, api_key: str, settings: Optional[TransportSettings] = None
+) -> httpx.AsyncClient:
+    """Get the process-wide HTTP client (connection pool) for an LLM endpoint.
+
+    LLM instances with different config names but the same base_url and
+    api_key share one pool, so they reuse each other's keep-alive connections.
+    A client that was closed (e.g. by ``AsyncOpenAI.close()``) is replaced.
+    """
+    key = (base_url, api_key)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _clients.get(key)
+            if client is None or client.is_closed:
+                client = _create_client(
+                    settings or config.transport_config, base_url, api_key
+                )
+                _clients[key] = client
+    return client
+
+
+async def warm_up(
+    endpoints: Optional[Iterable[Tuple[str, str]]] = None, timeout: float = 10.0
+) -> int:
+    """Open a connection to each LLM endpoint ahead of the first request.
+
+    Sends a HEAD request to each base_url; any HTTP status is fine, the point
+    is the TCP/TLS handshake that leaves a keep-alive connection in the pool.
+    The requests bypass the rate limiter, so they use up no request quota.
+
+    Args:
+        endpoints: (base_url, api_key) pairs, defaults to every configured LLM
+        timeout: Seconds to wait for each endpoint
+
+    Returns:
+        int: The number of endpoints that were reached
+    """
+    if endpoints is None:
+        endpoints = {
+            (settings.base_url, settings.api_key)
+            for settings in config.llm.values()
+            if settings.api_type != "aws" and settings.base_url
+        }
+
+    async def touch(base_url: str, api_key: str) -> bool:
+        try:
+            await get_http_client(base_url, api_key).head(
+                base_url, timeout=timeout, extensions={SKIP_RATE_LIMIT: True}
+            )
+            return True
+        except httpx.HTTPError as e:
+            logger.debug(f"Warm-up of {base_url} failed: {e}")
+            return False
+
+    reached = await asyncio.gather(*(touch(*endpoint) for endpoint in endpoints))
+    return sum(reached)
+
+
+def start_warm_up() -> Optional[asyncio.Task]:
+    """Start warming up the LLM connections in the background if configured
+
+    The task is referenced until it finishes, so it is not garbage collected
+    mid-flight when the caller drops the returned task.
+    """
+    if not config.transport_config.warm_up:
+        return None
+    task = asyncio.create_task(warm_up())
+    _warm_up_tasks.add(task)
+    task.add_done_callback(_warm_up_tasks.discard)
+    return task
+
+
+async def close_http_clients() -> None:
+    """Close all shared HTTP clients"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        await client.aclose()
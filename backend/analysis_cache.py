@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from db import get_analysis, get_latest_analysis_version
+
+
+# 进程内缓存的地址数（可通过环境变量覆盖）
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+
+
+class AnalysisCache:
+    """
+    按地址缓存最新分析结果的进程内LRU
+
+    每次读取先用 get_latest_analysis_version 在该地址的索引范围内探测最新的已完成版本，
+    版本未变化时直接返回缓存，否则重新加载该版本的完整结果。
+    """
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_latest(self, address: str) -> Optional[Dict[str, Any]]:
+        """获取地址的最新分析结果（见 db.get_analysis），没有结果时为None"""
+        address = address.lower()
+        version = get_latest_analysis_version(address)
+        if version == 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is not None and entry["version"] == version:
+                self._entries.move_to_end(address)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = get_analysis(address, version)
+        if entry is None:
+            return None
+
+        with self._lock:
+            current = self._entries.get(address)
+            # 并发加载时不要用旧版本覆盖新版本
+            if current is None or current["version"] <= entry["version"]:
+                self._entries[address] = entry
+                self._entries.move_to_end(address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, address: Optional[str] = None):
+        """清除某个地址（默认全部）的缓存"""
+        with self._lock:
+            if address is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(address.lower(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_default_cache: Optional[AnalysisCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """获取进程内共享的分析结果缓存"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = AnalysisCache()
+    return _default_cache
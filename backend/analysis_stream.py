@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import sys
+from typing import Any, AsyncIterator, Dict, Optional
+
+import db
+
+
+# analysis_demo 中的工作流在第一次请求时才导入（会加载LLM SDK）
+ANALYSIS_DEMO_DIR = os.path.join(os.path.dirname(__file__), "..", "analysis_demo")
+
+# 没有事件时发送SSE注释的间隔（秒），防止代理断开空闲连接
+KEEPALIVE_SECONDS = 15
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """把事件编码成一条SSE消息（事件类型在JSON的type字段中）"""
+    return f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def run_streaming_analysis(
+    address: Optional[str],
+    provider: str,
+    limit: int,
+    mode: str,
+    on_event,
+) -> Dict[str, Any]:
+    """
+    在当前线程中执行一次分析，进度事件通过 on_event 回调；
+    结束后把结果作为该地址的新版本写入数据库
+
+    Returns:
+        Dict: {"address", "version"}
+    """
+    if ANALYSIS_DEMO_DIR not in sys.path:
+        sys.path.append(ANALYSIS_DEMO_DIR)
+    from features import infer_focus_address, to_frame
+    from runner import get_token_budget, load_transactions_from_db
+    from workflow import create_workflow_instance, result_fingerprints
+
+    transactions = load_transactions_from_db(
+        db.DATABASE_PATH, limit=limit, address=address
+    )
+    if not transactions:
+        raise ValueError("数据库中没有可分析的交易记录")
+
+    address = (address or infer_focus_address(to_frame(transactions)) or "").lower()
+    latest = db.get_analysis(address)
+    previous = latest["result"] if latest else {}
+
+    results = create_workflow_instance(provider).execute_workflow(
+        transactions,
+        mode=mode,
+        previous=previous,
+        on_event=on_event,
+        token_budget=get_token_budget(address),
+    )
+    if results["metadata"]["status"] == "budget_exceeded":
+        raise ValueError(results["error"])
+    results["metadata"]["address"] = address
+    version = db.save_analysis(address, results, result_fingerprints(results))
+    return {"address": address, "version": version}
+
+
+async def stream_analysis(
+    address: Optional[str] = None,
+    provider: str = "claude",
+    limit: int = 20,
+    mode: str = "auto",
+) -> AsyncIterator[str]:
+    """
+    执行分析并以SSE消息的形式逐个产出工作流事件
+
+    分析在线程池中执行；客户端断开后分析仍会完成并写入数据库。
+    最后一条消息是 analysis_saved（地址和版本号）或 error。
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+
+    def on_event(event: Optional[Dict[str, Any]]):
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def worker():
+        try:
+            saved = run_streaming_analysis(address, provider, limit, mode, on_event)
+            on_event({"type": "analysis_saved", **saved})
+        except Exception as e:
+            on_event({"type": "error", "message": str(e)})
+        finally:
+            on_event(None)
+
+    loop.run_in_executor(None, worker)
+
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        if event is None:
+            break
+        yield format_sse(event)
@@ -1,9 +1,15 @@
+import json
 import os
 import sqlite3
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional
+
 
 DATABASE_PATH = "transactions.db"
 
+# 数据库结构版本（记录在 PRAGMA user_version 中），数据迁移只在升级时执行一次
+SCHEMA_VERSION = 2
+
 
 def init_database():
     """初始化数据库表结构"""
@@ -24,6 +30,77 @@ def init_database():
     """
     )
 
+    # 按时间排序和按地址过滤的流式读取使用的索引
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (time)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_from ON transactions (from_addr)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_to ON transactions (to_addr)"
+    )
+
+    # 每个地址的分析结果，按版本保留历史；agent为结果字段名，metadata为运行元数据，
+    # status为该次运行的 metadata.status
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analyses (
+            address TEXT NOT NULL,
+            agent TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            fingerprint TEXT,
+            result_json TEXT NOT NULL,
+            status TEXT,
+            PRIMARY KEY (address, agent, version)
+        )
+    """
+    )
+
+    schema_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if schema_version < 1:
+        # 旧版本按原始大小写写入的地址统一转成小写（insert_transaction 现在写入小写）
+        cursor.execute(
+            """
+            UPDATE transactions
+            SET from_addr = lower(from_addr), to_addr = lower(to_addr)
+            WHERE from_addr != lower(from_addr) OR to_addr != lower(to_addr)
+        """
+        )
+    if schema_version < 2:
+        # 旧版本的analyses表没有status列，从metadata行的结果中回填
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(analyses)")]
+        if "status" not in columns:
+            cursor.execute("ALTER TABLE analyses ADD COLUMN status TEXT")
+        cursor.execute(
+            """
+            UPDATE analyses SET status = (
+                SELECT COALESCE(json_extract(m.result_json, '$.status'), 'completed')
+                FROM analyses AS m
+                WHERE m.address = analyses.address
+                AND m.version = analyses.version
+                AND m.agent = 'metadata'
+            )
+            WHERE status IS NULL
+        """
+        )
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_analyses_address_version
+        ON analyses (address, version)
+    """
+    )
+    # 查找最新的已完成版本时只需读取该索引
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_analyses_address_status_version
+        ON analyses (address, status, version)
+    """
+    )
+
     conn.commit()
     conn.close()
     print(f"数据库初始化完成: {DATABASE_PATH}")
@@ -42,8 +119,9 @@ def insert_transaction(tx_data: Dict[str, Any]):
     """,
         (
             tx_data.get("hash", ""),
-            tx_data.get("from", ""),
-            tx_data.get("to", ""),
+            # 地址统一按小写存储，按地址过滤时可以直接使用索引
+            (tx_data.get("from") or "").lower(),
+            (tx_data.get("to") or "").lower(),
             tx_data.get("value", ""),
             tx_data.get("timeStamp", 0),
             tx_data.get("raw_json", ""),
@@ -88,6 +166,180 @@ def get_transaction_count() -> int:
     return count
 
 
+def save_analysis(
+    address: str,
+    results: Dict[str, Any],
+    fingerprints: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    保存一次分析结果，作为该地址的新版本
+
+    Args:
+        address: 被分析的地址
+        results: 结果字段名 -> 结果（如 position_analysis、metadata）
+        fingerprints: 结果字段名 -> 输入指纹
+
+    Returns:
+        int: 新版本号
+    """
+    address = address.lower()
+    fingerprints = fingerprints or {}
+    metadata = results.get("metadata")
+    status = metadata.get("status", "completed") if isinstance(metadata, dict) else None
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+    try:
+        cursor = conn.cursor()
+        # 立即获取写锁，避免并发写入得到相同的版本号
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM analyses WHERE address = ?",
+            (address,),
+        )
+        version = cursor.fetchone()[0] + 1
+        created_at = int(time.time())
+        cursor.executemany(
+            """
+            INSERT INTO analyses
+            (address, agent, version, created_at, fingerprint, result_json, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+            [
+                (
+                    address,
+                    agent,
+                    version,
+                    created_at,
+                    fingerprints.get(agent),
+                    json.dumps(result, ensure_ascii=False),
+                    status,
+                )
+                for agent, result in results.items()
+            ],
+        )
+        conn.commit()
+        return version
+    finally:
+        conn.close()
+
+
+def get_latest_analysis_version(address: str, completed_only: bool = True) -> int:
+    """
+    地址的最新分析版本号（没有结果时为0），只读取 (address, status, version) 索引
+
+    Args:
+        address: 地址
+        completed_only: 只考虑 metadata.status 为 completed 的版本
+            （失败和部分完成的运行也会保存，用于历史对比和token用量统计）
+    """
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    if completed_only:
+        cursor.execute(
+            """
+            SELECT COALESCE(MAX(version), 0) FROM analyses
+            WHERE address = ? AND status = 'completed'
+        """,
+            (address.lower(),),
+        )
+    else:
+        cursor.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM analyses WHERE address = ?",
+            (address.lower(),),
+        )
+    version = cursor.fetchone()[0]
+    conn.close()
+
+    return version
+
+
+def get_analysis(
+    address: str, version: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    获取地址某个版本的分析结果（默认最新的已完成版本）
+
+    Returns:
+        Dict: {"address", "version", "created_at", "fingerprints", "result"}，不存在时为None
+    """
+    address = address.lower()
+    if version is None:
+        version = get_latest_analysis_version(address)
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        SELECT agent, created_at, fingerprint, result_json FROM analyses
+        WHERE address = ? AND version = ?
+    """,
+        (address, version),
+    )
+
+    rows = cursor.fetchall()
+    conn.close()
+
+    if not rows:
+        return None
+    return {
+        "address": address,
+        "version": version,
+        "created_at": rows[0]["created_at"],
+        "fingerprints": {
+            row["agent"]: row["fingerprint"] for row in rows if row["fingerprint"]
+        },
+        "result": {row["agent"]: json.loads(row["result_json"]) for row in rows},
+    }
+
+
+def get_analysis_versions(address: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """地址的分析历史版本列表（新到旧），用于对比不同版本的结果"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        SELECT version, MIN(created_at) AS created_at, COUNT(*) AS agent_count
+        FROM analyses
+        WHERE address = ?
+        GROUP BY version
+        ORDER BY version DESC
+        LIMIT ?
+    """,
+        (address.lower(), limit),
+    )
+
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(row) for row in rows]
+
+
+def get_analysis_token_usage(address: str) -> int:
+    """地址所有分析版本累计消耗的token数（metadata.usage.total 中的输入+输出）"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        SELECT COALESCE(SUM(
+            COALESCE(json_extract(result_json, '$.usage.total.input_tokens'), 0)
+            + COALESCE(json_extract(result_json, '$.usage.total.output_tokens'), 0)
+        ), 0)
+        FROM analyses
+        WHERE address = ? AND agent = 'metadata'
+    """,
+        (address.lower(),),
+    )
+    tokens = cursor.fetchone()[0]
+    conn.close()
+
+    return int(tokens)
+
+
 if __name__ == "__main__":
     init_database()
     print(f"交易总数: {get_transaction_count()}")
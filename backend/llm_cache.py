@@ -0,0 +1,398 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+
+# LLM响应缓存配置（可通过环境变量覆盖）
+# 默认路径固定在仓库根目录：backend服务与analysis_demo脚本的工作目录不同，
+# 使用相对路径会各自落到不同的SQLite文件，/metrics统计不到agent调用
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(ROOT_DIR, "llm_cache.db"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# 命中时最多每隔这么久才刷新一次last_access，避免每次读取都占用SQLite写锁
+LLM_CACHE_TOUCH_SECONDS = int(os.getenv("LLM_CACHE_TOUCH_SECONDS", "300"))
+# 命中/未命中计数在进程内累积，每这么多次查询才写一次数据库
+LLM_CACHE_COUNTER_FLUSH_EVERY = int(os.getenv("LLM_CACHE_COUNTER_FLUSH_EVERY", "50"))
+
+PromptType = Union[str, List[Dict[str, Any]]]
+Validator = Callable[[str], Any]
+
+
+def is_json_response(text: str) -> bool:
+    """响应是否为合法JSON（调用方随后会json.loads，非JSON响应不应写入缓存）"""
+    try:
+        json.loads(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_valid(validate: Optional[Validator], value: str) -> bool:
+    if not value:
+        return False
+    if validate is None:
+        return True
+    try:
+        return bool(validate(value))
+    except Exception:
+        return False
+
+
+def normalize_prompt(prompt: PromptType) -> str:
+    """
+    规范化提示词：统一换行、去掉每行首尾空白并合并连续空行
+
+    多行f-string提示词的缩进变化不会导致缓存未命中。
+    消息列表按 role/content 依次规范化。
+    """
+    if not isinstance(prompt, str):
+        return json.dumps(
+            [
+                [message.get("role", ""), normalize_prompt(message.get("content", ""))]
+                for message in prompt
+            ],
+            ensure_ascii=False,
+        )
+
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    normalized: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if line or (normalized and normalized[-1]):
+            normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def make_cache_key(
+    provider: str, model: str, temperature: float, prompt: PromptType
+) -> str:
+    """根据 (provider, model, temperature, 规范化提示词哈希) 生成缓存键"""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    key_material = json.dumps(
+        [provider, model, round(float(temperature), 4), prompt_hash]
+    )
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    基于SQLite的内容寻址LLM响应缓存
+
+    - 按总字节数做LRU淘汰（last_access最早的先淘汰），
+      命中时last_access最多每 touch_seconds 刷新一次
+    - 条目超过TTL后视为未命中并删除
+    - 命中/未命中计数同时保存在进程内和数据库中（批量写入），
+      这样后端指标可以看到分析脚本等其他进程的命中情况
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        touch_seconds: int = LLM_CACHE_TOUCH_SECONDS,
+        counter_flush_every: int = LLM_CACHE_COUNTER_FLUSH_EVERY,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.touch_seconds = touch_seconds
+        self.counter_flush_every = counter_flush_every
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        # 尚未写入数据库的命中/未命中计数
+        self._pending = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _init_schema(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                value TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)"
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        """
+        )
+        conn.commit()
+        conn.close()
+
+    def _count(self, name: str):
+        """进程内计数，累积到 counter_flush_every 次查询后批量写入数据库"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._pending[name] += 1
+            due = sum(self._pending.values()) >= self.counter_flush_every
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """把进程内累积的命中/未命中计数写入数据库"""
+        with self._lock:
+            pending = [(name, value) for name, value in self._pending.items() if value]
+            self._pending = {"hits": 0, "misses": 0}
+        if not pending:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO llm_cache_counters (name, value) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+            """,
+                pending,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存条目，过期或不存在时返回None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, created_at, last_access FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+
+            if row is not None and now - row[2] > self.touch_seconds:
+                conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key)
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+        self._count("misses" if row is None else "hits")
+        return None if row is None else row[0]
+
+    def delete(self, key: str):
+        """删除单个缓存条目"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def set(self, key: str, value: str, provider: str = "", model: str = ""):
+        """写入缓存条目，并按LRU淘汰直到总大小不超过上限"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                (key, provider, model, value, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                (key, provider, model, value, size, now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return row[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = self._total_size(conn)
+        if total <= self.max_bytes:
+            return
+
+        expired_before = time.time() - self.ttl_seconds
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (expired_before,))
+        total = self._total_size(conn)
+
+        evict_keys = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_access ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", evict_keys)
+
+    def get_or_call(
+        self,
+        provider: str,
+        model: str,
+        temperature: float,
+        prompt: PromptType,
+        call: Callable[[], str],
+        bypass: bool = False,
+        validate: Optional[Validator] = None,
+    ) -> str:
+        """
+        先查缓存，未命中时调用 ``call`` 并写入缓存
+
+        空响应和未通过 ``validate`` 的响应不写入缓存（照常返回给调用方），
+        缓存中未通过校验的旧条目视为未命中并删除。
+
+        Args:
+            provider: 提供方名称（claude / deepseek）
+            model: 模型名称
+            temperature: 采样温度
+            prompt: 提示词字符串或消息列表
+            call: 实际请求LLM的函数，返回响应文本
+            bypass: 为True时跳过读取缓存，但仍用新结果刷新缓存
+            validate: 校验响应的函数（如 is_json_response），返回假值或抛出异常视为无效
+
+        Returns:
+            str: LLM响应文本
+        """
+        key = make_cache_key(provider, model, temperature, prompt)
+
+        if bypass or is_cache_disabled():
+            with self._lock:
+                self.bypassed += 1
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                if _is_valid(validate, cached):
+                    return cached
+                self.delete(key)
+
+        result = call()
+        if _is_valid(validate, result):
+            self.set(key, result, provider=provider, model=model)
+        return result
+
+    async def aget_or_call(
+        self,
+        provider: str,
+        model: str,
+        temperature: float,
+        prompt: PromptType,
+        call: Callable[[], Awaitable[str]],
+        bypass: bool = False,
+        validate: Optional[Validator] = None,
+    ) -> str:
+        """get_or_call 的asyncio版本（call为协程函数，缓存读写在线程池中执行）"""
+        key = make_cache_key(provider, model, temperature, prompt)
+
+        if bypass or is_cache_disabled():
+            with self._lock:
+                self.bypassed += 1
+        else:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                if _is_valid(validate, cached):
+                    return cached
+                await asyncio.to_thread(self.delete, key)
+
+        result = await call()
+        if _is_valid(validate, result):
+            await asyncio.to_thread(self.set, key, result, provider, model)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计（进程内计数 + 数据库中的累计计数）"""
+        self.flush_counters()
+        conn = self._connect()
+        try:
+            entries, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            counters = dict(
+                conn.execute("SELECT name, value FROM llm_cache_counters").fetchall()
+            )
+        finally:
+            conn.close()
+
+        with self._lock:
+            process = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+            }
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+            "process": process,
+        }
+
+    def clear(self):
+        """清空缓存条目和计数"""
+        with self._lock:
+            self._pending = {"hits": 0, "misses": 0}
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.execute("DELETE FROM llm_cache_counters")
+        conn.commit()
+        conn.close()
+
+
+def is_cache_disabled() -> bool:
+    """LLM_CACHE_DISABLED=1 时全局跳过缓存读取"""
+    return os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+_default_cache: Optional[LLMCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """获取进程内共享的默认缓存实例（首次使用时创建）"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = LLMCache()
+                # 退出前写入尚未落库的命中/未命中计数
+                atexit.register(_default_cache.flush_counters)
+    return _default_cache
+
+
+if __name__ == "__main__":
+    cache = get_llm_cache()
+    print(json.dumps(cache.stats(), indent=2, ensure_ascii=False))
@@ -1,10 +1,14 @@
 import json
 import os
-from parser import parse_with_claude
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 
 import requests
+from analysis_cache import get_analysis_cache
+from analysis_stream import stream_analysis
 from db import (
+    get_analysis,
+    get_analysis_versions,
     get_recent_transactions,
     get_transaction_count,
     init_database,
@@ -12,9 +16,22 @@ from db import (
 )
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from parser_deepseek import parse_with_deepseek
+from fastapi.responses import StreamingResponse
+from llm_cache import get_llm_cache
+from providers import default_provider_name
+from router import get_router
 
-app = FastAPI(title="Crypto Transaction Analysis API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时初始化数据库，而不是在导入时"""
+    init_database()
+    yield
+
+
+app = FastAPI(
+    title="Crypto Transaction Analysis API", version="1.0.0", lifespan=lifespan
+)
 
 # 配置CORS
 app.add_middleware(
@@ -25,9 +42,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 初始化数据库
-init_database()
-
 
 @app.get("/")
 async def root():
@@ -38,7 +52,10 @@ async def root():
         "endpoints": {
             "fetch_eth": "/fetch_eth/{address}",
             "transactions": "/transactions",
+            "analysis": "/analysis/{address}",
+            "analysis_stream": "/analysis/stream",
             "health": "/health",
+            "metrics": "/metrics",
         },
     }
 
@@ -49,11 +66,25 @@ async def health_check():
     return {"status": "healthy", "transaction_count": get_transaction_count()}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """运行指标（交易数、LLM响应缓存命中/未命中、提供方延迟）"""
+    return {
+        "transaction_count": get_transaction_count(),
+        "llm_cache": get_llm_cache().stats(),
+        "analysis_cache": get_analysis_cache().stats(),
+        "provider_router": get_router().snapshot(),
+    }
+
+
 @app.get("/fetch_eth/{address}")
-async def fetch_eth_transactions(address: str, limit: int = 10):
+def fetch_eth_transactions(address: str, limit: int = 10):
     """
     从Etherscan API拉取以太坊地址的交易记录
 
+    Etherscan请求、LLM解析（可能对冲到线程池）和写库都是阻塞调用，
+    因此定义为普通函数，由FastAPI放到线程池执行，不阻塞事件循环（SSE流等）。
+
     Args:
         address: 以太坊地址
         limit: 获取交易数量限制（默认10条）
@@ -96,12 +127,10 @@ async def fetch_eth_transactions(address: str, limit: int = 10):
                 # 保存原始JSON
                 tx["raw_json"] = json.dumps(tx)
 
-                # 使用AI解析交易（优先使用DeepSeek，如果不可用则使用Claude）
+                # 使用AI解析交易：路由器按延迟选择提供方，慢请求会对冲到另一提供方
+                # 解析模块在第一次使用时才导入
                 try:
-                    if os.getenv("DEEPSEEK_API_KEY"):
-                        parsed_result = parse_with_deepseek(tx)
-                    else:
-                        parsed_result = parse_with_claude(tx)
+                    parsed_result = get_router().parse(tx)
                 except Exception as e:
                     print(f"AI解析失败，使用简单解析: {e}")
                     # 简单解析作为备选
@@ -184,6 +213,76 @@ async def get_analysis_result():
         raise HTTPException(status_code=500, detail=f"读取分析结果失败: {str(e)}")
 
 
+@app.get("/analysis/stream")
+async def stream_analysis_events(
+    address: Optional[str] = None,
+    provider: Optional[str] = None,
+    limit: int = 20,
+    mode: str = "auto",
+):
+    """
+    执行多Agent分析并通过SSE推送进度
+
+    每个Agent完成后立即推送其结果（agent_finished），投资顾问分析逐段推送
+    生成的文本（advisor_token），结束时推送完整结果并写入数据库。
+
+    Args:
+        address: 被分析的地址（默认取最近交易中出现次数最多的地址）
+        provider: claude / deepseek（默认按已配置的API Key选择）
+        limit: 加载的交易数量（0表示全部）
+        mode: 分析模式 auto / single / mapreduce
+    """
+    provider = provider or default_provider_name()
+    if provider not in ("claude", "deepseek"):
+        raise HTTPException(status_code=400, detail=f"不支持的提供方: {provider}")
+    if mode not in ("auto", "single", "mapreduce"):
+        raise HTTPException(status_code=400, detail=f"不支持的分析模式: {mode}")
+
+    return StreamingResponse(
+        stream_analysis(address, provider, limit, mode),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/analysis/{address}")
+async def get_address_analysis(address: str, version: Optional[int] = None):
+    """
+    获取某个地址的分析结果（数据库analyses表）
+
+    Args:
+        address: 被分析的地址
+        version: 历史版本号（默认最新版本，最新版本从进程内缓存读取）
+    """
+    try:
+        if version is None:
+            analysis = get_analysis_cache().get_latest(address)
+        else:
+            analysis = get_analysis(address, version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"读取分析结果失败: {str(e)}")
+
+    if analysis is None:
+        raise HTTPException(status_code=404, detail=f"地址 {address} 没有分析结果")
+    return {"success": True, **analysis}
+
+
+@app.get("/analysis/{address}/versions")
+async def get_address_analysis_versions(address: str, limit: int = 20):
+    """
+    获取某个地址的分析历史版本列表（用于对比不同版本）
+
+    Args:
+        address: 被分析的地址
+        limit: 返回版本数量限制（默认20个）
+    """
+    try:
+        versions = get_analysis_versions(address, limit)
+        return {"success": True, "address": address.lower(), "versions": versions}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"读取分析历史失败: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -2,7 +2,7 @@ import json
 import os
 from typing import Any, Dict
 
-import anthropic
+from llm_cache import get_llm_cache, is_json_response
 
 # Claude API配置
 CLAUDE_PROMPT = """
@@ -43,12 +43,13 @@ CLAUDE_PROMPT = """
 """
 
 
-def parse_with_claude(tx: Dict[str, Any]) -> str:
+def parse_with_claude(tx: Dict[str, Any], use_cache: bool = True) -> str:
     """
     使用Claude API解析以太坊交易数据
 
     Args:
         tx: 以太坊交易数据字典
+        use_cache: 是否读取LLM响应缓存（False时强制重新请求并刷新缓存）
 
     Returns:
         str: JSON格式的解析结果
@@ -58,9 +59,6 @@ def parse_with_claude(tx: Dict[str, Any]) -> str:
         raise ValueError("CLAUDE_API_KEY 环境变量未设置")
 
     try:
-        # 初始化Claude客户端
-        client = anthropic.Anthropic(api_key=api_key)
-
         # 准备交易数据（只保留关键字段）
         transaction_data = {
             "hash": tx.get("hash", ""),
@@ -85,17 +83,34 @@ def parse_with_claude(tx: Dict[str, Any]) -> str:
             transaction_data=json.dumps(transaction_data, indent=2)
         )
 
-        # 调用Claude API
-        response = client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1000,
-            temperature=0.1,
-            messages=[{"role": "user", "content": prompt}],
+        model = "claude-3-sonnet-20240229"
+        temperature = 0.1
+        messages = [{"role": "user", "content": prompt}]
+
+        def request_claude() -> str:
+            # 延迟导入anthropic SDK，只有真正调用Claude时才加载
+            import anthropic
+
+            client = anthropic.Anthropic(api_key=api_key)
+            response = client.messages.create(
+                model=model,
+                max_tokens=1000,
+                temperature=temperature,
+                messages=messages,
+            )
+            return response.content[0].text.strip()
+
+        # 调用Claude API（相同提示词命中缓存时不再请求）
+        result_text = get_llm_cache().get_or_call(
+            "claude",
+            model,
+            temperature,
+            messages,
+            request_claude,
+            bypass=not use_cache,
+            validate=is_json_response,
         )
 
-        # 提取响应内容
-        result_text = response.content[0].text.strip()
-
         # 验证JSON格式
         try:
             parsed_result = json.loads(result_text)
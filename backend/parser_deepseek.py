@@ -3,6 +3,7 @@ import os
 from typing import Any, Dict
 
 import requests
+from llm_cache import get_llm_cache, is_json_response
 
 # DeepSeek API配置
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
@@ -47,12 +48,13 @@ DEEPSEEK_PROMPT = """
 """
 
 
-def parse_with_deepseek(tx: Dict[str, Any]) -> str:
+def parse_with_deepseek(tx: Dict[str, Any], use_cache: bool = True) -> str:
     """
     使用DeepSeek API解析以太坊交易数据
 
     Args:
         tx: 以太坊交易数据字典
+        use_cache: 是否读取LLM响应缓存（False时强制重新请求并刷新缓存）
 
     Returns:
         str: JSON格式的解析结果
@@ -98,13 +100,25 @@ def parse_with_deepseek(tx: Dict[str, Any]) -> str:
             "max_tokens": 1000,
         }
 
-        response = requests.post(
-            DEEPSEEK_API_URL, headers=headers, json=payload, timeout=30
+        def request_deepseek() -> str:
+            response = requests.post(
+                DEEPSEEK_API_URL, headers=headers, json=payload, timeout=30
+            )
+            response.raise_for_status()
+
+            result = response.json()
+            return result["choices"][0]["message"]["content"].strip()
+
+        # 相同提示词命中缓存时不再请求
+        result_text = get_llm_cache().get_or_call(
+            "deepseek",
+            payload["model"],
+            payload["temperature"],
+            payload["messages"],
+            request_deepseek,
+            bypass=not use_cache,
+            validate=is_json_response,
         )
-        response.raise_for_status()
-
-        result = response.json()
-        result_text = result["choices"][0]["message"]["content"].strip()
 
         # 验证JSON格式
         try:
@@ -0,0 +1,62 @@
+import importlib
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+# 解析服务提供方注册表: 名称 -> (模块名, 函数名)
+# 模块只在第一次使用时导入，避免冷启动时加载各家SDK
+PROVIDERS: Dict[str, Tuple[str, str]] = {
+    "deepseek": ("parser_deepseek", "parse_with_deepseek"),
+    "claude": ("parser", "parse_with_claude"),
+}
+
+# 每个提供方需要的API Key环境变量
+PROVIDER_API_KEYS: Dict[str, str] = {
+    "deepseek": "DEEPSEEK_API_KEY",
+    "claude": "CLAUDE_API_KEY",
+}
+
+_loaded: Dict[str, Callable[[Dict[str, Any]], str]] = {}
+_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    获取解析函数，首次调用时才导入对应模块
+
+    Args:
+        name: 提供方名称（deepseek / claude）
+
+    Returns:
+        Callable: 解析函数，接收交易字典，返回JSON字符串
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"未知的解析提供方: {name}")
+
+    parse_fn = _loaded.get(name)
+    if parse_fn is None:
+        with _lock:
+            parse_fn = _loaded.get(name)
+            if parse_fn is None:
+                module_name, func_name = PROVIDERS[name]
+                module = importlib.import_module(module_name)
+                parse_fn = getattr(module, func_name)
+                _loaded[name] = parse_fn
+    return parse_fn
+
+
+def default_provider_name() -> str:
+    """优先使用DeepSeek，如果未配置则使用Claude"""
+    return "deepseek" if os.getenv("DEEPSEEK_API_KEY") else "claude"
+
+
+def is_provider_configured(name: str) -> bool:
+    """检查提供方的API Key是否已配置"""
+    env_name = PROVIDER_API_KEYS.get(name)
+    return bool(env_name and os.getenv(env_name))
+
+
+def loaded_providers() -> Dict[str, bool]:
+    """返回各提供方模块是否已加载（用于健康检查和基准测试）"""
+    return {name: name in _loaded for name in PROVIDERS}
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from providers import PROVIDERS, get_provider, is_provider_configured
+
+
+ParseFunction = Callable[[Dict[str, Any]], str]
+
+
+def is_error_result(result: str) -> bool:
+    """解析函数在失败时返回带error字段的JSON，而不是抛出异常"""
+    try:
+        parsed = json.loads(result)
+    except (TypeError, ValueError):
+        return True
+    return isinstance(parsed, dict) and bool(parsed.get("error"))
+
+
+class ProviderStats:
+    """单个提供方的滚动延迟/错误窗口"""
+
+    def __init__(self, window: int = 100):
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.samples.append((latency, ok))
+
+    def _latencies(self) -> List[float]:
+        with self._lock:
+            return sorted(latency for latency, ok in self.samples if ok)
+
+    def percentile(self, q: float) -> Optional[float]:
+        latencies = self._latencies()
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))
+        return latencies[index]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self.samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.count(),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "error_rate": self.error_rate(),
+        }
+
+
+class ProviderRouter:
+    """
+    延迟感知的解析提供方路由器
+
+    - 按滚动窗口的p50和错误率选择主提供方
+    - 主请求超过其当前p95仍未返回时，向另一提供方发送对冲请求
+    - 采用最先返回的成功结果，取消另一请求（已在执行的线程无法中断，
+      其结果会被丢弃，但延迟仍计入统计）
+    """
+
+    def __init__(
+        self,
+        providers: Optional[Dict[str, ParseFunction]] = None,
+        window: int = 100,
+        min_samples: int = 10,
+        default_hedge_delay: float = 5.0,
+        min_hedge_delay: float = 0.05,
+        timeout: float = 60.0,
+        hedge: bool = True,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            providers: 名称 -> 解析函数；为空时使用已配置API Key的内置提供方（延迟加载）
+            window: 每个提供方保留的最近样本数
+            min_samples: 样本数达到该值后才使用p95作为对冲延迟
+            default_hedge_delay: 样本不足时的对冲延迟（秒）
+            min_hedge_delay: 对冲延迟下限（秒）
+            timeout: 单次解析的总超时（秒）
+            hedge: 是否启用对冲请求
+            max_workers: 执行请求的线程数
+        """
+        self._providers = providers
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.hedge = hedge
+        self.stats: Dict[str, ProviderStats] = {
+            name: ProviderStats(window) for name in self.provider_names()
+        }
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="provider-router"
+        )
+
+    def provider_names(self) -> List[str]:
+        if self._providers is not None:
+            return list(self._providers)
+        return [name for name in PROVIDERS if is_provider_configured(name)]
+
+    def _get_parse_fn(self, name: str) -> ParseFunction:
+        if self._providers is not None:
+            return self._providers[name]
+        return get_provider(name)
+
+    def _stats_for(self, name: str) -> ProviderStats:
+        with self._lock:
+            if name not in self.stats:
+                self.stats[name] = ProviderStats()
+            return self.stats[name]
+
+    def rank(self) -> List[str]:
+        """按 p50 * (1 + 错误率) 排序；样本不足的提供方保持注册顺序并优先试用"""
+        names = self.provider_names()
+
+        def score(item: Tuple[int, str]) -> Tuple[int, float, int]:
+            order, name = item
+            stats = self._stats_for(name)
+            if stats.count() < self.min_samples:
+                return (0, 0.0, order)
+            p50 = stats.percentile(0.5)
+            if p50 is None:
+                # 窗口内全部失败
+                return (2, 0.0, order)
+            return (1, p50 * (1 + 4 * stats.error_rate()), order)
+
+        return [name for _, name in sorted(enumerate(names), key=score)]
+
+    def hedge_delay(self, name: str) -> float:
+        stats = self._stats_for(name)
+        p95 = stats.percentile(0.95) if stats.count() >= self.min_samples else None
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _submit(self, name: str, tx: Dict[str, Any]) -> Future:
+        parse_fn = self._get_parse_fn(name)
+        stats = self._stats_for(name)
+
+        def run() -> str:
+            start = time.perf_counter()
+            try:
+                result = parse_fn(tx)
+            except Exception:
+                stats.record(time.perf_counter() - start, ok=False)
+                raise
+            stats.record(time.perf_counter() - start, ok=not is_error_result(result))
+            return result
+
+        return self._executor.submit(run)
+
+    def parse(self, tx: Dict[str, Any]) -> str:
+        """
+        解析交易，必要时对冲到另一提供方
+
+        Returns:
+            str: 最先返回的成功结果；全部失败时返回最后一个错误结果
+
+        Raises:
+            ValueError: 没有可用的提供方
+            TimeoutError: 所有请求都超过总超时
+        """
+        order = self.rank()
+        if not order:
+            raise ValueError("没有配置任何解析提供方的API Key")
+
+        deadline = time.monotonic() + self.timeout
+        pending: Dict[Future, str] = {self._submit(order[0], tx): order[0]}
+        backups = order[1:] if self.hedge else []
+        last_result: Optional[str] = None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                # 还有备用提供方时，只等待到对冲延迟
+                wait_for = remaining
+                if backups:
+                    wait_for = min(remaining, self.hedge_delay(order[0]))
+
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if not is_error_result(result):
+                        if name != order[0]:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return result
+                    last_result = result
+
+                # 超过对冲延迟仍未完成，或主请求已失败：发送下一个请求
+                if backups and (not done or not pending):
+                    name = backups.pop(0)
+                    if pending:
+                        with self._lock:
+                            self.hedged_requests += 1
+                    pending[self._submit(name, tx)] = name
+        finally:
+            for future in pending:
+                future.cancel()
+
+        if last_result is not None:
+            return last_result
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError(f"解析超时（{self.timeout}秒）")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """路由器统计（用于 /metrics）"""
+        with self._lock:
+            hedged, wins = self.hedged_requests, self.hedge_wins
+        return {
+            "ranking": self.rank(),
+            "hedged_requests": hedged,
+            "hedge_wins": wins,
+            "providers": {
+                name: self._stats_for(name).snapshot() for name in self.provider_names()
+            },
+        }
+
+
+_default_router: Optional[ProviderRouter] = None
+_default_router_lock = threading.Lock()
+
+
+def get_router() -> ProviderRouter:
+    """获取进程内共享的默认路由器"""
+    global _default_router
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = ProviderRouter()
+    return _default_router
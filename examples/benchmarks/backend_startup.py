@@ -0,0 +1,80 @@
+"""
+Cold-start benchmark for the FastAPI backend.
+
+Each sample imports the backend in a fresh interpreter so module caches are
+cold. The "eager" profile reproduces the old import-time behaviour (both
+provider parsers and the anthropic SDK loaded, database initialised on
+import); the "lazy" profile imports ``main`` only, which is what a worker
+now pays before serving its first request.
+
+Usage:
+    python examples/benchmarks/backend_startup.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+
+PROFILES: Dict[str, str] = {
+    "eager": "import main, parser, parser_deepseek, db; db.init_database()",
+    "lazy": "import main",
+}
+
+
+def time_import(statement: str, workdir: str) -> float:
+    """Run ``statement`` in a fresh interpreter and return wall time in ms."""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=workdir,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def run_profile(statement: str, runs: int) -> List[float]:
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm the OS page cache once so the first sample is not an outlier
+        time_import(statement, workdir)
+        return [time_import(statement, workdir) for _ in range(runs)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline_interpreter = statistics.median(
+        run_profile("pass", args.runs)
+    )  # interpreter start-up, subtracted from every profile
+    print(f"interpreter start-up: {baseline_interpreter:.1f} ms (subtracted)")
+
+    medians = {}
+    for name, statement in PROFILES.items():
+        samples = run_profile(statement, args.runs)
+        medians[name] = statistics.median(samples) - baseline_interpreter
+        print(
+            f"{name:>6}: median {medians[name]:.1f} ms, "
+            f"min {min(samples) - baseline_interpreter:.1f} ms over {args.runs} runs"
+        )
+
+    if medians["eager"] > 0:
+        saved = medians["eager"] - medians["lazy"]
+        print(f"cold start saved: {saved:.1f} ms ({saved / medians['eager']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
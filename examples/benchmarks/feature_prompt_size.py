@@ -0,0 +1,70 @@
+"""
+Prompt-size benchmark for the analysis agents' feature stage.
+
+Compares the transaction section of an agent prompt built the old way
+(``json.dumps(txs, indent=2)`` of every row, ``raw_json`` included) with the
+compact feature summary plus sample from ``analysis_demo/features.py``.
+Token counts use tiktoken's cl100k_base when installed and fall back to a
+4-characters-per-token estimate. The LLM-side latency gain is estimated from
+``--prefill-tps`` (prompt tokens processed per second by the provider).
+
+Usage:
+    python examples/benchmarks/feature_prompt_size.py --sizes 20 200 2000 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "analysis_demo"))
+sys.path.append(os.path.dirname(__file__))
+
+from features import format_agent_context
+from synthetic import make_transactions
+
+
+def get_token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text) // 4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000, 20000])
+    parser.add_argument("--prefill-tps", type=float, default=2500.0)
+    args = parser.parse_args()
+
+    count_tokens = get_token_counter()
+    print(
+        f"{'txs':>7} {'raw tokens':>11} {'feature tokens':>15} {'reduction':>10} "
+        f"{'build ms':>9} {'est. prefill saved':>19}"
+    )
+    for n in args.sizes:
+        txs = make_transactions(n)
+
+        raw_prompt = json.dumps(txs, indent=2, ensure_ascii=False)
+        start = time.perf_counter()
+        compact_prompt = format_agent_context(txs)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        raw_tokens = count_tokens(raw_prompt)
+        compact_tokens = count_tokens(compact_prompt)
+        saved_s = (raw_tokens - compact_tokens) / args.prefill_tps
+        print(
+            f"{n:>7} {raw_tokens:>11} {compact_tokens:>15} "
+            f"{1 - compact_tokens / raw_tokens:>10.1%} {build_ms:>9.1f} "
+            f"{saved_s:>17.1f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Client-reuse benchmark for the analysis_demo LLM calls.
+
+Starts a local HTTP/1.1 stub that answers both the Anthropic messages API and
+the DeepSeek chat completions API after ``--latency-ms``, then times repeated
+four-agent runs (three analysis agents concurrently, then the advisor):
+
+* ``fresh``  - ``call_claude`` / ``call_deepseek`` with a new client or
+  session per call (the previous behaviour)
+* ``pooled`` - the same calls on the shared clients from
+  ``analysis_demo/clients.py``
+* ``async``  - ``acall_claude`` / ``acall_deepseek`` gathered on one event loop
+
+``connections`` is the number of TCP connections the stub accepted. With
+``--tls`` the stub serves HTTPS with a throwaway self-signed certificate
+(needs the ``openssl`` CLI), so every new connection also pays a handshake.
+
+Usage:
+    python examples/benchmarks/llm_client_pool.py --runs 20 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+ANALYSIS_AGENTS = 3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, reused
+    # connections would stall on delayed ACKs.
+    disable_nagle_algorithm = True
+    latency = 0.05
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        text = json.dumps({"summary": "stub"})
+        if self.path.endswith("/messages"):
+            body = {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "model": "stub",
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 100, "output_tokens": 20},
+            }
+        else:
+            body = {
+                "choices": [{"message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+            }
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def make_certificate(directory: str) -> str:
+    cert = os.path.join(directory, "cert.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", cert, "-out", cert, "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    return cert
+
+
+def start_stub(latency: float, cert: Optional[str] = None) -> str:
+    StubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    scheme = "http"
+    if cert:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+        # Trust the stub in requests and httpx (the Anthropic SDK uses httpx).
+        os.environ["REQUESTS_CA_BUNDLE"] = cert
+        os.environ["SSL_CERT_FILE"] = cert
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+def configure(base_url: str) -> None:
+    # Must run before the agents modules are imported: they read these at import.
+    os.environ["CLAUDE_API_KEY"] = "stub"
+    os.environ["CLAUDE_BASE_URL"] = base_url
+    os.environ["DEEPSEEK_API_KEY"] = "stub"
+    os.environ["DEEPSEEK_API_URL"] = f"{base_url}/v1/chat/completions"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "llm_cache.db")
+    sys.path.append(
+        os.path.join(os.path.dirname(__file__), "..", "..", "analysis_demo")
+    )
+
+
+def fresh_clients() -> None:
+    """Swap the shared clients for per-call ones, as before the client pool."""
+    import agents
+    import agents_deepseek
+    import anthropic
+    import requests
+
+    agents.get_anthropic_client = lambda api_key: anthropic.Anthropic(
+        api_key=api_key, base_url=os.environ["CLAUDE_BASE_URL"]
+    )
+    agents_deepseek.get_session = lambda provider: requests.Session()
+
+
+def pooled_clients() -> None:
+    import agents
+    import agents_deepseek
+    import clients
+
+    agents.get_anthropic_client = clients.get_anthropic_client
+    agents_deepseek.get_session = clients.get_session
+
+
+def run_threads(call: Callable[[str], str], runs: int) -> None:
+    with ThreadPoolExecutor(ANALYSIS_AGENTS) as pool:
+        for run in range(runs):
+            prompts = [f"run {run} agent {i}" for i in range(ANALYSIS_AGENTS)]
+            list(pool.map(call, prompts))
+            call(f"run {run} advisor")
+
+
+def run_async(call, runs: int) -> None:
+    from clients import aclose_clients
+
+    async def main() -> None:
+        for run in range(runs):
+            await asyncio.gather(
+                *(call(f"run {run} agent {i}") for i in range(ANALYSIS_AGENTS))
+            )
+            await call(f"run {run} advisor")
+        await aclose_clients()
+
+    asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--providers", nargs="+", default=["claude", "deepseek"])
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    cert = make_certificate(tempfile.mkdtemp()) if args.tls else None
+    configure(start_stub(args.latency_ms / 1000, cert))
+    from agents import acall_claude, call_claude
+    from agents_deepseek import acall_deepseek, call_deepseek
+
+    calls = {
+        "claude": (call_claude, acall_claude),
+        "deepseek": (call_deepseek, acall_deepseek),
+    }
+
+    def modes(provider: str) -> Dict[str, Callable[[], None]]:
+        call, acall = calls[provider]
+
+        def sync_run() -> None:
+            run_threads(lambda p: call(p, use_cache=False), args.runs)
+
+        return {
+            "fresh": lambda: (fresh_clients(), sync_run()),
+            "pooled": lambda: (pooled_clients(), sync_run()),
+            "async": lambda: run_async(lambda p: acall(p, use_cache=False), args.runs),
+        }
+
+    print(
+        f"{'provider':>9} {'mode':>7} {'total s':>8} {'ms/run':>8} "
+        f"{'overhead ms/run':>16} {'connections':>12}"
+    )
+    # Two sequential round trips per four-agent run are pure stub latency.
+    floor_ms = 2 * args.latency_ms
+    for provider in args.providers:
+        for mode, run in modes(provider).items():
+            before = StubHandler.connections
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            per_run = elapsed * 1000 / args.runs
+            print(
+                f"{provider:>9} {mode:>7} {elapsed:>8.2f} {per_run:>8.1f} "
+                f"{per_run - floor_ms:>16.1f} "
+                f"{StubHandler.connections - before:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Start-up benchmark for the agent entry point and its first LLM.
+
+Each sample runs in a fresh interpreter and times three phases:
+``import`` (the ``--module`` entry point, ``main`` by default, plus
+``app.llm``), ``construct`` (``LLM()`` for the default config) and
+``first_count`` (the first ``count_tokens`` call, which now loads the
+tiktoken encoding). The "eager" profile reproduces the old behaviour
+(boto3 imported with ``app.llm``, the encoding loaded in ``LLM.__init__``);
+"lazy" is what start-up costs now.
+
+Without network access tiktoken cannot fetch an encoding that is not cached
+yet; the phase is then reported as failed. ``main`` needs the browser
+dependencies, so use ``--module app.llm`` where they are not installed.
+
+Usage:
+    python examples/benchmarks/llm_startup.py --runs 10
+    python examples/benchmarks/llm_startup.py --module app.llm
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+PHASES = ["import", "construct", "first_count"]
+
+CHILD = r"""
+import importlib, json, sys, time
+
+eager, module = sys.argv[1] == "eager", sys.argv[2]
+timings = {}
+
+def phase(name, action):
+    start = time.perf_counter()
+    try:
+        action()
+    except Exception as e:
+        timings[name] = repr(e)
+        return
+    timings[name] = (time.perf_counter() - start) * 1000
+
+def load():
+    importlib.import_module(module)
+    importlib.import_module("app.llm")
+    if eager:
+        importlib.import_module("app.bedrock")
+
+def construct():
+    from app.llm import LLM, get_tokenizer
+
+    llm = LLM()
+    if eager:
+        get_tokenizer(llm.model)
+
+def first_count():
+    from app.llm import LLM
+
+    LLM().count_tokens("Hello, world")
+
+phase("import", load)
+phase("construct", construct)
+phase("first_count", first_count)
+print(json.dumps(timings))
+"""
+
+
+def run_child(profile: str, module: str) -> Dict[str, object]:
+    """Run the phases in a fresh interpreter, timings in ms (errors as str)."""
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, profile, module],
+        cwd=ROOT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def time_interpreter() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(samples: List[Dict[str, object]], phase: str) -> str:
+    values = [sample[phase] for sample in samples]
+    errors = [value for value in values if isinstance(value, str)]
+    if errors:
+        return f"failed ({errors[0][:80]})"
+    return f"median {statistics.median(values):.1f} ms, min {min(values):.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="main", help="Entry point to import")
+    args = parser.parse_args()
+
+    print(f"interpreter start-up: {time_interpreter():.1f} ms (not included)")
+    medians: Dict[str, Dict[str, float]] = {}
+    for profile in ("eager", "lazy"):
+        # Warm the OS page cache once so the first sample is not an outlier
+        run_child(profile, args.module)
+        samples = [run_child(profile, args.module) for _ in range(args.runs)]
+        print(f"{profile}:")
+        for phase in PHASES:
+            print(f"  {phase:>11}: {summarize(samples, phase)}")
+        medians[profile] = {
+            phase: statistics.median(sample[phase] for sample in samples)
+            for phase in PHASES
+            if all(isinstance(sample[phase], float) for sample in samples)
+        }
+
+    for phase in PHASES:
+        if phase in medians["eager"] and phase in medians["lazy"]:
+            saved = medians["eager"][phase] - medians["lazy"][phase]
+            print(f"{phase} saved: {saved:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Hedged-request benchmark for the backend provider router.
+
+Two local stub providers answer in ``--base-ms`` but, with probability
+``--tail-prob``, stall for ``--tail-ms`` (the slow-DeepSeek case). The same
+request stream is run through the router with hedging disabled and enabled,
+and the latency distribution plus the extra load caused by hedging are
+reported. Hedging fires at the primary's p95, so it only cuts tails that
+are rarer than 5% of requests.
+
+Usage:
+    python examples/benchmarks/provider_hedging.py --requests 300
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
+
+from router import ProviderRouter
+
+
+def make_stub_provider(
+    name: str, base_ms: float, tail_ms: float, tail_prob: float, seed: int
+) -> Callable[[Dict[str, Any]], str]:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    calls = {"count": 0}
+
+    def parse(tx: Dict[str, Any]) -> str:
+        with lock:
+            calls["count"] += 1
+            slow = rng.random() < tail_prob
+            jitter = rng.uniform(0.8, 1.2)
+        time.sleep((tail_ms if slow else base_ms) * jitter / 1000)
+        return json.dumps({"action": "transfer", "provider": name, "confidence": 0.9})
+
+    parse.calls = calls  # type: ignore[attr-defined]
+    return parse
+
+
+def run(hedge: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    providers = {
+        "deepseek": make_stub_provider(
+            "deepseek", args.base_ms, args.tail_ms, args.tail_prob, seed=1
+        ),
+        "claude": make_stub_provider(
+            "claude", args.base_ms * 1.5, args.tail_ms, args.tail_prob, seed=2
+        ),
+    }
+    router = ProviderRouter(providers=providers, hedge=hedge, timeout=30)
+
+    latencies: List[float] = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        router.parse({"hash": f"0x{i:064x}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    upstream_calls = sum(p.calls["count"] for p in providers.values())
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+        "max": latencies[-1],
+        "extra_load": upstream_calls / args.requests - 1,
+        "hedge_wins": router.hedge_wins,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--base-ms", type=float, default=20)
+    parser.add_argument("--tail-ms", type=float, default=1000)
+    parser.add_argument("--tail-prob", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, base {args.base_ms} ms, "
+        f"{args.tail_prob:.0%} tail at {args.tail_ms} ms"
+    )
+    for hedge in (False, True):
+        result = run(hedge, args)
+        print(
+            f"hedge={'on ' if hedge else 'off'}  p50 {result['p50']:7.1f} ms  "
+            f"p95 {result['p95']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+            f"max {result['max']:7.1f} ms  extra load {result['extra_load']:.1%}  "
+            f"hedge wins {result['hedge_wins']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memory benchmark for loading and featurising long transaction histories.
+
+Fills a temporary SQLite ``transactions`` table with synthetic rows, then
+compares the list-based path (``SELECT *`` + ``fetchall`` + ``extract_features``)
+with the generator path from ``analysis_demo/loader.py`` (column projection,
+``fetchmany`` batches) feeding ``FeatureAccumulator``. Peak memory is the
+tracemalloc peak of Python allocations during each run (tracing also slows
+both paths down, so compare the timings with each other only).
+
+Usage:
+    python examples/benchmarks/streaming_loader.py --sizes 10000 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "analysis_demo"))
+sys.path.append(os.path.dirname(__file__))
+
+from features import FeatureAccumulator, extract_features
+from loader import ANALYSIS_COLUMNS, COLUMNS, iter_batches
+from synthetic import iter_transactions
+
+
+def build_database(path: str, n: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE transactions (hash TEXT PRIMARY KEY, from_addr TEXT, "
+        "to_addr TEXT, value TEXT, time INTEGER, raw_json TEXT, parsed_json TEXT)"
+    )
+    conn.execute("CREATE INDEX idx_transactions_time ON transactions (time)")
+    conn.executemany(
+        f"INSERT INTO transactions ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ([tx[column] for column in COLUMNS] for tx in iter_transactions(n)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_list(path: str, batch_size: int) -> Dict[str, Any]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM transactions ORDER BY time").fetchall()
+    conn.close()
+    return extract_features([dict(row) for row in rows])
+
+
+def load_stream(path: str, batch_size: int) -> Dict[str, Any]:
+    accumulator = FeatureAccumulator()
+    for batch in iter_batches(path, columns=ANALYSIS_COLUMNS, batch_size=batch_size):
+        accumulator.update(batch)
+    return accumulator.features()
+
+
+def measure(
+    fn: Callable[[str, int], Dict[str, Any]], path: str, batch_size: int
+) -> Tuple[float, float, Dict[str, Any]]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    features = fn(path, batch_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, features
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(
+        f"{'txs':>8} {'list s':>8} {'list MiB':>9} {'stream s':>9} "
+        f"{'stream MiB':>11} {'memory':>8} {'median list/stream':>20}"
+    )
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transactions.db")
+            build_database(path, n)
+            list_s, list_mib, list_features = measure(load_list, path, args.batch_size)
+            stream_s, stream_mib, stream_features = measure(
+                load_stream, path, args.batch_size
+            )
+
+        list_median = list_features["size_distribution_eth"]["median"]
+        stream_median = stream_features["size_distribution_eth"]["median"]
+        print(
+            f"{n:>8} {list_s:>8.2f} {list_mib:>9.1f} {stream_s:>9.2f} "
+            f"{stream_mib:>11.1f} {stream_mib / list_mib:>8.1%} "
+            f"{list_median:>9.4f}/{stream_median:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
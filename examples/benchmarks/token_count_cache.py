@@ -0,0 +1,120 @@
+"""
+Per-step token counting cost of ``LLM.ask_tool`` over a growing agent history.
+
+Builds a ``ToolCallAgent``-style history (one assistant tool call plus one
+tool observation of ``--observation-kb`` per step) and, at every step, formats
+the whole history and counts it the way ``ask_tool`` does. ``uncached`` uses a
+``TokenCounter`` with the text cache disabled (every step re-encodes every
+observation); ``cached`` uses the default counter, which encodes each
+observation once.
+
+Token counts use tiktoken's cl100k_base when its encoding file is available
+and fall back to a regex word/punctuation splitter of similar cost otherwise.
+
+Usage:
+    python examples/benchmarks/token_count_cache.py --steps 100 --observation-kb 50
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+from typing import List
+
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.llm import LLM, TokenCounter
+from app.schema import Function, Message, ToolCall
+
+
+class RegexTokenizer:
+    pattern = re.compile(r"\w+|[^\w\s]")
+
+    def encode(self, text: str) -> List[str]:
+        return self.pattern.findall(text)
+
+
+def get_tokenizer():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return RegexTokenizer()
+
+
+def make_observation(size: int, rng: random.Random) -> str:
+    alphabet = string.ascii_letters + string.digits + "  \n{}:,\"'"
+    return "".join(rng.choice(alphabet) for _ in range(size))
+
+
+def make_step(step: int, observation: str) -> List[Message]:
+    call_id = f"call_{step}"
+    return [
+        Message.from_tool_calls(
+            tool_calls=[
+                ToolCall(
+                    id=call_id,
+                    function=Function(
+                        name="browser_use", arguments='{"action": "extract_content"}'
+                    ),
+                )
+            ],
+            content=f"Step {step}: reading the page",
+        ),
+        Message.tool_message(observation, name="browser_use", tool_call_id=call_id),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--observation-kb", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    counters = {
+        "uncached": TokenCounter(tokenizer, cache_max_chars=0),
+        "cached": TokenCounter(tokenizer),
+    }
+    rng = random.Random(args.seed)
+    # A few random bodies keep setup fast; the step prefix makes every
+    # observation distinct.
+    pool = [make_observation(args.observation_kb * 1024, rng) for _ in range(8)]
+
+    history = [Message.system_message("You are a browsing agent.")]
+    report_steps = {1, 10, args.steps // 2, args.steps}
+    totals = {name: 0.0 for name in counters}
+    print(f"tokenizer: {type(tokenizer).__name__}")
+    print(
+        f"{'step':>5} {'messages':>9} {'tokens':>9} {'uncached ms':>12} {'cached ms':>10}"
+    )
+    for step in range(1, args.steps + 1):
+        observation = f"[step {step}] " + pool[step % len(pool)]
+        history += make_step(step, observation)
+        per_step = {}
+        for name, counter in counters.items():
+            start = time.perf_counter()
+            tokens = counter.count_message_tokens(LLM.format_messages(history))
+            per_step[name] = (time.perf_counter() - start) * 1000
+            totals[name] += per_step[name]
+        if step in report_steps:
+            print(
+                f"{step:>5} {len(history):>9} {tokens:>9} "
+                f"{per_step['uncached']:>12.1f} {per_step['cached']:>10.2f}"
+            )
+
+    print(
+        f"total over {args.steps} steps: uncached {totals['uncached'] / 1000:.2f} s, "
+        f"cached {totals['cached'] / 1000:.3f} s "
+        f"({totals['uncached'] / max(totals['cached'], 1e-9):.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
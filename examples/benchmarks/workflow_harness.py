@@ -0,0 +1,239 @@
+"""
+Workflow benchmark harness with a deterministic fake LLM.
+
+Replaces ``call_claude`` / ``call_deepseek`` in the analysis_demo agents with a
+local fake. The fake answers every agent with the JSON example embedded in
+that agent's own prompt, so replies always match the schema the agent asks
+for. It sleeps ``--latency-ms`` (plus prompt tokens / ``--prefill-tps`` when
+set) and pads the summary to about ``--output-tokens``. Each history size runs
+``AnalysisWorkflow.execute_workflow`` in a fresh process so that peak RSS is
+per size.
+
+Reported per size: wall time, LLM calls, prompt and output tokens, peak RSS,
+and per-stage timings. Stages are the summed feature/prompt building time
+across agent calls, the map-reduce phase, and each DAG node's duration from
+``metadata.agent_status``. ``--json`` writes the raw numbers for regression
+tracking.
+
+Usage:
+    python examples/benchmarks/workflow_harness.py --sizes 10 1000 100000
+    python examples/benchmarks/workflow_harness.py --provider deepseek --json out.json
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYSIS_DEMO_DIR = os.path.join(BENCHMARK_DIR, "..", "..", "analysis_demo")
+STAGES = [
+    "features",
+    "map_reduce",
+    "position_agent",
+    "signal_agent",
+    "industry_agent",
+    "advisor_agent",
+]
+
+
+def example_reply(prompt: str, output_tokens: int) -> str:
+    """The JSON example from the agent prompt, summary padded to the token target."""
+    example = prompt[prompt.rfind("示例输出格式") :]
+    try:
+        reply = json.loads(example[example.index("{") : example.rindex("}") + 1])
+    except ValueError:
+        return "{}"
+    if "summary" in reply:
+        # About four characters per token.
+        padding = max(0, output_tokens * 4 - len(json.dumps(reply)))
+        reply["summary"] += " " + "x" * padding
+    return json.dumps(reply, ensure_ascii=False)
+
+
+class FakeLLM:
+    """Drop-in for ``call_claude`` / ``call_deepseek``; thread-safe and deterministic."""
+
+    def __init__(
+        self,
+        provider: str,
+        count_tokens: Callable[[str], int],
+        latency: float,
+        output_tokens: int,
+        prefill_tps: float,
+    ):
+        self.provider = provider
+        self.count_tokens = count_tokens
+        self.latency = latency
+        self.output_tokens = output_tokens
+        self.prefill_tps = prefill_tps
+
+    def __call__(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        use_cache: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        from usage import get_usage_meter
+
+        prompt_tokens = self.count_tokens(system_prompt + prompt)
+        delay = self.latency
+        if self.prefill_tps > 0:
+            delay += prompt_tokens / self.prefill_tps
+        time.sleep(delay)
+
+        reply = example_reply(prompt, self.output_tokens)
+        get_usage_meter().record(
+            self.provider, "fake", prompt_tokens, self.output_tokens
+        )
+        if on_token is not None:
+            for start in range(0, len(reply), 64):
+                on_token(reply[start : start + 64])
+        return reply
+
+
+class StageTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.seconds[stage] = (
+                        self.seconds.get(stage, 0.0) + time.perf_counter() - start
+                    )
+
+        return timed
+
+
+def run_size(n: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one workflow over ``n`` synthetic transactions (in a worker process)."""
+    os.environ.setdefault(
+        "LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "llm_cache.db")
+    )
+    sys.path.append(ANALYSIS_DEMO_DIR)
+    sys.path.append(BENCHMARK_DIR)
+
+    import workflow
+    from feature_prompt_size import get_token_counter
+    from synthetic import make_transactions
+    from usage import get_usage_meter
+
+    provider = options["provider"]
+    if provider == "deepseek":
+        import agents_deepseek as agents_module
+
+        call_name = "call_deepseek"
+    else:
+        import agents as agents_module
+
+        call_name = "call_claude"
+
+    timer = StageTimer()
+    fake = FakeLLM(
+        provider,
+        get_token_counter(),
+        options["latency_ms"] / 1000,
+        options["output_tokens"],
+        options["prefill_tps"],
+    )
+    setattr(agents_module, call_name, fake)
+    agents_module.format_agent_context = timer.wrap(
+        "features", agents_module.format_agent_context
+    )
+    workflow.map_reduce_analysis = timer.wrap(
+        "map_reduce", workflow.map_reduce_analysis
+    )
+
+    txs = make_transactions(n)
+    instance = workflow.create_workflow_instance(provider)
+    get_usage_meter().reset()
+
+    # The workflow's progress prints would interleave with the table.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        results = instance.execute_workflow(txs, mode=options["mode"])
+        wall = time.perf_counter() - start
+
+    metadata = results["metadata"]
+    stages = dict(timer.seconds)
+    for name, status in metadata.get("agent_status", {}).items():
+        stages[name] = status["duration"]
+    usage = get_usage_meter().snapshot().get(f"{provider}/fake", {})
+    return {
+        "transactions": n,
+        "mode": metadata.get("mode"),
+        "status": metadata.get("status"),
+        "wall_seconds": round(wall, 3),
+        "llm_calls": usage.get("calls", 0),
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        # ru_maxrss is in KiB on Linux.
+        "peak_rss_mib": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "stages": {stage: round(stages.get(stage, 0.0), 3) for stage in STAGES},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--provider", choices=["claude", "deepseek"], default="claude")
+    parser.add_argument(
+        "--mode", choices=["auto", "single", "mapreduce"], default="auto"
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument(
+        "--prefill-tps",
+        type=float,
+        default=0.0,
+        help="add prompt_tokens / prefill_tps seconds per call (0 disables)",
+    )
+    parser.add_argument("--json", help="write the raw results to this file")
+    args = parser.parse_args()
+    options = vars(args)
+
+    print(
+        f"{'txs':>7} {'mode':>9} {'wall s':>7} {'calls':>6} {'prompt tok':>11} "
+        f"{'output tok':>11} {'peak MiB':>9}  "
+        + " ".join(f"{stage:>14}" for stage in STAGES)
+    )
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for n in args.sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            row = pool.submit(run_size, n, options).result()
+        rows.append(row)
+        print(
+            f"{n:>7} {row['mode']:>9} {row['wall_seconds']:>7.2f} "
+            f"{row['llm_calls']:>6} {row['prompt_tokens']:>11} "
+            f"{row['output_tokens']:>11} {row['peak_rss_mib']:>9.1f}  "
+            + " ".join(f"{row['stages'][stage]:>14.3f}" for stage in STAGES)
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
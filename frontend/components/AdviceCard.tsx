@@ -48,9 +48,25 @@ interface AdviceCardProps {
   analysisResult: AnalysisResult | null
   onRefresh: () => void
   loading: boolean
+  agentStatus?: Record<string, string>
+  advisorStream?: string
 }
 
-const AdviceCard: React.FC<AdviceCardProps> = ({ analysisResult, onRefresh, loading }) => {
+// 标签页 -> 工作流中的Agent名称
+const TAB_AGENTS: Record<string, string> = {
+  advisor: 'advisor_agent',
+  position: 'position_agent',
+  signal: 'signal_agent',
+  industry: 'industry_agent'
+}
+
+const AdviceCard: React.FC<AdviceCardProps> = ({
+  analysisResult,
+  onRefresh,
+  loading,
+  agentStatus = {},
+  advisorStream = ''
+}) => {
   const [activeTab, setActiveTab] = useState<'advisor' | 'position' | 'signal' | 'industry'>('advisor')
 
   const getRecommendationColor = (recommendation?: string): string => {
@@ -106,6 +122,35 @@ const AdviceCard: React.FC<AdviceCardProps> = ({ analysisResult, onRefresh, load
     return `${rating.toFixed(1)}/10`
   }
 
+  // 流式分析中尚未返回结果的部分
+  const renderPending = (tab: string) => {
+    const status = agentStatus[TAB_AGENTS[tab]]
+    if (!loading && !status) return null
+    if (status && status !== 'running' && status !== 'completed') {
+      return (
+        <p className="text-sm text-accent-red py-4">
+          该部分分析未完成（{status}）
+        </p>
+      )
+    }
+    if (tab === 'advisor' && advisorStream) {
+      return (
+        <div>
+          <span className="text-dark-text-secondary text-sm">正在生成投资建议...</span>
+          <pre className="text-dark-text text-xs mt-2 whitespace-pre-wrap break-all">
+            {advisorStream}
+          </pre>
+        </div>
+      )
+    }
+    return (
+      <div className="flex items-center space-x-2 py-4 text-dark-text-secondary text-sm">
+        <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-accent-blue"></div>
+        <span>{status === 'running' ? '分析中...' : '排队中...'}</span>
+      </div>
+    )
+  }
+
   if (!analysisResult) {
     return (
       <div className="card">
@@ -163,12 +208,20 @@ const AdviceCard: React.FC<AdviceCardProps> = ({ analysisResult, onRefresh, load
             }`}
           >
             {label}
+            {agentStatus[TAB_AGENTS[key]] === 'running' && (
+              <span className="ml-1 inline-block h-2 w-2 rounded-full bg-accent-blue animate-pulse"></span>
+            )}
           </button>
         ))}
       </div>
 
       {/* Tab Content */}
       <div className="space-y-4">
+        {activeTab === 'advisor' && !advisor_analysis && renderPending('advisor')}
+        {activeTab === 'position' && !position_analysis && renderPending('position')}
+        {activeTab === 'signal' && !signal_analysis && renderPending('signal')}
+        {activeTab === 'industry' && !industry_analysis && renderPending('industry')}
+
         {activeTab === 'advisor' && advisor_analysis && (
           <div className="space-y-4">
             <div className="grid grid-cols-2 gap-4">
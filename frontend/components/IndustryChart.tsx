@@ -23,9 +23,10 @@ interface AnalysisResult {
 
 interface IndustryChartProps {
     analysisResult: AnalysisResult | null
+    pending?: boolean
 }
 
-const IndustryChart: React.FC<IndustryChartProps> = ({ analysisResult }) => {
+const IndustryChart: React.FC<IndustryChartProps> = ({ analysisResult, pending = false }) => {
     // 示例数据 - 当没有真实分析结果时使用
     const sampleSectorData = [
         { name: 'DeFi', value: 45, color: '#3b82f6' },
@@ -173,6 +174,14 @@ const IndustryChart: React.FC<IndustryChartProps> = ({ analysisResult }) => {
 
     return (
         <div className="space-y-8">
+            {/* 流式分析中，行业分析完成前先显示示例数据 */}
+            {pending && (
+                <div className="flex items-center space-x-2 text-sm text-dark-text-secondary">
+                    <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-accent-blue"></div>
+                    <span>行业分析进行中，完成后图表将自动更新</span>
+                </div>
+            )}
+
             {/* 行业分布饼图 */}
             <div>
                 <h3 className="text-lg font-semibold text-dark-text mb-4">
@@ -305,7 +314,7 @@ const IndustryChart: React.FC<IndustryChartProps> = ({ analysisResult }) => {
                     数据说明
                 </h4>
                 <p className="text-sm text-dark-text-secondary">
-                    {analysisResult
+                    {analysisResult?.industry_analysis
                         ? "以上图表基于实际交易数据分析生成，反映了您的投资组合在行业和生态系统中的分布情况。"
                         : "以上图表为示例数据，实际使用时将基于您的交易记录生成真实的分析结果。"
                     }
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import Head from 'next/head'
 import TxTable from '../components/TxTable'
 import AdviceCard from '../components/AdviceCard'
@@ -27,6 +27,10 @@ export default function Dashboard() {
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  const [streaming, setStreaming] = useState(false)
+  const [agentStatus, setAgentStatus] = useState<Record<string, string>>({})
+  const [advisorStream, setAdvisorStream] = useState('')
+  const eventSourceRef = useRef<EventSource | null>(null)
 
   const fetchTransactions = async () => {
     try {
@@ -59,15 +63,64 @@ export default function Dashboard() {
     }
   }
 
-  const refreshAnalysis = async () => {
-    setLoading(true)
-    try {
-      // 这里可以调用后端API重新运行分析
-      await fetchAnalysisResult()
-    } catch (err) {
-      console.error('Refresh analysis error:', err)
-    } finally {
-      setLoading(false)
+  const closeAnalysisStream = () => {
+    eventSourceRef.current?.close()
+    eventSourceRef.current = null
+    setStreaming(false)
+  }
+
+  // 重新运行分析：通过SSE接收进度，每个Agent完成后立即显示对应部分
+  const refreshAnalysis = () => {
+    closeAnalysisStream()
+    setError(null)
+    setAgentStatus({})
+    setAdvisorStream('')
+    setAnalysisResult({})
+    setStreaming(true)
+
+    const address = analysisResult?.metadata?.address
+    const url = address
+      ? `http://localhost:8000/analysis/stream?address=${address}`
+      : 'http://localhost:8000/analysis/stream'
+    const eventSource = new EventSource(url)
+    eventSourceRef.current = eventSource
+
+    eventSource.onmessage = (message) => {
+      const event = JSON.parse(message.data)
+      switch (event.type) {
+        case 'agent_started':
+          setAgentStatus(prev => ({ ...prev, [event.agent]: 'running' }))
+          break
+        case 'agent_finished':
+          setAgentStatus(prev => ({ ...prev, [event.agent]: event.status }))
+          if (event.result) {
+            setAnalysisResult(prev => ({ ...(prev || {}), [event.result_key]: event.result }))
+          }
+          break
+        case 'advisor_token':
+          setAdvisorStream(prev => prev + event.text)
+          break
+        case 'workflow_finished':
+          setAnalysisResult(event.result)
+          break
+        case 'analysis_saved':
+          setAnalysisResult(prev => prev && {
+            ...prev,
+            metadata: { ...prev.metadata, address: event.address, version: event.version }
+          })
+          closeAnalysisStream()
+          break
+        case 'error':
+          setError(`分析失败: ${event.message}`)
+          closeAnalysisStream()
+          break
+      }
+    }
+
+    // EventSource断开后会自动重连（会再次触发分析），因此出错时直接关闭
+    eventSource.onerror = () => {
+      console.error('Analysis stream error')
+      closeAnalysisStream()
     }
   }
 
@@ -82,6 +135,8 @@ export default function Dashboard() {
     }
 
     loadData()
+
+    return () => eventSourceRef.current?.close()
   }, [])
 
   if (loading) {
@@ -127,9 +182,9 @@ export default function Dashboard() {
                 <button
                   onClick={refreshAnalysis}
                   className="btn-primary"
-                  disabled={loading}
+                  disabled={streaming}
                 >
-                  {loading ? '分析中...' : '刷新分析'}
+                  {streaming ? '分析中...' : '刷新分析'}
                 </button>
               </div>
             </div>
@@ -161,7 +216,9 @@ export default function Dashboard() {
               <AdviceCard
                 analysisResult={analysisResult}
                 onRefresh={refreshAnalysis}
-                loading={loading}
+                loading={streaming}
+                agentStatus={agentStatus}
+                advisorStream={advisorStream}
               />
             </div>
           </div>
@@ -171,7 +228,10 @@ export default function Dashboard() {
             <h2 className="text-xl font-semibold text-dark-text mb-4">
               行业资金流分析
             </h2>
-            <IndustryChart analysisResult={analysisResult} />
+            <IndustryChart
+              analysisResult={analysisResult}
+              pending={streaming && !analysisResult?.industry_analysis}
+            />
           </div>
         </main>
 
@@ -3,6 +3,8 @@ import asyncio
 
 from app.agent.manus import Manus
 from app.logger import logger
+from app.telemetry import telemetry
+from app.transport import close_http_clients, start_warm_up
 
 
 async def main():
@@ -13,6 +15,9 @@ async def main():
     )
     args = parser.parse_args()
 
+    # Open the LLM connections while the agent starts up
+    start_warm_up()
+
     # Create and initialize Manus agent
     agent = await Manus.create()
     try:
@@ -30,6 +35,8 @@ async def main():
     finally:
         # Ensure agent resources are cleaned up before exiting
         await agent.cleanup()
+        await close_http_clients()
+        telemetry.log_summary()
 
 
 if __name__ == "__main__":
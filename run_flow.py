@@ -6,9 +6,12 @@ from app.agent.manus import Manus
 from app.config import config
 from app.flow.flow_factory import FlowFactory, FlowType
 from app.logger import logger
+from app.telemetry import telemetry
+from app.transport import close_http_clients, start_warm_up
 
 
 async def run_flow():
+    start_warm_up()
     agents = {
         "manus": Manus(),
     }
@@ -46,6 +49,9 @@ async def run_flow():
         logger.info("Operation cancelled by user.")
     except Exception as e:
         logger.error(f"Error: {str(e)}")
+    finally:
+        await close_http_clients()
+        telemetry.log_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+import os
+import sys
+
+
+# analysis_demo modules import each other and backend modules as top-level
+# modules (e.g. ``import db``)
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "analysis_demo"))
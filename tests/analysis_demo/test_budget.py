@@ -0,0 +1,96 @@
+import json
+
+import budget
+import pytest
+from budget import (
+    BudgetExceededError,
+    estimate_run_tokens,
+    plan_budget,
+    plan_stream_budget,
+    token_limit,
+)
+from features import DEFAULT_SAMPLE_SIZE
+
+
+@pytest.fixture(autouse=True)
+def character_tokens(monkeypatch):
+    # Deterministic counts without the tiktoken download
+    monkeypatch.setattr(budget, "_token_counter", lambda text: max(1, len(text) // 4))
+
+
+def make_txs(count: int):
+    return [
+        {
+            "hash": f"0x{i:064x}",
+            "from_addr": "0xabc",
+            "to_addr": f"0x{i:040x}",
+            "value": str(10**18 + i),
+            "time": 1_700_000_000 + i,
+            "parsed_json": json.dumps({"action": "transfer", "token": "ETH"}),
+        }
+        for i in range(count)
+    ]
+
+
+TXS = make_txs(400)
+INPUTS = {"position_agent": TXS, "signal_agent": TXS, "industry_agent": TXS}
+
+
+def test_token_limit_takes_the_tighter_budget():
+    assert token_limit(0, run_budget=0, address_budget=0) is None
+    assert token_limit(0, run_budget=1000, address_budget=0) == 1000
+    assert token_limit(900, run_budget=1000, address_budget=1500) == 600
+    assert token_limit(2000, run_budget=1000, address_budget=1500) == 0
+
+
+def test_shared_inputs_are_counted_per_mode():
+    single = estimate_run_tokens(INPUTS, "single")
+    mapreduce = estimate_run_tokens(INPUTS, "mapreduce")
+
+    assert mapreduce > single
+    # Same list for every agent: three calls with one context each
+    one_agent = estimate_run_tokens({"position_agent": TXS}, "single", advisor=False)
+    assert single == 3 * one_agent + (
+        budget.ADVISOR_PROMPT_TOKENS + budget.EXPECTED_OUTPUT_TOKENS
+    )
+
+
+def test_no_limit_keeps_requested_mode():
+    plan = plan_budget(INPUTS, "mapreduce", None)
+
+    assert (plan["mode"], plan["sample_size"], plan["degraded"]) == (
+        "mapreduce",
+        DEFAULT_SAMPLE_SIZE,
+        False,
+    )
+
+
+def test_over_budget_falls_back_to_single_then_fewer_samples():
+    estimates = {
+        size: estimate_run_tokens(INPUTS, "single", size)
+        for size in budget.FALLBACK_SAMPLE_SIZES
+    }
+
+    plan = plan_budget(INPUTS, "mapreduce", estimates[DEFAULT_SAMPLE_SIZE])
+    assert (plan["mode"], plan["sample_size"], plan["degraded"]) == (
+        "single",
+        DEFAULT_SAMPLE_SIZE,
+        True,
+    )
+
+    plan = plan_budget(INPUTS, "single", estimates[0])
+    assert (plan["mode"], plan["sample_size"]) == ("single", 0)
+    assert plan["estimated_tokens"] <= plan["token_limit"]
+
+    with pytest.raises(BudgetExceededError) as error:
+        plan_budget(INPUTS, "single", estimates[0] - 1)
+    assert error.value.estimated_tokens == estimates[0]
+
+
+def test_stream_budget_rejects_runs_it_cannot_shrink():
+    plan = plan_stream_budget(TXS[:50], total=10_000, limit=None)
+    assert plan["mode"] == "mapreduce-stream" and plan["estimated_tokens"] > 0
+
+    with pytest.raises(BudgetExceededError):
+        plan_stream_budget(TXS[:50], total=10_000, limit=plan["estimated_tokens"] - 1)
+    assert plan_stream_budget([], total=None, limit=0)["estimated_tokens"] == 0
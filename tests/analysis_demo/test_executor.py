@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+from executor import COMPLETED, FAILED, SKIPPED, TIMEOUT, DAGExecutor, topological_order
+
+
+def test_topological_order_rejects_unknown_nodes_and_cycles():
+    assert topological_order(["c", "a", "b"], {"c": ["a", "b"]}) == ["a", "b", "c"]
+
+    with pytest.raises(ValueError):
+        topological_order(["a"], {"a": ["missing"]})
+    with pytest.raises(ValueError):
+        topological_order(["a", "b"], {"a": ["b"], "b": ["a"]})
+
+
+def test_independent_nodes_run_concurrently_and_pass_outputs_downstream():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def leaf(value):
+        def run(upstream):
+            barrier.wait()  # Deadlocks unless both leaves run at once
+            return value
+
+        return run
+
+    executor = DAGExecutor(["a", "b", "sum"], {"sum": ["a", "b"]})
+    results = executor.run(
+        {"a": leaf(1), "b": leaf(2), "sum": lambda upstream: sum(upstream.values())}
+    )
+
+    assert {node: result["status"] for node, result in results.items()} == {
+        "a": COMPLETED,
+        "b": COMPLETED,
+        "sum": COMPLETED,
+    }
+    assert results["sum"]["output"] == 3
+
+
+def test_failure_skips_dependents_but_not_independent_nodes():
+    def broken(upstream):
+        raise RuntimeError("boom")
+
+    executor = DAGExecutor(["a", "b", "c", "d"], {"b": ["a"], "c": ["b"], "d": []})
+    finished = []
+    results = executor.run(
+        {
+            "a": broken,
+            "b": lambda upstream: "b",
+            "c": lambda upstream: "c",
+            "d": lambda upstream: "d",
+        },
+        on_finish=lambda node, result: finished.append(node),
+    )
+
+    assert results["a"]["status"] == FAILED and results["a"]["error"] == "boom"
+    assert results["b"]["status"] == SKIPPED
+    assert results["c"]["status"] == SKIPPED
+    assert (results["d"]["status"], results["d"]["output"]) == (COMPLETED, "d")
+    assert sorted(finished) == ["a", "b", "c", "d"]
+
+
+def test_slow_node_times_out_without_waiting_for_its_thread():
+    release = threading.Event()
+
+    def slow(upstream):
+        release.wait(5)
+        return "late"
+
+    executor = DAGExecutor(
+        ["slow", "fast", "after"],
+        {"after": ["slow"]},
+        timeouts={"slow": 0.05},
+        default_timeout=5,
+    )
+    start = time.perf_counter()
+    try:
+        results = executor.run(
+            {"slow": slow, "fast": lambda upstream: "ok", "after": lambda u: "x"}
+        )
+    finally:
+        release.set()
+
+    assert time.perf_counter() - start < 2
+    assert results["slow"]["status"] == TIMEOUT and results["slow"]["output"] is None
+    assert results["fast"]["status"] == COMPLETED
+    assert results["after"]["status"] == SKIPPED
+
+
+def test_missing_node_function_is_rejected():
+    with pytest.raises(ValueError):
+        DAGExecutor(["a", "b"]).run({"a": lambda upstream: None})
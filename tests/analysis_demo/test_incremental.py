@@ -0,0 +1,55 @@
+from incremental import DELTA, FULL, UNCHANGED, fingerprint, make_record, plan_agent
+
+
+AGENT = "position_agent"
+PREVIOUS = {"confidence": 0.5}
+
+
+def tx(hash_: str, time: int):
+    return {"hash": hash_, "time": str(time)}
+
+
+HISTORY = [tx("0x1", 100), tx("0x2", 200)]
+
+
+def test_fingerprint_ignores_order_but_not_provider():
+    assert fingerprint(HISTORY, AGENT) == fingerprint(HISTORY[::-1], AGENT)
+    assert fingerprint(HISTORY, AGENT, "claude") != fingerprint(
+        HISTORY, AGENT, "deepseek"
+    )
+
+
+def test_same_transactions_are_unchanged():
+    plan = plan_agent(HISTORY, AGENT, make_record(HISTORY, AGENT), PREVIOUS)
+
+    assert plan["action"] == UNCHANGED
+    assert plan["record"]["watermark"] == 200
+
+
+def test_transactions_after_watermark_are_a_delta():
+    txs = HISTORY + [tx("0x3", 300), tx("0x4", 400)]
+
+    plan = plan_agent(txs, AGENT, make_record(HISTORY, AGENT), PREVIOUS)
+
+    assert plan["action"] == DELTA
+    assert [t["hash"] for t in plan["delta"]] == ["0x3", "0x4"]
+    assert plan["record"] == make_record(txs, AGENT)
+
+
+def test_backfilled_transaction_forces_full_run():
+    # A transaction at or before the watermark changes the analysed history
+    txs = HISTORY + [tx("0x0", 150), tx("0x3", 300)]
+
+    plan = plan_agent(txs, AGENT, make_record(HISTORY, AGENT), PREVIOUS)
+
+    assert plan["action"] == FULL and plan["delta"] == []
+
+
+def test_failed_or_missing_previous_result_forces_full_run():
+    record = make_record(HISTORY, AGENT)
+
+    assert plan_agent(HISTORY, AGENT, None, PREVIOUS)["action"] == FULL
+    assert plan_agent(HISTORY, AGENT, record, None)["action"] == FULL
+    assert plan_agent(HISTORY, AGENT, record, {"error": "x"})["action"] == FULL
+    # Another provider's record does not match
+    assert plan_agent(HISTORY, AGENT, record, PREVIOUS, "deepseek")["action"] == FULL
@@ -0,0 +1,60 @@
+import json
+
+import db
+import pytest
+from loader import build_query, count_transactions, iter_batches, iter_transactions
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "transactions.db")
+    monkeypatch.setattr(db, "DATABASE_PATH", path)
+    db.init_database()
+    for i in range(5):
+        db.insert_transaction(
+            {
+                "hash": f"0x{i}",
+                "from": "0xABC" if i % 2 else "0xdef",
+                "to": "0x123",
+                "value": str(10**18),
+                "timeStamp": 100 * (5 - i),  # Inserted newest first
+                "raw_json": "{}",
+                "parsed_json": json.dumps({"action": "swap"}) if i == 0 else "",
+            }
+        )
+    return path
+
+
+def test_batches_are_time_ordered_and_bounded(db_path):
+    batches = list(iter_batches(db_path, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    times = [tx["time"] for batch in batches for tx in batch]
+    assert times == [100, 200, 300, 400, 500]
+
+    newest = next(iter_batches(db_path, order="desc", limit=1))
+    assert [tx["hash"] for tx in newest] == ["0x0"]
+
+
+def test_filters_are_pushed_down_to_sql(db_path):
+    txs = list(iter_transactions(db_path, address="0xAbC", start_time=200))
+
+    assert [tx["hash"] for tx in txs] == ["0x3", "0x1"]
+    assert count_transactions(db_path, address="0xabc") == 2
+    assert count_transactions(db_path, end_time=300) == 2
+
+
+def test_missing_parsed_json_is_filled_only_when_selected(db_path):
+    txs = list(iter_transactions(db_path))
+    assert json.loads(txs[-1]["parsed_json"]) == {"action": "swap"}
+    assert json.loads(txs[0]["parsed_json"])["action"] == "transfer"
+
+    projected = list(iter_transactions(db_path, columns=["hash", "time"]))
+    assert set(projected[0]) == {"hash", "time"}
+
+
+def test_build_query_rejects_unknown_columns_and_order():
+    with pytest.raises(ValueError):
+        build_query(columns=["hash", "secret"])
+    with pytest.raises(ValueError):
+        build_query(order="sideways")
@@ -0,0 +1,159 @@
+import threading
+
+from executor import FAILED, TIMEOUT
+from mapreduce import ChunkReducer, map_reduce_analysis, plan_chunks
+from workflow import AnalysisWorkflow
+
+
+WEI = 10**18
+
+
+def make_txs(count: int):
+    return [
+        {
+            "hash": f"0x{i:04x}",
+            "from_addr": "0xabc",
+            "to_addr": "0xdef",
+            "value": str(WEI),
+            "time": 1_700_000_000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def test_plan_chunks_respects_token_budget_and_chunk_limit():
+    assert plan_chunks(100, tokens_per_tx=10, token_budget=200) == (20, 20)
+    # Too many chunks: chunks grow, the prompt sample stays within budget
+    assert plan_chunks(1000, tokens_per_tx=10, token_budget=200, max_chunks=10) == (
+        100,
+        20,
+    )
+    # Unknown total, or no chunk limit, keeps budget-sized chunks
+    assert plan_chunks(None, tokens_per_tx=10, token_budget=200) == (20, 20)
+    assert plan_chunks(1000, 10, 200, max_chunks=None) == (20, 20)
+    assert plan_chunks(10, tokens_per_tx=500, token_budget=200) == (1, 1)
+
+
+def test_reducer_weights_numbers_and_votes_categories_by_tx_count():
+    reducer = ChunkReducer("signal_agent")
+    reducer.add(
+        0,
+        {"confidence": 0.2, "market_sentiment": "bearish", "signals": ["a"]},
+        tx_count=30,
+        features={"volume": {"total_eth": 1.0}},
+    )
+    reducer.add(
+        1,
+        {"confidence": 0.8, "market_sentiment": "bullish", "signals": ["b"]},
+        tx_count=10,
+        features={"volume": {"total_eth": 9.0}},
+    )
+    reducer.add(2, {"error": "boom"}, tx_count=5, features={})
+
+    result = reducer.result()
+    assert result["confidence"] == 0.35
+    assert result["market_sentiment"] == "bearish"
+    assert result["signals"] == ["a", "b"]
+    assert result["volume_trend"] == "increasing"
+    assert result["chunk_stats"] == {"completed": 2, "failed": 1}
+    assert "error" not in result
+
+
+def test_reducer_reports_error_when_every_chunk_fails():
+    reducer = ChunkReducer("position_agent")
+    reducer.add(0, {"error": "boom"}, tx_count=3, features={})
+
+    result = reducer.result()
+    assert result["error"] and result["confidence"] == 0.0
+
+
+def test_map_reduce_runs_every_chunk_through_each_agent():
+    seen = []
+    lock = threading.Lock()
+
+    def agent(chunk, sample_size):
+        with lock:
+            seen.extend(tx["hash"] for tx in chunk)
+        return {"confidence": 1.0}
+
+    results = map_reduce_analysis(
+        iter(make_txs(60)),
+        {"position_agent": agent},
+        total=60,
+        token_budget=1,  # One-row chunks, grown to 10 rows by the chunk limit
+        max_chunks=6,
+    )
+
+    assert sorted(seen) == [tx["hash"] for tx in make_txs(60)]
+    assert results["position_agent"]["chunk_stats"]["completed"] == 6
+
+
+def test_mapreduce_mode_runs_inside_workflow_nodes():
+    release = threading.Event()
+
+    def analysis(chunk, sample_size, previous=None):
+        return {"confidence": 0.5}
+
+    def slow_industry(chunk, sample_size, previous=None):
+        release.wait(5)
+        return {"confidence": 0.5}
+
+    workflow = AnalysisWorkflow(
+        agent_functions={
+            "position_agent": analysis,
+            "signal_agent": analysis,
+            "industry_agent": slow_industry,
+            "advisor_agent": lambda *results, **kwargs: {"overall_rating": 5},
+        }
+    )
+    workflow.workflow_config["agents"][2]["timeout"] = 0.1
+    events = []
+    try:
+        results = workflow.execute_workflow(
+            make_txs(20), mode="mapreduce", on_event=events.append
+        )
+    finally:
+        release.set()
+
+    started = [event["agent"] for event in events if event["type"] == "agent_started"]
+    assert set(started) == {"position_agent", "signal_agent", "industry_agent"}
+    assert results["position_analysis"]["chunk_stats"]["completed"] >= 1
+    agent_status = results["metadata"]["agent_status"]
+    assert agent_status["industry_agent"]["status"] == TIMEOUT
+    assert results["metadata"]["status"] == "partial"
+
+
+def test_agent_error_result_marks_node_failed_and_run_partial():
+    def analysis(txs, sample_size, previous=None):
+        return {"confidence": 0.5}
+
+    def failing_signal(txs, sample_size, previous=None):
+        # Agents catch LLM errors and return a fallback result with an error field
+        return {"confidence": 0.0, "error": "rate limited"}
+
+    workflow = AnalysisWorkflow(
+        agent_functions={
+            "position_agent": analysis,
+            "signal_agent": failing_signal,
+            "industry_agent": analysis,
+            "advisor_agent": lambda *results, **kwargs: {"overall_rating": 5},
+        }
+    )
+    events = []
+    results = workflow.execute_workflow(
+        make_txs(5), mode="single", on_event=events.append
+    )
+
+    metadata = results["metadata"]
+    assert metadata["status"] == "partial"
+    assert metadata["agent_status"]["signal_agent"]["status"] == FAILED
+    assert metadata["agent_status"]["signal_agent"]["error"] == "rate limited"
+    # The advisor saw the fallback result, so neither is reused next time
+    assert set(metadata["fingerprints"]) == {"position_agent", "industry_agent"}
+    assert results["signal_analysis"]["error"] == "rate limited"
+    finished = {
+        event["agent"]: event["status"]
+        for event in events
+        if event["type"] == "agent_finished"
+    }
+    assert finished["signal_agent"] == FAILED
@@ -0,0 +1,53 @@
+import db
+import pytest
+from runner import save_results_to_db
+from workflow import AnalysisWorkflow
+
+
+TXS = [
+    {
+        "hash": f"0x{i}",
+        "from_addr": "0xabc",
+        "to_addr": "0xdef",
+        "value": str(10**18),
+        "time": 1_700_000_000 + i,
+    }
+    for i in range(5)
+]
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "transactions.db"))
+    db.init_database()
+
+
+def analysis(txs, sample_size, previous=None):
+    return {"confidence": 0.5}
+
+
+def failing(txs, sample_size, previous=None):
+    return {"confidence": 0.0, "error": "rate limited"}
+
+
+def run_workflow(signal_agent):
+    workflow = AnalysisWorkflow(
+        agent_functions={
+            "position_agent": analysis,
+            "signal_agent": signal_agent,
+            "industry_agent": analysis,
+            "advisor_agent": lambda *results, **kwargs: {"overall_rating": 5},
+        }
+    )
+    return workflow.execute_workflow(TXS, mode="single")
+
+
+def test_run_with_agent_error_is_not_served_as_latest():
+    assert save_results_to_db("0xabc", run_workflow(analysis)) == 1
+    assert save_results_to_db("0xabc", run_workflow(failing)) == 2
+
+    latest = db.get_analysis("0xabc")
+    assert latest["version"] == 1
+    assert "error" not in latest["result"]["signal_analysis"]
+    # The partial run is kept for history
+    assert db.get_latest_analysis_version("0xabc", completed_only=False) == 2
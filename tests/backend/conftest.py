@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# backend modules import each other as top-level modules (e.g. ``import db``)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
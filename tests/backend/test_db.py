@@ -0,0 +1,97 @@
+import json
+import sqlite3
+
+import db
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "transactions.db"))
+    db.init_database()
+
+
+def run(status: str, rating: int, tokens: int = 10):
+    return {
+        "advisor_analysis": {"overall_rating": rating},
+        "metadata": {
+            "status": status,
+            "usage": {"total": {"input_tokens": tokens, "output_tokens": 0}},
+        },
+    }
+
+
+def test_save_analysis_adds_versions_per_address():
+    assert db.save_analysis("0xABC", run("completed", 1)) == 1
+    assert db.save_analysis("0xabc", run("completed", 2)) == 2
+    assert db.save_analysis("0xdef", run("completed", 3)) == 1
+
+    latest = db.get_analysis("0xAbC")
+    assert latest["version"] == 2
+    assert latest["result"]["advisor_analysis"] == {"overall_rating": 2}
+    assert db.get_analysis("0xabc", version=1)["result"]["advisor_analysis"] == {
+        "overall_rating": 1
+    }
+    assert db.get_analysis("0x123") is None
+    assert [row["version"] for row in db.get_analysis_versions("0xabc")] == [2, 1]
+
+
+def test_failed_and_partial_runs_do_not_replace_latest_completed():
+    db.save_analysis("0xabc", run("completed", 1))
+    db.save_analysis("0xabc", run("partial", 2))
+    db.save_analysis("0xabc", run("failed", 3))
+
+    assert db.get_latest_analysis_version("0xabc") == 1
+    assert db.get_latest_analysis_version("0xabc", completed_only=False) == 3
+    assert db.get_analysis("0xabc")["version"] == 1
+    assert db.get_analysis("0xabc", version=3)["result"]["metadata"]["status"] == (
+        "failed"
+    )
+    # Tokens spent on every version count against the address budget
+    assert db.get_analysis_token_usage("0xabc") == 30
+
+
+def test_init_database_migrates_legacy_database_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "legacy.db"))
+    with sqlite3.connect(db.DATABASE_PATH) as conn:
+        conn.execute(
+            "CREATE TABLE transactions (hash TEXT PRIMARY KEY, from_addr TEXT,"
+            " to_addr TEXT, value TEXT, time INTEGER, raw_json TEXT, parsed_json TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE analyses (address TEXT NOT NULL, agent TEXT NOT NULL,"
+            " version INTEGER NOT NULL, created_at INTEGER NOT NULL, fingerprint TEXT,"
+            " result_json TEXT NOT NULL, PRIMARY KEY (address, agent, version))"
+        )
+        conn.execute(
+            "INSERT INTO transactions (hash, from_addr, to_addr) VALUES (?, ?, ?)",
+            ("0x1", "0xABC", "0xDeF"),
+        )
+        for version, status in ((1, "completed"), (2, "partial")):
+            conn.executemany(
+                "INSERT INTO analyses VALUES (?, ?, ?, 0, NULL, ?)",
+                [
+                    ("0xabc", agent, version, json.dumps(result))
+                    for agent, result in run(status, version).items()
+                ],
+            )
+
+    db.init_database()
+    db.insert_transaction({"hash": "0x2", "from": "0xAbc", "to": "0xDEF"})
+
+    with sqlite3.connect(db.DATABASE_PATH) as conn:
+        rows = conn.execute(
+            "SELECT from_addr, to_addr FROM transactions ORDER BY hash"
+        ).fetchall()
+    assert rows == [("0xabc", "0xdef"), ("0xabc", "0xdef")]
+    # Legacy rows get their run status backfilled from the metadata row
+    assert db.get_latest_analysis_version("0xabc") == 1
+
+    # The migration is recorded in user_version and does not scan the table again
+    with sqlite3.connect(db.DATABASE_PATH) as conn:
+        conn.execute("UPDATE transactions SET from_addr = '0xABC' WHERE hash = '0x1'")
+    db.init_database()
+    with sqlite3.connect(db.DATABASE_PATH) as conn:
+        assert conn.execute(
+            "SELECT from_addr FROM transactions WHERE hash = '0x1'"
+        ).fetchone() == ("0xABC",)
@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from llm_cache import LLMCache, is_json_response
+
+
+@pytest.fixture
+def cache(tmp_path) -> LLMCache:
+    return LLMCache(path=str(tmp_path / "llm_cache.db"), max_bytes=1000)
+
+
+def last_access(cache: LLMCache, key: str) -> float:
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute(
+            "SELECT last_access FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def default_cache_path(cwd: Path, backend_dir: str) -> str:
+    env = {k: v for k, v in os.environ.items() if k != "LLM_CACHE_PATH"}
+    code = (
+        f"import sys; sys.path.append({backend_dir!r}); "
+        "import llm_cache; print(llm_cache.LLM_CACHE_PATH)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return out.stdout.strip()
+
+
+def test_default_path_is_shared_by_backend_and_analysis_demo():
+    # uvicorn runs from backend/, the demo scripts append ../backend from analysis_demo/
+    from_backend = default_cache_path(REPO_ROOT / "backend", ".")
+    from_demo = default_cache_path(
+        REPO_ROOT / "analysis_demo", os.path.join("..", "backend")
+    )
+
+    assert os.path.isabs(from_backend)
+    assert from_backend == from_demo == str(REPO_ROOT / "llm_cache.db")
+
+
+def test_entries_expire_after_ttl(cache):
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    cache.ttl_seconds = -1
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.touch_seconds = -1  # Record every access
+    cache.set("a", "x" * 400)
+    cache.set("b", "y" * 400)
+    cache.get("a")
+    cache.set("c", "z" * 400)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 400
+    assert cache.get("c") == "z" * 400
+
+
+def test_invalid_and_empty_responses_are_not_cached(cache):
+    calls = []
+
+    def call(reply):
+        def request():
+            calls.append(reply)
+            return reply
+
+        return request
+
+    args = ("claude", "model", 0.1, "prompt")
+    assert cache.get_or_call(*args, call("not json"), validate=is_json_response)
+    assert cache.get_or_call(*args, call(""), validate=is_json_response) == ""
+    assert cache.get_or_call(*args, call('{"ok": 1}'), validate=is_json_response)
+    assert cache.get_or_call(*args, call("unused"), validate=is_json_response) == (
+        '{"ok": 1}'
+    )
+    assert calls == ["not json", "", '{"ok": 1}']
+
+
+def test_invalid_cached_entry_is_replaced(cache):
+    args = ("claude", "model", 0.1, "prompt")
+    cache.get_or_call(*args, lambda: "stale, not json")
+
+    result = cache.get_or_call(*args, lambda: '{"ok": 1}', validate=is_json_response)
+
+    assert result == '{"ok": 1}'
+    assert cache.get_or_call(*args, lambda: "unused") == '{"ok": 1}'
+
+
+def test_hits_skip_writes_until_touch_interval(cache):
+    cache.counter_flush_every = 3
+    cache.set("key", "value")
+    created = last_access(cache, "key")
+
+    cache.get("key")
+    cache.get("key")
+    assert last_access(cache, "key") == created
+    with sqlite3.connect(cache.path) as conn:
+        assert conn.execute("SELECT * FROM llm_cache_counters").fetchall() == []
+
+    cache.get("missing")
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+    cache.touch_seconds = -1
+    cache.get("key")
+    assert last_access(cache, "key") > created
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+
+import pytest
+from router import ProviderRouter
+
+
+OK = json.dumps({"action": "transfer"})
+
+
+def error_result(message: str = "failed") -> str:
+    return json.dumps({"action": "unknown", "error": message})
+
+
+def make_router(**providers) -> ProviderRouter:
+    return ProviderRouter(
+        providers=providers, min_samples=3, default_hedge_delay=0.05, timeout=5
+    )
+
+
+def record(router: ProviderRouter, name: str, latencies, ok: bool = True):
+    for latency in latencies:
+        router.stats[name].record(latency, ok)
+
+
+def test_rank_prefers_fast_reliable_providers():
+    router = make_router(a=None, b=None, c=None)
+    record(router, "a", [0.5, 0.5, 0.5])
+    record(router, "b", [0.2, 0.2, 0.2])
+    # c has too few samples and is tried first
+    assert router.rank() == ["c", "b", "a"]
+
+    record(router, "c", [0.1, 0.1, 0.1])
+    assert router.rank() == ["c", "b", "a"]
+
+    # Errors multiply c's p50 by (1 + 4 * error rate): 0.1 * 3 = 0.3
+    record(router, "c", [0.1, 0.1, 0.1], ok=False)
+    assert router.rank() == ["b", "c", "a"]
+
+
+def test_hedge_delay_uses_p95_after_min_samples():
+    router = make_router(a=None)
+    assert router.hedge_delay("a") == router.default_hedge_delay
+
+    record(router, "a", [0.1, 0.2, 0.3, 0.4])
+    assert router.hedge_delay("a") == 0.4
+
+
+def test_slow_primary_is_hedged_and_losing_thread_keeps_running():
+    started, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+    def slow(tx):
+        started.set()
+        release.wait(5)
+        finished.set()
+        return OK
+
+    router = make_router(slow=slow, fast=lambda tx: OK)
+
+    assert router.parse({"hash": "0x1"}) == OK
+    assert (router.hedged_requests, router.hedge_wins) == (1, 1)
+
+    # Cancelling the losing future cannot stop a thread that already started:
+    # it runs to completion, its result is dropped, its latency still counts
+    assert started.is_set() and not finished.is_set()
+    assert router.stats["slow"].count() == 0
+    release.set()
+    assert finished.wait(5)
+    deadline = time.monotonic() + 5
+    while router.stats["slow"].count() == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert router.stats["slow"].count() == 1
+
+
+def test_failed_primary_falls_back_without_counting_a_hedge():
+    def broken(tx):
+        raise RuntimeError("boom")
+
+    router = make_router(broken=broken, backup=lambda tx: OK)
+
+    assert router.parse({}) == OK
+    assert (router.hedged_requests, router.hedge_wins) == (0, 1)
+    assert router.stats["broken"].error_rate() == 1.0
+
+
+def raise_value_error(tx):
+    raise ValueError("a")
+
+
+def test_all_failures_return_the_last_error():
+    router = make_router(a=lambda tx: error_result("a"), b=lambda tx: error_result("b"))
+
+    assert json.loads(router.parse({}))["error"] in ("a", "b")
+
+    router = make_router(a=raise_value_error)
+    with pytest.raises(ValueError):
+        router.parse({})
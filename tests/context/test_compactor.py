@@ -0,0 +1,124 @@
+import re
+from typing import List
+
+import pytest
+
+from app.config import ContextSettings
+from app.context import SUMMARY_PREFIX, ContextCompactor, group_turns
+from app.llm import TokenCounter
+from app.schema import Function, Memory, Message, Role, ToolCall
+
+
+class WordTokenizer:
+    def encode(self, text: str) -> List[str]:
+        return re.findall(r"\w+|[^\w\s]", text)
+
+
+class FakeLLM:
+    """Counts tokens like LLM and answers summary requests without a network."""
+
+    def __init__(self):
+        self.token_counter = TokenCounter(WordTokenizer())
+        self.prompts: List[str] = []
+
+    def count_tokens(self, text: str) -> int:
+        return self.token_counter.count_text(text)
+
+    def count_message_tokens(self, messages: List[dict]) -> int:
+        return self.token_counter.count_message_tokens(messages)
+
+    async def ask(self, messages, stream=True, temperature=None) -> str:
+        self.prompts.append(messages[0].content)
+        return f"summary {len(self.prompts)}"
+
+
+def add_step(memory: Memory, step: int, observation_words: int) -> None:
+    call_id = f"call_{step}"
+    memory.add_message(Message.user_message("What next?"))
+    memory.add_message(
+        Message.from_tool_calls(
+            [ToolCall(id=call_id, function=Function(name="browse", arguments="{}"))],
+            content=f"step {step}",
+        )
+    )
+    memory.add_message(
+        Message.tool_message(
+            "word " * observation_words, name="browse", tool_call_id=call_id
+        )
+    )
+
+
+@pytest.fixture
+def llm() -> FakeLLM:
+    return FakeLLM()
+
+
+def make_compactor(llm: FakeLLM, max_tokens: int = 20000) -> ContextCompactor:
+    settings = ContextSettings(
+        max_tokens=max_tokens, max_tool_output_tokens=2000, summary_tokens=500
+    )
+    return ContextCompactor(llm, settings, summary_llm=llm)
+
+
+@pytest.mark.asyncio
+async def test_disabled_without_budget(llm: FakeLLM):
+    compactor = ContextCompactor(llm, ContextSettings(), summary_llm=llm)
+    memory = Memory()
+    add_step(memory, 0, 50000)
+
+    assert not await compactor.compact(memory)
+    assert len(memory.messages) == 3
+
+
+@pytest.mark.asyncio
+async def test_truncates_tool_outputs_before_summarizing(llm: FakeLLM):
+    compactor = make_compactor(llm)
+    memory = Memory()
+    add_step(memory, 0, 25000)
+    add_step(memory, 1, 1000)
+
+    assert await compactor.compact(memory)
+    assert llm.prompts == []
+    assert "characters truncated" in memory.messages[2].content
+    assert memory.messages[5].content == "word " * 1000
+    assert compactor.count(memory.messages) <= 20000
+
+
+@pytest.mark.asyncio
+async def test_long_session_stays_within_budget(llm: FakeLLM):
+    compactor = make_compactor(llm)
+    memory = Memory(max_messages=1000)
+    for step in range(60):
+        add_step(memory, step, 5000 if step % 3 == 0 else 800)
+        await compactor.compact(memory, reserved_tokens=1000)
+
+        assert compactor.count(memory.messages) <= 19000
+        # Tool results always follow their tool call
+        for previous, message in zip(memory.messages, memory.messages[1:]):
+            if message.role == Role.TOOL:
+                assert previous.role in (Role.TOOL, Role.ASSISTANT)
+        assert memory.messages[0].role != Role.TOOL
+
+    assert memory.messages[0].content.startswith(SUMMARY_PREFIX)
+    assert 0 < len(llm.prompts) < 30
+    # The rolling summary is carried into the next one
+    assert "summary 1" in llm.prompts[1]
+
+
+def test_group_turns_keeps_tool_results_with_call():
+    memory = Memory()
+    add_step(memory, 0, 1)
+    memory.add_message(
+        Message.tool_message("second result", name="browse", tool_call_id="call_0")
+    )
+
+    groups = group_turns(memory.messages)
+    assert [len(group) for group in groups] == [1, 3]
+
+
+def test_memory_trim_drops_orphaned_tool_results():
+    memory = Memory(max_messages=4)
+    for step in range(3):
+        add_step(memory, step, 1)
+
+    assert memory.messages[0].role != Role.TOOL
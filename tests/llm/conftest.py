@@ -0,0 +1,118 @@
+import re
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+import httpx
+import pytest
+from openai import RateLimitError
+from openai.types.chat import ChatCompletion
+
+from app.llm import LLM, ResponseCache, TokenCounter
+
+
+REQUEST = httpx.Request("POST", "https://api.test/v1/chat/completions")
+
+
+class WordTokenizer:
+    """Counts words and punctuation, so tests need no tiktoken download."""
+
+    def encode(self, text: str) -> List[str]:
+        return re.findall(r"\w+|[^\w\s]", text)
+
+
+def make_status_error(cls, status_code: int, headers=None):
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return cls("error", response=response, body=None)
+
+
+class RateLimitedCompletions:
+    """Rejects the first calls with a 429 carrying Retry-After."""
+
+    def __init__(self, failures: int, error=None):
+        self.calls = 0
+        self.failures = failures
+        self.error = error or make_status_error(
+            RateLimitError, 429, {"retry-after-ms": "20"}
+        )
+
+    async def create(self, **params) -> ChatCompletion:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return ChatCompletion.model_validate(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "done"},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 1,
+                    "total_tokens": 6,
+                },
+            }
+        )
+
+
+@pytest.fixture
+def make_llm() -> Callable[..., LLM]:
+    """Factory for LLMs that bypass the singleton and client setup.
+
+    ``completions`` stands in for ``client.chat.completions`` and is also
+    kept as ``llm.completions`` for assertions.
+    """
+
+    def factory(
+        completions=None,
+        *,
+        model: str = "gpt-4o",
+        api_type: str = "openai",
+        base_url: str = "https://api.openai.com/v1",
+        api_key: str = "key",
+        prompt_cache: bool = False,
+        temperature: float = 0.0,
+        max_tokens: int = 100,
+        max_input_tokens: Optional[int] = None,
+        cache_size: int = 0,
+    ) -> LLM:
+        llm = object.__new__(LLM)
+        llm.model = model
+        llm.api_type = api_type
+        llm.base_url = base_url
+        llm.api_key = api_key
+        llm.prompt_cache = prompt_cache
+        llm.max_tokens = max_tokens
+        llm.temperature = temperature
+        llm.max_input_tokens = max_input_tokens
+        llm.total_input_tokens = 0
+        llm.total_completion_tokens = 0
+        llm.total_cached_tokens = 0
+        llm.retry_count = 0
+        llm.retry_seconds = 0.0
+        llm.token_counter = TokenCounter(WordTokenizer())
+        llm.response_cache = ResponseCache(cache_size, ttl=60)
+        llm._inflight = {}
+        llm.completions = completions
+        llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return llm
+
+    return factory
+
+
+@pytest.fixture
+def status_error():
+    """Factory for OpenAI status errors: ``status_error(RateLimitError, 429)``"""
+    return make_status_error
+
+
+@pytest.fixture
+def rate_limited_completions():
+    """The RateLimitedCompletions class, to build with a number of failures"""
+    return RateLimitedCompletions
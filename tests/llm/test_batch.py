@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletion
+
+from app.rate_limit import (
+    EXPECTED_COMPLETION_TOKENS,
+    RateLimiter,
+    estimate_request_tokens,
+    get_rate_limiter,
+    parse_duration,
+    rate_limit_hooks,
+)
+from app.schema import Message
+
+
+class FlakyCompletions:
+    """Answers with the prompt, fails on prompts containing "fail"."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **params) -> ChatCompletion:
+        prompt = params["messages"][-1]["content"]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            # Later prompts finish first
+            await asyncio.sleep(0.01 * (10 - int(prompt.split()[-1])))
+        finally:
+            self.active -= 1
+        if "fail" in prompt:
+            raise ValueError(f"cannot answer {prompt}")
+        return ChatCompletion.model_validate(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": f"re: {prompt}"},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 2,
+                    "total_tokens": 7,
+                },
+            }
+        )
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_order_and_reports_errors(make_llm):
+    llm = make_llm(FlakyCompletions(), temperature=0.7)
+    prompts = ["ask 1", "ask 2", "fail 3", "ask 4", "ask 5"]
+
+    results = await llm.ask_batch(
+        [[Message.user_message(prompt)] for prompt in prompts], max_concurrency=2
+    )
+
+    assert results[:2] == ["re: ask 1", "re: ask 2"]
+    assert isinstance(results[2], ValueError)
+    assert results[3:] == ["re: ask 4", "re: ask 5"]
+    assert llm.completions.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_streaming(make_llm):
+    llm = make_llm(FlakyCompletions())
+
+    with pytest.raises(ValueError):
+        await llm.ask_batch([[Message.user_message("ask 1")]], stream=True)
+    assert llm.completions.peak == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_waits_for_retry_after_and_request_quota():
+    limiter = RateLimiter()
+    limiter.observe(429, {"retry-after-ms": "100"})
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+    limiter.observe(
+        200,
+        {"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "50ms"},
+    )
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start < 0.04
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_limiter_per_minute_window():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=100)
+    limiter._sent.extend([[0.0, 40], [10.0, 40]])
+
+    assert limiter._wait_time(10, now=20.0) == pytest.approx(40.0)
+    limiter.requests_per_minute = None
+    assert limiter._wait_time(10, now=20.0) <= 0
+    assert limiter._wait_time(30, now=20.0) == pytest.approx(40.0)
+    assert limiter._wait_time(30, now=61.0) <= 0
+
+
+def test_parse_duration_and_request_estimate():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("soon") is None
+
+    request = httpx.Request(
+        "POST", "https://api.test/v1/chat", json={"max_tokens": 50, "x": "y" * 400}
+    )
+    assert estimate_request_tokens(request) == len(request.content) // 4 + 50
+
+    request = httpx.Request(
+        "POST", "https://api.test/v1/chat", json={"max_tokens": 4096, "x": "y"}
+    )
+    assert estimate_request_tokens(request) == (
+        len(request.content) // 4 + EXPECTED_COMPLETION_TOKENS
+    )
+
+
+def test_limiter_works_across_event_loops():
+    limiter = RateLimiter()
+
+    async def burst():
+        # Concurrent waiters contend for the loop's lock
+        limiter.observe(429, {"retry-after-ms": "20"})
+        await asyncio.gather(limiter.acquire(), limiter.acquire())
+
+    asyncio.run(burst())
+    asyncio.run(burst())
+    assert len(limiter._sent) == 4
+
+
+@pytest.mark.asyncio
+async def test_window_is_corrected_with_reported_usage():
+    base_url = "https://usage.example.com/v1"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"usage": {"total_tokens": 42}})
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        event_hooks=rate_limit_hooks(base_url, "key"),
+    ) as client:
+        response = await client.post(
+            f"{base_url}/chat/completions", json={"max_tokens": 4096, "x": "y" * 4000}
+        )
+
+    assert response.json()["usage"]["total_tokens"] == 42
+    assert get_rate_limiter(base_url, "key")._sent[-1][1] == 42
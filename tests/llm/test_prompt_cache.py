@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.bedrock import CACHE_POINT, ChatCompletions
+from app.config import LLMSettings
+from app.llm import CACHE_CONTROL, LLM
+
+
+OPENROUTER = "https://openrouter.ai/api/v1"
+
+
+@pytest.fixture
+def cache_llm(make_llm):
+    """An LLM with prompt caching on, behind an endpoint that takes markers"""
+
+    def factory(model: str, **kwargs):
+        kwargs.setdefault("base_url", OPENROUTER)
+        kwargs.setdefault("prompt_cache", True)
+        return make_llm(model=model, **kwargs)
+
+    return factory
+
+
+def tool(name: str) -> dict:
+    return {"type": "function", "function": {"name": name, "parameters": {}}}
+
+
+@pytest.fixture
+def messages() -> list:
+    return [
+        {"role": "system", "content": "You are an agent."},
+        {"role": "user", "content": "Task"},
+        {"role": "assistant", "content": "Working"},
+        {"role": "user", "content": "Next step?"},
+    ]
+
+
+def test_openai_sorts_tools_without_markers(cache_llm, messages):
+    llm = cache_llm("gpt-4o")
+    sent, tools = llm.apply_prompt_cache(messages, [tool("b"), tool("a")])
+
+    assert sent is messages
+    assert [t["function"]["name"] for t in tools] == ["a", "b"]
+    assert "cache_control" not in tools[-1]
+
+
+def test_claude_marks_tools_system_and_latest_message(cache_llm, messages):
+    llm = cache_llm("claude-3-7-sonnet-20250219")
+    sent, tools = llm.apply_prompt_cache(messages, [tool("b"), tool("a")])
+
+    assert tools[-1]["cache_control"] == CACHE_CONTROL
+    assert sent[0]["content"] == [
+        {"type": "text", "text": "You are an agent.", "cache_control": CACHE_CONTROL}
+    ]
+    assert sent[-1]["content"][-1]["cache_control"] == CACHE_CONTROL
+    assert sent[1:3] == messages[1:3]
+    # The caller's messages are not modified
+    assert messages[0]["content"] == "You are an agent."
+
+
+def test_anthropic_openai_endpoint_gets_no_markers(cache_llm, messages):
+    # api.anthropic.com's OpenAI-compatible API rejects cache_control
+    llm = cache_llm(
+        "claude-3-7-sonnet-20250219", base_url="https://api.anthropic.com/v1/"
+    )
+    sent, tools = llm.apply_prompt_cache(messages, [tool("a")])
+
+    assert sent is messages
+    assert all(isinstance(message["content"], str) for message in sent)
+    assert "cache_control" not in tools[-1]
+
+
+def test_prompt_cache_is_off_by_default():
+    assert LLMSettings.model_fields["prompt_cache"].default is False
+
+
+def test_prompt_cache_can_be_disabled(cache_llm, messages):
+    llm = cache_llm("claude-3-7-sonnet-20250219", prompt_cache=False)
+    sent, _ = llm.apply_prompt_cache(messages)
+
+    assert sent is messages
+
+
+def test_bedrock_markers_become_cache_points(cache_llm, messages):
+    llm = cache_llm("anthropic.claude-3-7-sonnet", api_type="aws")
+    sent, tools = llm.apply_prompt_cache(messages, [tool("a")])
+
+    converter = ChatCompletions(client=None)
+    system, bedrock_messages = converter._convert_openai_messages_to_bedrock_format(
+        sent
+    )
+    assert system[-1] == CACHE_POINT
+    assert bedrock_messages[-1]["content"][-1] == CACHE_POINT
+    assert converter._convert_openai_tools_to_bedrock_format(tools)[-1] == CACHE_POINT
+
+
+def test_cached_tokens_from_usage():
+    openai_usage = SimpleNamespace(
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1024)
+    )
+    anthropic_usage = SimpleNamespace(cache_read_input_tokens=512)
+
+    assert LLM.cached_tokens(openai_usage) == 1024
+    assert LLM.cached_tokens(anthropic_usage) == 512
+    assert LLM.cached_tokens(SimpleNamespace()) == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from app.llm import ResponseCache
+from app.schema import Message
+
+
+class FakeCompletions:
+    """Answers after a short delay and counts upstream calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params) -> ChatCompletion:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return ChatCompletion.model_validate(
+            {
+                "id": f"chatcmpl-{self.calls}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": f"answer {self.calls}",
+                        },
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 2,
+                    "total_tokens": 12,
+                },
+            }
+        )
+
+
+MESSAGES = [Message.user_message("Plan the task")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(make_llm):
+    llm = make_llm(FakeCompletions())
+    replies = await asyncio.gather(
+        *(llm.ask_tool(MESSAGES, tools=[]) for _ in range(5))
+    )
+
+    assert llm.completions.calls == 1
+    assert {reply.content for reply in replies} == {"answer 1"}
+    assert len({id(reply) for reply in replies}) == 5
+
+
+@pytest.mark.asyncio
+async def test_nondeterministic_requests_are_not_shared(make_llm):
+    llm = make_llm(FakeCompletions(), temperature=0.7)
+    await asyncio.gather(*(llm.ask_tool(MESSAGES, tools=[]) for _ in range(3)))
+
+    assert llm.completions.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_repeats_and_honours_opt_out(make_llm):
+    llm = make_llm(FakeCompletions(), cache_size=8)
+    first = await llm.ask(MESSAGES, stream=False)
+    second = await llm.ask(MESSAGES, stream=False)
+    fresh = await llm.ask(MESSAGES, stream=False, use_cache=False)
+
+    assert first == second == "answer 1"
+    assert fresh == "answer 2"
+    assert llm.completions.calls == 2
+
+
+def test_response_cache_expires_and_evicts():
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.ttl = -1
+    cache.put("d", 4)
+    assert cache.get("d") is None
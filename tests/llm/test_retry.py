@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import AuthenticationError, BadRequestError, RateLimitError
+
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
+from app.llm import is_transient_error
+from app.schema import Message
+
+
+def test_error_classification(status_error):
+    assert is_transient_error(status_error(RateLimitError, 429))
+    assert is_transient_error(status_error(BadRequestError, 503))
+    assert is_transient_error(httpx.ReadTimeout("slow"))
+    assert is_transient_error(asyncio.TimeoutError())
+    assert is_transient_error(EmptyResponseError("empty"))
+
+    assert not is_transient_error(status_error(BadRequestError, 400))
+    assert not is_transient_error(status_error(AuthenticationError, 401))
+    assert not is_transient_error(TokenLimitExceeded("too long"))
+    assert not is_transient_error(ValueError("Invalid tool_choice"))
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_retried_after_retry_after(make_llm, rate_limited_completions):
+    llm = make_llm(rate_limited_completions(failures=2))
+
+    reply = await llm.ask([Message.user_message("ask 1")], stream=False)
+
+    assert reply == "done"
+    assert llm.completions.calls == 3
+    assert llm.retry_count == 2
+    # Two 20 ms waits, not the 1 s+ exponential backoff
+    assert 0.04 <= llm.retry_seconds < 0.5
+
+
+@pytest.mark.asyncio
+async def test_client_errors_fail_fast(
+    make_llm, rate_limited_completions, status_error
+):
+    llm = make_llm(
+        rate_limited_completions(failures=1, error=status_error(BadRequestError, 400))
+    )
+
+    with pytest.raises(BadRequestError):
+        await llm.ask([Message.user_message("ask 1")], stream=False)
+    assert llm.completions.calls == 1
+
+    llm.max_input_tokens = 1
+    with pytest.raises(TokenLimitExceeded):
+        await llm.ask_tool([Message.user_message("ask 1")], tools=[])
+    assert llm.retry_count == 0
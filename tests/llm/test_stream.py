@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from app.schema import Message
+
+
+def chunk(delta: dict, finish_reason=None) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chunk",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+    )
+
+
+class FakeStream:
+    def __init__(self, chunks: List[ChatCompletionChunk]):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for item in self.chunks:
+            await asyncio.sleep(0.01)
+            yield item
+
+
+def streaming(chunks: List[ChatCompletionChunk]) -> SimpleNamespace:
+    async def create(**params):
+        assert params["stream"] is True
+        return FakeStream(chunks)
+
+    return SimpleNamespace(create=create)
+
+
+MESSAGES = [Message.user_message("Hello")]
+
+
+@pytest.mark.asyncio
+async def test_ask_stream_yields_content_deltas_and_stats(make_llm):
+    llm = make_llm(
+        streaming(
+            [
+                chunk({"role": "assistant", "content": "Hello"}),
+                chunk({"content": " world"}),
+                chunk({}, finish_reason="stop"),
+            ]
+        )
+    )
+    deltas = [delta async for delta in llm.ask_stream(MESSAGES)]
+
+    assert [d.content for d in deltas[:-1]] == ["Hello", " world"]
+    final = deltas[-1]
+    assert final.finish_reason == "stop"
+    assert final.tool_calls is None
+    assert final.stats.time_to_first_token > 0
+    assert final.stats.completion_tokens == 2
+    assert llm.total_completion_tokens == 2
+
+
+@pytest.mark.asyncio
+async def test_ask_stream_assembles_tool_call_arguments(make_llm):
+    llm = make_llm(
+        streaming(
+            [
+                chunk(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": 0,
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {"name": "search", "arguments": ""},
+                            }
+                        ]
+                    }
+                ),
+                chunk(
+                    {"tool_calls": [{"index": 0, "function": {"arguments": '{"q": '}}]}
+                ),
+                chunk(
+                    {"tool_calls": [{"index": 0, "function": {"arguments": '"x"}'}}]}
+                ),
+                chunk({}, finish_reason="tool_calls"),
+            ]
+        )
+    )
+    tools = [{"type": "function", "function": {"name": "search"}}]
+    deltas = [delta async for delta in llm.ask_stream(MESSAGES, tools=tools)]
+
+    assert [d.tool_arguments for d in deltas[:-1]] == ["", '{"q": ', '"x"}']
+    final = deltas[-1]
+    assert final.finish_reason == "tool_calls"
+    assert final.tool_calls[0].id == "call_1"
+    assert final.tool_calls[0].function.name == "search"
+    assert final.tool_calls[0].function.arguments == '{"q": "x"}'
+
+
+@pytest.mark.asyncio
+async def test_ask_prints_stream(make_llm, capsys):
+    llm = make_llm(streaming([chunk({"content": "Hi"}), chunk({"content": "!"})]))
+
+    assert await llm.ask(MESSAGES, use_cache=False) == "Hi!"
+    assert capsys.readouterr().out == "Hi!\n"
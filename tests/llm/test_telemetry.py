@@ -0,0 +1,71 @@
+import json
+import sqlite3
+
+import pytest
+
+from app import telemetry as telemetry_module
+from app.schema import Message
+from app.telemetry import LLMCallRecord, Telemetry, llm_call_context
+
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    buffer = Telemetry(buffer_size=10)
+    monkeypatch.setattr(telemetry_module, "telemetry", buffer)
+    return buffer
+
+
+@pytest.mark.asyncio
+async def test_calls_are_recorded_per_agent_step(
+    telemetry, make_llm, rate_limited_completions
+):
+    llm = make_llm(rate_limited_completions(failures=1), temperature=0.7)
+
+    with llm_call_context("manus", 3):
+        await llm.ask_tool([Message.user_message("ask 1")], tools=[])
+    await llm.ask([Message.user_message("ask 2")], stream=False)
+
+    first, second = telemetry.records
+    assert (first.agent, first.step, first.method) == ("manus", 3, "ask_tool")
+    assert (first.prompt_tokens, first.completion_tokens) == (5, 1)
+    assert first.retries == 1 and first.retry_seconds > 0
+    assert first.latency >= first.retry_seconds
+    assert first.stop_reason == "stop"
+    assert (second.agent, second.step, second.retries) == (None, None, 0)
+
+
+def test_ring_buffer_and_summary():
+    telemetry = Telemetry(buffer_size=3)
+    for step, latency in [(1, 9.0), (1, 1.0), (2, 2.0), (2, 4.0)]:
+        telemetry.record(
+            LLMCallRecord(
+                model="gpt-4o",
+                method="ask_tool",
+                agent="manus",
+                step=step,
+                prompt_tokens=10,
+                latency=latency,
+            )
+        )
+
+    rows = telemetry.summary()
+    assert [(row["step"], row["calls"]) for row in rows] == [(2, 2), (1, 1)]
+    assert rows[0]["latency"] == 6.0 and rows[0]["mean_latency"] == 3.0
+    assert telemetry.summary(by=("model",))[0]["prompt_tokens"] == 30
+
+
+@pytest.mark.parametrize("name", ["calls.jsonl", "calls.db"])
+def test_sinks(tmp_path, name):
+    sink = tmp_path / "logs" / name
+    telemetry = Telemetry(sink=str(sink))
+    telemetry.record(LLMCallRecord(model="gpt-4o", method="ask", latency=1.5))
+    telemetry.close()
+
+    if sink.suffix == ".jsonl":
+        rows = [json.loads(line) for line in sink.read_text().splitlines()]
+        assert rows[0]["latency"] == 1.5
+    else:
+        with sqlite3.connect(sink) as db:
+            assert db.execute("SELECT model, latency FROM llm_calls").fetchall() == [
+                ("gpt-4o", 1.5)
+            ]
@@ -0,0 +1,91 @@
+import re
+from typing import List
+
+import pytest
+
+from app.llm import TokenCounter
+
+
+class CountingTokenizer:
+    """Splits on words and punctuation and records every encoded text."""
+
+    def __init__(self):
+        self.encoded: List[str] = []
+
+    def encode(self, text: str) -> List[str]:
+        self.encoded.append(text)
+        return re.findall(r"\w+|[^\w\s]", text)
+
+
+@pytest.fixture
+def tokenizer() -> CountingTokenizer:
+    return CountingTokenizer()
+
+
+def make_history(steps: int, size: int = 1000) -> List[dict]:
+    history = [{"role": "system", "content": "You are an agent."}]
+    for step in range(steps):
+        history.append(
+            {
+                "role": "tool",
+                "content": f"observation {step} " + "x " * size,
+                "name": "browser_use",
+                "tool_call_id": f"call_{step}",
+            }
+        )
+    return history
+
+
+def test_cached_counts_match_uncached(tokenizer: CountingTokenizer):
+    history = make_history(5)
+    cached = TokenCounter(tokenizer)
+    uncached = TokenCounter(tokenizer, cache_max_chars=0)
+
+    assert cached.count_message_tokens(history) == uncached.count_message_tokens(
+        history
+    )
+    assert cached.count_message_tokens(history) == uncached.count_message_tokens(
+        history
+    )
+
+
+def test_long_texts_encoded_once(tokenizer: CountingTokenizer):
+    counter = TokenCounter(tokenizer)
+    history = make_history(1)
+    for step in range(1, 10):
+        history += make_history(step + 1)[-1:]
+        counter.count_message_tokens(history)
+
+    long_texts = [t for t in tokenizer.encoded if len(t) >= counter.CACHE_MIN_CHARS]
+    assert len(long_texts) == len(set(long_texts)) == 10
+
+
+def test_cache_evicts_least_recently_used(tokenizer: CountingTokenizer):
+    first, second, third = ("a " * 200, "b " * 200, "c " * 200)
+    counter = TokenCounter(tokenizer, cache_max_chars=800)
+
+    counter.count_text(first)
+    counter.count_text(second)
+    counter.count_text(first)
+    counter.count_text(third)
+
+    tokenizer.encoded.clear()
+    counter.count_text(first)
+    counter.count_text(second)
+    assert tokenizer.encoded == [second]
+
+
+def test_tokenizer_loaded_on_first_count(monkeypatch, tokenizer: CountingTokenizer):
+    loaded = []
+
+    def fake_get_tokenizer(model: str) -> CountingTokenizer:
+        loaded.append(model)
+        return tokenizer
+
+    monkeypatch.setattr("app.llm.get_tokenizer", fake_get_tokenizer)
+    counter = TokenCounter(model="gpt-4o")
+    assert loaded == []
+
+    assert counter.count_text("Hello, world") == 3
+    counter.count_text("again")
+    assert loaded == ["gpt-4o"]
@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+
+import httpx
+import pytest
+
+from app import transport
+from app.rate_limit import SKIP_RATE_LIMIT, get_rate_limiter, rate_limit_hooks
+from app.transport import close_http_clients, get_http_client
+
+
+@pytest.mark.asyncio
+async def test_clients_shared_per_endpoint():
+    first = get_http_client("https://api.example.com/v1", "key-a")
+
+    assert get_http_client("https://api.example.com/v1", "key-a") is first
+    assert get_http_client("https://api.example.com/v1", "key-b") is not first
+    assert get_http_client("https://other.example.com/v1", "key-a") is not first
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_closed_client_is_replaced():
+    client = get_http_client("https://api.example.com/v1", "key")
+    await client.aclose()
+
+    assert get_http_client("https://api.example.com/v1", "key") is not client
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_llm_rebuilds_client_when_shared_pool_was_closed(make_llm):
+    llm = make_llm(base_url="https://api.example.com/v1")
+    llm.client = llm._create_client()
+    other = make_llm(base_url="https://api.example.com/v1")
+    other.client = other._create_client()
+
+    # Closing one instance's client closes the pool both use
+    await other.client.close()
+
+    assert llm.client.is_closed() is False
+    assert llm.client._client is get_http_client(llm.base_url, llm.api_key)
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_requests_bypass_the_rate_limiter():
+    limiter = get_rate_limiter("https://warm.example.com/v1", "key")
+    limiter.observe(429, {"retry-after": "60"})
+    hooks = rate_limit_hooks("https://warm.example.com/v1", "key")
+    request = httpx.Request(
+        "HEAD", "https://warm.example.com/v1", extensions={SKIP_RATE_LIMIT: True}
+    )
+
+    # Returns at once although the endpoint is blocked for a minute
+    await asyncio.wait_for(hooks["request"][0](request), timeout=1)
+    await hooks["response"][0](httpx.Response(429, request=request))
+    assert limiter._sent == deque()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_task_is_referenced_until_done(monkeypatch):
+    finished = asyncio.Event()
+
+    async def fake_warm_up():
+        await finished.wait()
+        return 0
+
+    monkeypatch.setattr(transport, "warm_up", fake_warm_up)
+    monkeypatch.setattr(transport.config.transport_config, "warm_up", True)
+
+    task = transport.start_warm_up()
+    assert task in transport._warm_up_tasks
+    finished.set()
+    await task
+    assert task not in transport._warm_up_tasks